@@ -0,0 +1,273 @@
+"""
+Admission control for upstream Gemini calls
+A shared concurrency limit with a bounded wait queue, plus per-model token
+buckets. Callers that cannot be admitted in time get an AdmissionRejected
+(mapped to 429 / 503 + Retry-After) instead of piling onto the provider.
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional, Tuple
+
+import metrics
+
+QUEUE_DEPTH = metrics.gauge("admission_queue_depth", "Callers waiting for an upstream slot")
+IN_FLIGHT = metrics.gauge("admission_in_flight", "Upstream calls currently admitted")
+WAIT_SECONDS = metrics.histogram("admission_wait_seconds", "Time spent waiting for admission", ["model"])
+REJECTIONS = metrics.counter("admission_rejections_total", "Calls rejected by admission control", ["model", "reason"])
+
+
+class AdmissionRejected(Exception):
+    """Raised when a call cannot be admitted; carries the HTTP mapping."""
+
+    def __init__(self, reason: str, status_code: int, retry_after: float):
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"Upstream busy ({reason}); retry after {self.retry_after}s")
+
+
+class TokenBucket:
+    """Classic token bucket; reservations may drive the balance negative."""
+
+    def __init__(self, rate: float, burst: float, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> Tuple[bool, float]:
+        """Take a token. Returns ``(admitted, wait)``.
+
+        If admitted, the caller must sleep *wait* seconds before proceeding.
+        If not, *wait* is how long until a token would be available.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if wait > max_wait:
+                return False, wait
+            self._tokens -= 1
+            return True, wait
+
+
+class _Waiter:
+    __slots__ = ("granted", "event", "loop", "future")
+
+    def __init__(self, loop=None):
+        self.granted = False
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+
+    def wake(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(True))
+        else:
+            self.event.set()
+
+
+class AdmissionController:
+    """Shared by every code path that calls Gemini (async handlers and worker threads).
+
+    * ``max_concurrency`` – upstream calls allowed in flight at once
+    * ``max_queue`` – callers allowed to wait for a slot; beyond that → 503
+    * ``queue_timeout`` – longest wait for a slot (or a rate-limit token) → 503 / 429
+    * ``rate_limits`` – ``{model: (requests_per_second, burst)}``; ``default_rate``
+      applies to models not listed (``None`` = unlimited)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_queue: int = 32,
+        queue_timeout: float = 10.0,
+        rate_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+        default_rate: Optional[Tuple[float, float]] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate_limits = dict(rate_limits or {})
+        self.default_rate = default_rate
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._waiters: deque = deque()
+        self._in_flight = 0
+        self._avg_hold = 1.0  # EWMA of slot hold time, for Retry-After hints
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """``GEMINI_MAX_CONCURRENCY``, ``GEMINI_MAX_QUEUE``, ``GEMINI_QUEUE_TIMEOUT``,
+        ``GEMINI_RATE_LIMIT`` / ``GEMINI_RATE_BURST`` (default per model) and
+        ``GEMINI_RATE_LIMITS`` (``model=rps[:burst],...`` overrides).
+        """
+        def parse(spec: str) -> Tuple[float, float]:
+            rate, _, burst = spec.partition(":")
+            return float(rate), float(burst or rate)
+
+        default_rate = None
+        if os.getenv("GEMINI_RATE_LIMIT"):
+            rate = float(os.getenv("GEMINI_RATE_LIMIT"))
+            default_rate = (rate, float(os.getenv("GEMINI_RATE_BURST", str(rate))))
+        overrides = {}
+        for item in filter(None, os.getenv("GEMINI_RATE_LIMITS", "").split(",")):
+            model, _, spec = item.partition("=")
+            overrides[model.strip()] = parse(spec.strip())
+        return cls(
+            max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")),
+            max_queue=int(os.getenv("GEMINI_MAX_QUEUE", "32")),
+            queue_timeout=float(os.getenv("GEMINI_QUEUE_TIMEOUT", "10")),
+            rate_limits=overrides,
+            default_rate=default_rate,
+        )
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    @asynccontextmanager
+    async def slot(self, model: str):
+        """``async with controller.slot(model):`` around an async upstream call."""
+        start = time.monotonic()
+        wait = self._reserve_rate(model)
+        if wait:
+            await asyncio.sleep(wait)
+        waiter = self._enqueue(model, loop=asyncio.get_running_loop())
+        if waiter is not None:
+            remaining = max(0.0, self.queue_timeout - (time.monotonic() - start))
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), remaining)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                self._abandon(model, waiter, cancelled=isinstance(e, asyncio.CancelledError))
+        WAIT_SECONDS.observe(time.monotonic() - start, model=model)
+        with self._hold():
+            yield
+
+    @contextmanager
+    def slot_sync(self, model: str):
+        """``with controller.slot_sync(model):`` around a blocking upstream call."""
+        start = time.monotonic()
+        wait = self._reserve_rate(model)
+        if wait:
+            time.sleep(wait)
+        waiter = self._enqueue(model)
+        if waiter is not None:
+            remaining = max(0.0, self.queue_timeout - (time.monotonic() - start))
+            if not waiter.event.wait(remaining):
+                self._abandon(model, waiter)
+        WAIT_SECONDS.observe(time.monotonic() - start, model=model)
+        with self._hold():
+            yield
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "queued": len(self._waiters),
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "queue_timeout": self.queue_timeout,
+            }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _bucket(self, model: str) -> Optional[TokenBucket]:
+        limit = self.rate_limits.get(model, self.default_rate)
+        if limit is None:
+            return None
+        with self._lock:
+            bucket = self._buckets.get(model)
+            if bucket is None:
+                bucket = self._buckets[model] = TokenBucket(*limit)
+            return bucket
+
+    def _reserve_rate(self, model: str) -> float:
+        bucket = self._bucket(model)
+        if bucket is None:
+            return 0.0
+        admitted, wait = bucket.reserve(max_wait=self.queue_timeout)
+        if not admitted:
+            REJECTIONS.inc(model=model, reason="rate_limited")
+            raise AdmissionRejected("rate_limited", 429, wait)
+        return wait
+
+    def _enqueue(self, model: str, loop=None) -> Optional[_Waiter]:
+        """Take a slot now (returns ``None``) or join the wait queue."""
+        with self._lock:
+            if self._in_flight < self.max_concurrency and not self._waiters:
+                self._in_flight += 1
+                IN_FLIGHT.set(self._in_flight)
+                return None
+            if len(self._waiters) >= self.max_queue:
+                retry_after = self._avg_hold * (len(self._waiters) + 1) / self.max_concurrency
+                REJECTIONS.inc(model=model, reason="queue_full")
+                raise AdmissionRejected("queue_full", 503, retry_after)
+            waiter = _Waiter(loop)
+            self._waiters.append(waiter)
+            QUEUE_DEPTH.set(len(self._waiters))
+            return waiter
+
+    def _abandon(self, model: str, waiter: _Waiter, cancelled: bool = False):
+        """Waiter gave up; if a slot was handed over meanwhile, keep it."""
+        with self._lock:
+            if waiter.granted:
+                if not cancelled:
+                    return
+                granted = True
+            else:
+                self._waiters.remove(waiter)
+                QUEUE_DEPTH.set(len(self._waiters))
+                granted = False
+        if cancelled:
+            if granted:
+                self._release(0.0)
+            raise asyncio.CancelledError()
+        REJECTIONS.inc(model=model, reason="queue_timeout")
+        raise AdmissionRejected("queue_timeout", 503, self._avg_hold)
+
+    @contextmanager
+    def _hold(self):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - start)
+
+    def _release(self, held: float):
+        with self._lock:
+            self._avg_hold = 0.9 * self._avg_hold + 0.1 * held if held else self._avg_hold
+            if self._waiters:
+                # Hand the slot straight to the next waiter (in_flight unchanged)
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                QUEUE_DEPTH.set(len(self._waiters))
+                waiter.wake()
+                return
+            self._in_flight -= 1
+            IN_FLIGHT.set(self._in_flight)
+
+
+# ----------------------------------------------------------------------
+# Process-wide controller shared by main.py, gemini_agent and document_analyzer
+# ----------------------------------------------------------------------
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission() -> AdmissionController:
+    """Return the shared controller, configured from the environment on first use."""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController.from_env()
+        return _controller
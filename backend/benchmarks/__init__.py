@@ -0,0 +1 @@
+# Offline benchmarks – run from backend/, e.g. ``python -m benchmarks.bench_session_store``
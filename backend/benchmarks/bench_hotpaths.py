@@ -0,0 +1,286 @@
+"""
+Micro-benchmarks for the CPU-bound hot paths
+Premium calculators, document field extraction, keyword routing, the graph's
+routing decision and session-state copying, on fixed fixtures. Results are
+compared against a stored baseline: each case is measured in several
+interleaved rounds and fails when its median over the rounds is slower than
+the threshold.
+
+Usage (from backend/):
+    python -m benchmarks.bench_hotpaths                      # compare with baseline
+    python -m benchmarks.bench_hotpaths --save-baseline      # record a new baseline
+    python -m benchmarks.bench_hotpaths -k calc --threshold 1.10 --rounds 5
+
+Baselines are machine-specific: record one on the machine you compare on.
+Runs offline (LLM_PROVIDER defaults to ``fake``); cases whose module cannot be
+imported are reported as skipped.
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "hotpaths.json")
+DEFAULT_THRESHOLD = 1.25  # fail if median time grows by more than 25%
+
+# ----------------------------------------------------------------------
+# Fixtures – fixed inputs so runs are comparable
+# ----------------------------------------------------------------------
+AUTO_PROFILE = {
+    "age": 28, "vehicle_year": 2020, "vehicle_make": "Honda", "vehicle_model": "Civic",
+    "years_licensed": 10, "accidents": 0, "violations": 1,
+}
+HOME_PROFILE = {
+    "year_built": 1995, "square_footage": 2200, "construction_type": "brick",
+    "roof_type": "asphalt_shingle", "dwelling_coverage": 350000,
+}
+SIMPLE_AUTO = {k: AUTO_PROFILE[k] for k in ("age", "vehicle_year", "years_licensed", "accidents", "violations")}
+SIMPLE_HOME = {k: HOME_PROFILE[k] for k in ("year_built", "square_footage", "construction_type", "dwelling_coverage")}
+
+EXTRACTION_TEXT = """1. **Insurance Provider**: State Farm
+2. **Policy Type**: Auto
+3. **Policy Number**: SF-123-456-789
+4. **Current Premium**: $187.50 per month ($2,250 annually)
+5. **Coverage Details**:
+   - Liability: $100,000/$300,000/$50,000
+   - Collision: $500 deductible
+   - Comprehensive: $250 deductible
+6. **Policyholder Information**: Jane Doe, 12 Main St, Springfield
+7. **Policy Period**: 01/01/2025 - 07/01/2025
+8. **Additional Coverage**: Roadside assistance, rental reimbursement
+"""
+
+ROUTING_MESSAGES = [
+    "Hi, I need car insurance",
+    "What is comprehensive coverage for my vehicle?",
+    "Explain the difference between dwelling and personal property",
+    "I'm 28 and drive a 2020 Honda Civic",
+    "How does a deductible work on a home policy?",
+    "Please calculate my quote",
+    "Tell me about discounts",
+    "We have a security system and fire alarms, no pool",
+]
+
+
+def make_session(turns: int = 20) -> dict:
+    messages = []
+    for i in range(turns):
+        messages.append(HumanMessage(content=ROUTING_MESSAGES[i % len(ROUTING_MESSAGES)]))
+        messages.append(AIMessage(content="Thanks! Could you tell me a bit more about your vehicle? " * 2))
+    return {
+        "messages": messages,
+        "user_info": dict(AUTO_PROFILE),
+        "insurance_type": "auto",
+        "quote_result": None,
+        "knowledge_context": "",
+        "next_action": "gather_info",
+    }
+
+
+# ----------------------------------------------------------------------
+# Cases
+# ----------------------------------------------------------------------
+@dataclass
+class Case:
+    name: str
+    fn: Callable[[], object]
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence progress prints so they do not pollute the timings."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def build_cases() -> Tuple[List[Case], Dict[str, str]]:
+    """Return ``(cases, skipped)``; *skipped* maps a group to its import error."""
+    cases, skipped = [], {}
+
+    try:
+        import tools
+        cases += [
+            Case("calc.tools.auto", lambda: tools.calculate_auto_premium.invoke(SIMPLE_AUTO)),
+            Case("calc.tools.home", lambda: tools.calculate_home_premium.invoke(SIMPLE_HOME)),
+        ]
+    except Exception as e:
+        skipped["calc.tools"] = repr(e)
+
+    try:
+        import gemini_agent
+        cases += [
+            Case("calc.gemini_agent.auto", lambda: gemini_agent.calculate_auto_premium(**AUTO_PROFILE)),
+            Case("calc.gemini_agent.home", lambda: gemini_agent.calculate_home_premium(**HOME_PROFILE)),
+        ]
+    except Exception as e:
+        skipped["calc.gemini_agent"] = repr(e)
+
+    try:
+        from intent_router import route
+        # The uncached classifier: the LRU would turn every iteration into a hit
+        cases.append(Case("route.intent_router", lambda: [route.__wrapped__(m) for m in ROUTING_MESSAGES]))
+    except Exception as e:
+        skipped["route"] = repr(e)
+
+    try:
+        import langgraph_agent
+        session = make_session()
+        state = {**session, "messages": session["messages"] + [HumanMessage(content="Please calculate my quote")]}
+        cases += [
+            Case("calc.langgraph.auto", lambda: langgraph_agent.calculate_auto_premium.invoke(AUTO_PROFILE)),
+            Case("calc.langgraph.home", lambda: langgraph_agent.calculate_home_premium.invoke(HOME_PROFILE)),
+            Case("route.should_search_knowledge",
+                 lambda: (langgraph_agent.route.cache_clear(), langgraph_agent.should_search_knowledge(state))),
+        ]
+    except Exception as e:
+        skipped["langgraph"] = repr(e)
+
+    try:
+        import document_analyzer
+        cases += [
+            Case("extract.parse_extraction_response",
+                 lambda: document_analyzer.parse_extraction_response(EXTRACTION_TEXT)),
+            Case("extract.extract_field",
+                 lambda: document_analyzer.extract_field(EXTRACTION_TEXT, ["current premium", "premium"])),
+        ]
+    except Exception as e:
+        skipped["extract"] = repr(e)
+
+    try:
+        import server
+        session = make_session()
+        final_state = {**server.graph_state(session), "agent_response": "Here is your quote."}
+        cases += [
+            Case("session.graph_state_round_trip",
+                 lambda: server.apply_graph_state(dict(session), {**final_state, **server.graph_state(session)})),
+        ]
+    except Exception as e:
+        skipped["server"] = repr(e)
+
+    return cases, skipped
+
+
+# ----------------------------------------------------------------------
+# Timing
+# ----------------------------------------------------------------------
+def calibrate(fn, min_seconds: float) -> int:
+    """Loop count so one measurement lasts at least *min_seconds*."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= min_seconds:
+            return number
+        number *= 2
+
+
+def measure(fn, repeat: int, min_seconds: float) -> dict:
+    """Median / min nanoseconds per call over *repeat* calibrated runs (GC off)."""
+    number = calibrate(fn, min_seconds)
+    runs = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            for _ in range(number):
+                fn()
+            runs.append((time.perf_counter_ns() - start) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return {"median_ns": round(statistics.median(runs), 1), "min_ns": round(min(runs), 1), "loops": number}
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> Dict[str, dict]:
+    """Annotate *results* with ``ratio`` against *baseline* and a ``regressed`` flag."""
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            result["ratio"] = None
+            result["regressed"] = False
+            continue
+        ratio = result["median_ns"] / base["median_ns"]
+        result["ratio"] = round(ratio, 3)
+        result["regressed"] = ratio > threshold
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="pattern", help="only cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--rounds", type=int, default=3,
+                        help="interleaved rounds per case; the median round is compared")
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per measurement")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="max allowed median ratio vs baseline")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    cases, skipped = build_cases()
+    if args.pattern:
+        cases = [c for c in cases if args.pattern in c.name]
+
+    # Round-robin over the cases so a noisy stretch hits one round of each,
+    # not every run of one case
+    rounds: Dict[str, List[dict]] = {case.name: [] for case in cases}
+    for _ in range(max(args.rounds, 1)):
+        for case in cases:
+            with quiet():
+                rounds[case.name].append(measure(case.fn, args.repeat, args.min_time))
+    results = {}
+    for name, runs in rounds.items():
+        results[name] = sorted(runs, key=lambda r: r["median_ns"])[len(runs) // 2]
+        print(f"   {name:<40} {results[name]['median_ns'] / 1000:>10.2f} µs", flush=True)
+    for group, reason in skipped.items():
+        print(f"   ⏭️  {group}: skipped ({reason})")
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update({name: {"median_ns": r["median_ns"]} for name, r in results.items()})
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(dict(sorted(baseline.items())), f, indent=2)
+            f.write("\n")
+        print(f"💾 Baseline written to {args.baseline}")
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    compare(results, baseline, args.threshold)
+    report = {"threshold": args.threshold, "results": results, "skipped": skipped}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    regressions = [name for name, r in results.items() if r["regressed"]]
+    for name in regressions:
+        print(f"❌ {name}: {results[name]['ratio']}× baseline (threshold {args.threshold}×)")
+    if regressions:
+        sys.exit(1)
+    print("✅ No regressions" if baseline else "ℹ️  No baseline yet – run with --save-baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Intent router benchmark: routing accuracy and per-message cost
+Scores intent_router.route against a labelled message set (RAG needed,
+insurance type, off-topic) next to the legacy substring checks it replaced,
+and times both per message.
+
+Usage (from backend/):
+    python -m benchmarks.bench_intent_router
+    python -m benchmarks.bench_intent_router --json intent.json --min-accuracy 0.95
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_hotpaths import measure  # noqa: E402
+from intent_router import Intent, route  # noqa: E402
+
+# (message, needs_rag, insurance_type, off_topic)
+LABELLED: List[Tuple[str, bool, object, bool]] = [
+    ("Hi, I need car insurance", False, "auto", False),
+    ("What is comprehensive coverage for my vehicle?", True, "auto", False),
+    ("Explain the difference between dwelling and personal property", True, "home", False),
+    ("I'm 28 and drive a 2020 Honda Civic", False, "auto", False),
+    ("How does a deductible work on a home policy?", True, "home", False),
+    ("Please calculate my quote", False, None, False),
+    ("Tell me about discounts", True, None, False),
+    ("We have a security system and fire alarms, no pool", False, None, False),
+    ("Be careful with my data", False, None, False),
+    ("I scared myself reading the fine print", False, None, False),
+    ("My carpet got ruined by a leak", False, None, False),
+    ("Can you explain what uninsured motorist coverage is?", True, None, False),
+    ("What's the minimum liability for my truck?", True, "auto", False),
+    ("What are the factors affecting auto rates?", True, "auto", False),
+    ("The house was built in 1995 and is about 2,200 square feet", False, "home", False),
+    ("I'd like $350,000 of dwelling coverage", False, "home", False),
+    ("How do homeowners policies handle floods?", True, "home", False),
+    ("What's different about a condo policy?", True, "home", False),
+    ("Is my motorcycle covered in winter?", False, "auto", False),
+    ("Does home insurance include comprehensive coverage?", False, "home", False),
+    ("She drives to work from our house", False, "home", False),
+    ("Is a different car cheaper to insure?", False, "auto", False),
+    ("I have two drivers in the household", False, "auto", False),
+    ("Write me a poem about the ocean", False, None, True),
+    ("Who won the football game last night?", False, None, True),
+    ("Can you help me with my python code?", False, None, True),
+    ("What is the plot of that movie?", True, None, True),
+    ("Tell me a joke", False, None, True),
+    ("Give me a recipe for lasagna", False, None, True),
+    ("Does my policy cover a car accident during a football game trip?", False, "auto", False),
+    ("Actually, I want a home quote instead", False, "home", False),
+    ("Housing prices are crazy", False, None, False),
+    ("Thanks, that's all", False, None, False),
+    # Quote-conversation answers that share words with off-topic requests
+    ("My zip code is 94105", False, None, False),
+    ("Does it cover hail and weather?", False, None, False),
+    ("What about weather damage?", False, None, False),
+    ("I work as a football coach", False, None, False),
+    ("I cook for a living", False, None, False),
+    ("I teach programming at a college", False, None, False),
+]
+
+
+def legacy_route(message: str) -> Intent:
+    """The substring scans the router replaced (server.py / langgraph_agent)."""
+    msg_lower = message.lower()
+    rag_keywords = ["what is", "explain", "tell me about", "how does", "difference"]
+    needs_rag = any(k in msg_lower for k in rag_keywords)
+    insurance_type = None
+    if "auto" in msg_lower or "car" in msg_lower or "vehicle" in msg_lower:
+        insurance_type = "auto"
+    elif "home" in msg_lower or "house" in msg_lower or "property" in msg_lower:
+        insurance_type = "home"
+    return Intent(needs_rag=needs_rag, insurance_type=insurance_type, off_topic=False)
+
+
+def accuracy(router: Callable[[str], Intent], cases=LABELLED) -> Dict[str, object]:
+    """Per-field and exact-match accuracy of *router* on *cases*, plus the misses."""
+    hits = {"needs_rag": 0, "insurance_type": 0, "off_topic": 0, "all": 0}
+    misses = []
+    for message, needs_rag, insurance_type, off_topic in cases:
+        intent = router(message)
+        fields = {
+            "needs_rag": intent.needs_rag == needs_rag,
+            "insurance_type": intent.insurance_type == insurance_type,
+            "off_topic": intent.off_topic == off_topic,
+        }
+        for name, ok in fields.items():
+            hits[name] += ok
+        if all(fields.values()):
+            hits["all"] += 1
+        else:
+            misses.append({"message": message, "got": intent.__dict__,
+                           "expected": {"needs_rag": needs_rag, "insurance_type": insurance_type,
+                                        "off_topic": off_topic}})
+    result = {name: round(count / len(cases), 3) for name, count in hits.items()}
+    result["misses"] = misses
+    return result
+
+
+def cost(router: Callable[[str], Intent], repeat: int, min_seconds: float) -> dict:
+    """Nanoseconds per message (uncached – the router's LRU is bypassed)."""
+    fn = getattr(router, "__wrapped__", router)
+    messages = [case[0] for case in LABELLED]
+    timing = measure(lambda: [fn(m) for m in messages], repeat, min_seconds)
+    return {"median_ns_per_message": round(timing["median_ns"] / len(messages), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per measurement")
+    parser.add_argument("--min-accuracy", type=float, default=0.0, help="fail if router exact-match accuracy is lower")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for name, router in (("router", route), ("legacy", legacy_route)):
+        results[name] = {**accuracy(router), **cost(router, args.repeat, args.min_time)}
+        r = results[name]
+        print(f"   {name:<8} exact {r['all']:.0%}  rag {r['needs_rag']:.0%}  type {r['insurance_type']:.0%}  "
+              f"off-topic {r['off_topic']:.0%}  {r['median_ns_per_message'] / 1000:.2f} µs/msg")
+    for miss in results["router"]["misses"]:
+        print(f"   ❌ {miss['message']!r}: got {miss['got']}, expected {miss['expected']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if results["router"]["all"] < args.min_accuracy:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
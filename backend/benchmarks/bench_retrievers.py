@@ -0,0 +1,129 @@
+"""
+Retriever benchmark: NumPy in-memory index vs the Chroma path
+Indexes the knowledge base (plus optional synthetic documents) in each backend
+with offline fake embeddings, then times top-k search with precomputed query
+vectors – unfiltered and with a ``type`` filter – and checks both backends
+return the same documents.
+
+Usage (from backend/):
+    python -m benchmarks.bench_retrievers
+    python -m benchmarks.bench_retrievers --docs 5000 --queries 500 --json retrievers.json
+
+Chroma is skipped when langchain_chroma cannot be imported.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document  # noqa: E402
+
+from benchmarks.common import percentiles  # noqa: E402
+from fake_llm import FakeConfig, FakeEmbeddings  # noqa: E402
+from rag_system import INSURANCE_KNOWLEDGE  # noqa: E402
+from retrievers import ChromaRetriever, NumpyRetriever, Retriever  # noqa: E402
+
+QUERIES = [
+    "What is comprehensive coverage?",
+    "How do deductibles work for home insurance?",
+    "Which factors affect my auto rate?",
+    "Are there discounts for a security system?",
+    "How do I file a claim?",
+    "Does red car cost more to insure?",
+]
+TYPES = ("auto", "home", "general")
+
+
+def build_documents(extra: int) -> List[Document]:
+    documents = [Document(page_content=item["content"], metadata=item["metadata"]) for item in INSURANCE_KNOWLEDGE]
+    words = " ".join(item["content"] for item in INSURANCE_KNOWLEDGE).split()
+    for i in range(extra):
+        text = " ".join(words[(i * 37 + j * 11) % len(words)] for j in range(60))
+        documents.append(Document(page_content=text, metadata={"type": TYPES[i % 3], "topic": f"synthetic_{i}"}))
+    return documents
+
+
+def make_chroma(embeddings, directory: str) -> Retriever:
+    from langchain_chroma import Chroma
+
+    store = Chroma(collection_name="bench", embedding_function=embeddings, persist_directory=directory)
+    return ChromaRetriever(lambda: store)
+
+
+def time_searches(retriever: Retriever, queries: List[str], vectors, k: int, filters) -> Dict[str, object]:
+    samples, results = [], []
+    for query, vector, filter in zip(queries, vectors, filters):
+        start = time.perf_counter()
+        found = retriever.search(query, k=k, filter=filter, embedding=vector)
+        samples.append((time.perf_counter() - start) * 1000)
+        results.append([d.page_content for d in found])
+    return {"latency_ms": percentiles(samples), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=0, help="synthetic documents added to the knowledge base")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--dim", type=int, default=768, help="fake embedding dimension")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    embeddings = FakeEmbeddings(FakeConfig(embedding_dim=args.dim))
+    documents = build_documents(args.docs)
+    queries = [QUERIES[i % len(QUERIES)] + f" #{i}" for i in range(args.queries)]
+    vectors = embeddings.embed_documents(queries)
+    print(f"📚 {len(documents)} documents, {len(queries)} queries, k={args.k}, dim={args.dim}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        backends = {"numpy": lambda: NumpyRetriever(embeddings)}
+        try:
+            import langchain_chroma  # noqa: F401
+            backends["chroma"] = lambda: make_chroma(embeddings, directory)
+        except Exception as exc:
+            print(f"   chroma   skipped ({type(exc).__name__}: {exc})")
+
+        results = {}
+        for name, build in backends.items():
+            try:
+                retriever = build()
+                start = time.perf_counter()
+                retriever.add_documents(documents)
+                index_seconds = time.perf_counter() - start
+            except Exception as exc:
+                print(f"   {name:<8} skipped ({type(exc).__name__}: {exc})")
+                continue
+            results[name] = {"index_seconds": round(index_seconds, 4)}
+            for label, filters in (("all", [None] * len(queries)),
+                                   ("filtered", [{"type": TYPES[i % 3]} for i in range(len(queries))])):
+                run = time_searches(retriever, queries, vectors, args.k, filters)
+                results[name][label] = run
+                p = run["latency_ms"]
+                print(f"   {name:<8} {label:<9} p50 {p['p50']:.3f} ms  p95 {p['p95']:.3f} ms  p99 {p['p99']:.3f} ms")
+
+    if "numpy" in results and "chroma" in results:
+        # Chroma's HNSW is approximate; report how often the exact top-k agrees
+        for label in ("all", "filtered"):
+            same = sum(a == b for a, b in zip(results["numpy"][label]["results"], results["chroma"][label]["results"]))
+            results[f"agreement_{label}"] = round(same / len(queries), 3)
+            speedup = results["chroma"][label]["latency_ms"]["p50"] / max(results["numpy"][label]["latency_ms"]["p50"], 1e-9)
+            print(f"   {label:<9} numpy {speedup:.1f}x faster at p50, same top-{args.k} for "
+                  f"{results[f'agreement_{label}']:.0%} of queries")
+
+    for backend in results.values():
+        if isinstance(backend, dict):
+            for label in ("all", "filtered"):
+                backend[label].pop("results", None)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Session store benchmark
+Fills a SQLite session store with many sessions, then measures per-turn
+read (get) and write (append user + agent message, put) latency.
+
+Usage (from backend/):
+    python -m benchmarks.bench_session_store --sessions 100000 --turns 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+
+from benchmarks.common import percentiles  # noqa: E402
+from session_store import InMemorySessionStore, SQLiteSessionStore  # noqa: E402
+
+
+def make_session(turns: int) -> dict:
+    messages = []
+    for i in range(turns):
+        messages.append(HumanMessage(content=f"I'm {25 + i} and drive a 2020 Honda Civic, licensed {i + 5} years."))
+        messages.append(AIMessage(content="Thanks! Any at-fault accidents or violations in the last 3 years? " * 3))
+    return {
+        "messages": messages,
+        "user_info": {"age": 30, "vehicle_year": 2020},
+        "insurance_type": "auto",
+        "quote_result": None,
+        "knowledge_context": "",
+        "next_action": "gather_info",
+    }
+
+
+def populate(store, count: int, turns_per_session: int):
+    template = make_session(turns_per_session)
+    start = time.perf_counter()
+    for i in range(count):
+        store.put(f"session-{i}", {**template, "messages": list(template["messages"])})
+        if i and i % 20000 == 0:
+            print(f"   … {i:,} sessions stored", flush=True)
+    return time.perf_counter() - start
+
+
+def measure_turns(store, count: int, turns: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    reads, writes = [], []
+    for _ in range(turns):
+        session_id = f"session-{rng.randrange(count)}"
+
+        start = time.perf_counter()
+        session = store.get(session_id)
+        reads.append((time.perf_counter() - start) * 1000)
+
+        session["messages"].append(HumanMessage(content="No accidents, one speeding ticket."))
+        session["messages"].append(AIMessage(content="Got it – calculating your quote now."))
+
+        start = time.perf_counter()
+        store.put(session_id, session)
+        writes.append((time.perf_counter() - start) * 1000)
+    return {"read_ms": percentiles(reads), "write_ms": percentiles(writes)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--turns", type=int, default=2000, help="measured turns")
+    parser.add_argument("--history", type=int, default=3, help="turns already in each stored session")
+    parser.add_argument("--backend", choices=["sqlite", "memory"], default="sqlite")
+    parser.add_argument("--db", help="database path (default: temporary file)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.backend == "sqlite":
+            store = SQLiteSessionStore(args.db or os.path.join(tmp, "sessions.db"), ttl_seconds=None, purge_every=0)
+        else:
+            store = InMemorySessionStore(ttl_seconds=None, max_entries=None, max_bytes=None)
+
+        print(f"📦 Populating {args.sessions:,} sessions ({args.backend})…")
+        populate_s = populate(store, args.sessions, args.history)
+        print(f"⏱️  Measuring {args.turns:,} turns…")
+        results = {
+            "backend": args.backend,
+            "sessions": args.sessions,
+            "history_turns": args.history,
+            "populate_seconds": round(populate_s, 2),
+            **measure_turns(store, args.sessions, args.turns),
+            "store": store.stats(),
+        }
+        if args.backend == "sqlite":
+            store.close()
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""Helpers shared by the benchmark scripts."""
+
+import statistics
+
+
+def percentiles(samples_ms: list) -> dict:
+    """p50 / p95 / p99 / mean of *samples_ms* (nearest-rank), rounded for diffing."""
+    if not samples_ms:
+        return {"p50": None, "p95": None, "p99": None, "mean": None}
+    ordered = sorted(samples_ms)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))], 4)
+
+    return {"p50": pct(50), "p95": pct(95), "p99": pct(99), "mean": round(statistics.fmean(ordered), 4)}
@@ -0,0 +1,246 @@
+"""
+Load driver for the chat API
+Replays scripted multi-turn auto and home quote conversations against
+``/api/chat`` (and optionally ``/api/analyze-quote``) at a fixed concurrency
+(closed loop) or arrival rate (open loop), then reports latency percentiles,
+throughput, error rates and per-turn latency growth.
+
+Usage (from backend/):
+    python -m benchmarks.load_driver --url http://127.0.0.1:8000 --concurrency 20 --conversations 200
+    python -m benchmarks.load_driver --rate 5 --duration 60 --json load.json
+    LLM_PROVIDER=fake python -m benchmarks.load_driver --in-process --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from benchmarks.common import percentiles  # noqa: E402
+
+SCENARIOS: Dict[str, List[str]] = {
+    "auto": [
+        "Hi, I need car insurance",
+        "I'm 28 and drive a 2020 Honda Civic",
+        "I've been licensed for 10 years",
+        "No accidents, one speeding ticket two years ago",
+        "What does comprehensive coverage include?",
+        "Please calculate my auto quote",
+        "How could I lower that premium?",
+    ],
+    "home": [
+        "Hello, I'd like a home insurance quote",
+        "The house was built in 1995 and is about 2,200 square feet",
+        "It's brick construction with a shingle roof, two stories",
+        "I'd like $350,000 of dwelling coverage",
+        "What is the difference between dwelling and personal property coverage?",
+        "We have a security system and fire alarms, no pool",
+        "Please calculate my home quote",
+    ],
+}
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    scenario: str
+    turn: int
+    latency_ms: float
+    status: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status < 400
+
+
+class LoadDriver:
+    """Runs conversations through an ``httpx.AsyncClient`` and records every request."""
+
+    def __init__(self, client: httpx.AsyncClient, scenarios=None, document: Optional[str] = None,
+                 upload_ratio: float = 0.0, think_time: float = 0.0, seed: int = 7):
+        self.client = client
+        self.scenarios = scenarios or SCENARIOS
+        self.document = self._load_document(document)
+        self.upload_ratio = upload_ratio if self.document else 0.0
+        self.think_time = think_time
+        self.rng = random.Random(seed)
+        self.samples: List[Sample] = []
+        self.conversations_started = 0
+        self.conversations_completed = 0
+
+    @staticmethod
+    def _load_document(path: Optional[str]):
+        if not path:
+            return None
+        mime = "application/pdf" if path.lower().endswith(".pdf") else "image/png"
+        with open(path, "rb") as f:
+            return os.path.basename(path), f.read(), mime
+
+    async def _request(self, endpoint: str, scenario: str, turn: int, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.post(endpoint, **kwargs)
+        except Exception as e:
+            self.samples.append(Sample(endpoint, scenario, turn, (time.perf_counter() - start) * 1000,
+                                       error=type(e).__name__))
+            return None
+        self.samples.append(Sample(endpoint, scenario, turn, (time.perf_counter() - start) * 1000,
+                                   status=response.status_code))
+        return response
+
+    async def run_conversation(self, scenario: str):
+        """One user: every turn of *scenario* on one session, then maybe an upload."""
+        self.conversations_started += 1
+        session_id = None
+        for turn, message in enumerate(self.scenarios[scenario], start=1):
+            response = await self._request("/api/chat", scenario, turn,
+                                           json={"message": message, "session_id": session_id})
+            if response is None or response.status_code >= 400:
+                return  # a real user would give up (or retry later)
+            session_id = response.json().get("session_id", session_id)
+            if self.think_time:
+                await asyncio.sleep(self.rng.expovariate(1 / self.think_time))
+        if self.upload_ratio and self.rng.random() < self.upload_ratio:
+            await self._request("/api/analyze-quote", scenario, 0, files={"file": self.document})
+        self.conversations_completed += 1
+
+    def _next_scenario(self) -> str:
+        return self.rng.choice(sorted(self.scenarios))
+
+    async def run_closed(self, concurrency: int, conversations: Optional[int], duration: Optional[float]):
+        """*concurrency* users each start a new conversation as soon as the last one ends."""
+        deadline = time.perf_counter() + duration if duration else None
+        remaining = [conversations]
+
+        async def user():
+            while True:
+                if deadline and time.perf_counter() >= deadline:
+                    return
+                if remaining[0] is not None:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                await self.run_conversation(self._next_scenario())
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+
+    async def run_open(self, rate: float, conversations: Optional[int], duration: Optional[float]):
+        """New conversations arrive as a Poisson process at *rate* per second."""
+        deadline = time.perf_counter() + duration if duration else None
+        tasks = []
+        while True:
+            if deadline and time.perf_counter() >= deadline:
+                break
+            if conversations is not None and len(tasks) >= conversations:
+                break
+            tasks.append(asyncio.ensure_future(self.run_conversation(self._next_scenario())))
+            await asyncio.sleep(self.rng.expovariate(rate))
+        await asyncio.gather(*tasks)
+
+    def report(self, elapsed: float) -> dict:
+        errors = Counter(s.error or str(s.status) for s in self.samples if not s.ok)
+        by_endpoint = defaultdict(list)
+        by_turn = defaultdict(list)
+        for s in self.samples:
+            if s.ok:
+                by_endpoint[s.endpoint].append(s.latency_ms)
+                if s.endpoint == "/api/chat":
+                    by_turn[s.turn].append(s.latency_ms)
+        per_turn = [{"turn": t, "count": len(v), "latency_ms": percentiles(v)} for t, v in sorted(by_turn.items())]
+        growth = None
+        if len(per_turn) > 1 and per_turn[0]["latency_ms"]["p50"]:
+            growth = round(per_turn[-1]["latency_ms"]["p50"] / per_turn[0]["latency_ms"]["p50"], 3)
+        total = len(self.samples)
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 3) if elapsed else None,
+            "conversations": {"started": self.conversations_started, "completed": self.conversations_completed},
+            "errors": {
+                "total": sum(errors.values()),
+                "rate": round(sum(errors.values()) / total, 4) if total else 0.0,
+                "by_kind": dict(sorted(errors.items())),
+            },
+            "endpoints": {
+                endpoint: {"count": len(v), "latency_ms": percentiles(v)}
+                for endpoint, v in sorted(by_endpoint.items())
+            },
+            "per_turn": per_turn,
+            "turn_latency_growth": growth,
+        }
+
+
+async def run(args) -> dict:
+    if args.in_process:
+        import main  # honours LLM_PROVIDER=fake for an offline run
+        transport = httpx.ASGITransport(app=main.app)
+        base_url = "http://loadtest"
+    else:
+        transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=None))
+        base_url = args.url
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout) as client:
+        scenarios = {name: SCENARIOS[name] for name in args.scenarios}
+        driver = LoadDriver(client, scenarios, document=args.document, upload_ratio=args.upload_ratio,
+                            think_time=args.think_time, seed=args.seed)
+        start = time.perf_counter()
+        if args.rate:
+            await driver.run_open(args.rate, args.conversations, args.duration)
+        else:
+            await driver.run_closed(args.concurrency, args.conversations, args.duration)
+        result = driver.report(time.perf_counter() - start)
+    result["config"] = {
+        "target": "in-process" if args.in_process else args.url,
+        "mode": "open" if args.rate else "closed",
+        "concurrency": None if args.rate else args.concurrency,
+        "rate": args.rate,
+        "conversations": args.conversations,
+        "duration": args.duration,
+        "scenarios": args.scenarios,
+        "upload_ratio": driver.upload_ratio,
+        "provider": os.getenv("LLM_PROVIDER", "gemini"),
+    }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--in-process", action="store_true", help="drive main.app directly (no server needed)")
+    parser.add_argument("--concurrency", type=int, default=10, help="closed loop: simultaneous users")
+    parser.add_argument("--rate", type=float, help="open loop: new conversations per second")
+    parser.add_argument("--conversations", type=int, help="stop after this many conversations")
+    parser.add_argument("--duration", type=float, help="stop starting conversations after N seconds")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=sorted(SCENARIOS))
+    parser.add_argument("--document", help="policy PDF/PNG to POST to /api/analyze-quote")
+    parser.add_argument("--upload-ratio", type=float, default=0.2, help="share of conversations that upload --document")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between turns (s)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+    if args.conversations is None and args.duration is None:
+        args.conversations = 50
+
+    mode = f"{args.rate}/s arrivals" if args.rate else f"{args.concurrency} concurrent users"
+    print(f"🚦 Driving {args.url if not args.in_process else 'main.app (in-process)'} with {mode}…")
+    results = asyncio.run(run(args))
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
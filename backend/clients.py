@@ -0,0 +1,150 @@
+"""
+Shared Gemini client registry
+Builds LangChain chat / embedding clients once per process so every request
+path reuses the same warm instances (and their pooled HTTP connections).
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from provider import Provider
+
+DEFAULT_CHAT_MODEL = "gemini-2.0-flash-exp"
+DEFAULT_EMBEDDING_MODEL = "models/embedding-001"
+
+
+@dataclass(frozen=True)
+class ClientConfig:
+    """Client settings, read from the environment once at startup."""
+
+    api_key: Optional[str] = None
+    temperature: float = 0.7
+    max_retries: int = 2
+    timeout: Optional[float] = None
+    provider: str = "gemini"
+
+    @classmethod
+    def from_env(cls) -> "ClientConfig":
+        load_dotenv()
+        timeout = os.getenv("GEMINI_TIMEOUT")
+        return cls(
+            api_key=os.getenv("GEMINI_API_KEY"),
+            temperature=float(os.getenv("GEMINI_TEMPERATURE", "0.7")),
+            max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "2")),
+            timeout=float(timeout) if timeout else None,
+            provider=os.getenv("LLM_PROVIDER", "gemini").lower(),
+        )
+
+
+class ClientRegistry:
+    """Process-wide cache of model handles keyed by model name.
+
+    Handles are created on first use and then shared; LangChain's Gemini
+    wrappers keep their underlying HTTP client alive, so reusing the object
+    gives keep-alive connection reuse across requests.
+    """
+
+    def __init__(self, config: ClientConfig):
+        self.config = config
+        self.provider = Provider(config.provider, api_key=config.api_key)
+        self._chat_models = {}
+        self._embeddings = {}
+        self._lock = threading.Lock()
+
+    def chat_model(self, model: str = DEFAULT_CHAT_MODEL, temperature: Optional[float] = None):
+        """Return the shared chat model for *model* (and optional temperature)."""
+        temperature = self.config.temperature if temperature is None else temperature
+        key = (model, temperature)
+        llm = self._chat_models.get(key)
+        if llm is None:
+            with self._lock:
+                llm = self._chat_models.get(key)
+                if llm is None:
+                    llm = self._build_chat_model(model, temperature)
+                    self._chat_models[key] = llm
+        return llm
+
+    def embeddings(self, model: str = DEFAULT_EMBEDDING_MODEL):
+        """Return the shared embedding client for *model*."""
+        emb = self._embeddings.get(model)
+        if emb is None:
+            with self._lock:
+                emb = self._embeddings.get(model)
+                if emb is None:
+                    emb = self._build_embeddings(model)
+                    self._embeddings[model] = emb
+        return emb
+
+    def prime(self, model: str = DEFAULT_CHAT_MODEL) -> None:
+        """Open *model*'s upstream connection with a free ``countTokens`` call.
+
+        Building a handle sends nothing, so without this the first real
+        request still pays DNS, TLS and connection setup. Fake models have no
+        connection to open.
+        """
+        llm = self.chat_model(model)
+        if not self.provider.is_fake:
+            llm.get_num_tokens("warm-up")
+
+    def _build_chat_model(self, model: str, temperature: float):
+        return self.provider.chat_model(
+            model,
+            temperature=temperature,
+            max_retries=self.config.max_retries,
+            timeout=self.config.timeout,
+        )
+
+    def _build_embeddings(self, model: str):
+        return self.provider.embeddings(model)
+
+    def stats(self) -> dict:
+        return {
+            "provider": self.provider.name,
+            "chat_models": sorted(f"{name}@{temp}" for name, temp in self._chat_models),
+            "embeddings": sorted(self._embeddings),
+        }
+
+    def close(self):
+        """Release every cached handle and its underlying HTTP client."""
+        with self._lock:
+            handles = list(self._chat_models.values()) + list(self._embeddings.values())
+            self._chat_models.clear()
+            self._embeddings.clear()
+        for handle in handles:
+            client = getattr(handle, "client", None)
+            try:
+                if client is not None and hasattr(client, "close"):
+                    client.close()
+            except Exception:
+                pass
+
+
+_registry: Optional[ClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def init_clients(config: Optional[ClientConfig] = None) -> ClientRegistry:
+    """Create the process-wide registry (called from the FastAPI lifespan)."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ClientRegistry(config or ClientConfig.from_env())
+        return _registry
+
+
+def get_clients() -> ClientRegistry:
+    """Return the process-wide registry, creating it on first use."""
+    return _registry or init_clients()
+
+
+def close_clients():
+    """Close and drop the process-wide registry."""
+    global _registry
+    with _registry_lock:
+        registry, _registry = _registry, None
+    if registry is not None:
+        registry.close()
@@ -0,0 +1,43 @@
+"""
+Bounded thread-pool offload for blocking calls made from async handlers.
+Anything without an async API (Chroma search, the native Gemini SDK) goes
+through here so it never runs on the event loop thread.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the shared executor, sized by ``BLOCKING_POOL_SIZE`` (default 16)."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("BLOCKING_POOL_SIZE", "16")),
+                    thread_name_prefix="blocking",
+                )
+    return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run ``func(*args, **kwargs)`` on the bounded pool and await the result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    """Stop the shared executor (called from the FastAPI lifespan)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
@@ -0,0 +1,80 @@
+"""
+WebSocket connection hub
+Tracks which chat sessions have an open /ws/chat connection so the server can
+push messages (e.g. ``quote_ready``) outside the request/reply cycle.
+Connections live in one process: run several workers behind sticky sessions.
+"""
+
+import asyncio
+import threading
+from typing import Dict, Optional, Set
+
+import metrics
+
+OPEN_CONNECTIONS = metrics.gauge("ws_connections", "Open /ws/chat connections")
+PUSHED = metrics.counter("ws_pushed_messages_total", "Server-initiated WebSocket messages", ["type"])
+
+
+class Connection:
+    """One WebSocket bound to one session; sends are serialised."""
+
+    def __init__(self, websocket, session_id: str):
+        self.websocket = websocket
+        self.session_id = session_id
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, type_: str, data: Optional[dict] = None):
+        async with self._send_lock:
+            await self.websocket.send_json({"type": type_, **(data or {})})
+
+
+class ConnectionHub:
+    """session_id → open connections (a user may have several tabs)."""
+
+    def __init__(self):
+        self._by_session: Dict[str, Set[Connection]] = {}
+
+    def register(self, connection: Connection):
+        self._by_session.setdefault(connection.session_id, set()).add(connection)
+        OPEN_CONNECTIONS.inc()
+
+    def unregister(self, connection: Connection):
+        connections = self._by_session.get(connection.session_id)
+        if connections and connection in connections:
+            connections.discard(connection)
+            if not connections:
+                del self._by_session[connection.session_id]
+            OPEN_CONNECTIONS.dec()
+
+    async def push(self, session_id: str, type_: str, data: Optional[dict] = None) -> int:
+        """Send to every connection of *session_id*; returns how many received it."""
+        delivered = 0
+        for connection in list(self._by_session.get(session_id, ())):
+            try:
+                await connection.send(type_, data)
+                delivered += 1
+            except Exception:
+                self.unregister(connection)  # went away mid-send
+        if delivered:
+            PUSHED.inc(delivered, type=type_)
+        return delivered
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._by_session),
+            "connections": sum(len(c) for c in self._by_session.values()),
+        }
+
+
+_hub: Optional[ConnectionHub] = None
+_hub_lock = threading.Lock()
+
+
+def get_hub() -> ConnectionHub:
+    """Return the process-wide hub."""
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                _hub = ConnectionHub()
+    return _hub
@@ -5,17 +5,41 @@ Uses Gemini's multimodal capabilities to analyze uploaded insurance documents
 
 import os
 import base64
+import threading
 from typing import Dict, Any
-import google.generativeai as genai
 from dotenv import load_dotenv
 
-load_dotenv()
+from admission import AdmissionRejected, get_admission
+from provider import Provider
 
-# Configure Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+load_dotenv()
 
 # Use Gemini Pro Vision for document analysis
-vision_model = genai.GenerativeModel('gemini-1.5-flash')
+# (configured on first use or by init_analyzer(), never at import)
+VISION_MODEL_NAME = 'gemini-1.5-flash'
+vision_model = None
+_model_lock = threading.Lock()
+
+def get_vision_model():
+    """Configure Gemini and return the shared vision model, once per process."""
+    global vision_model
+    if vision_model is None:
+        with _model_lock:
+            if vision_model is None:
+                provider = Provider()
+                provider.configure()
+                vision_model = provider.get_model(VISION_MODEL_NAME)
+    return vision_model
+
+def init_analyzer():
+    """Eagerly configure the vision model (raises if GEMINI_API_KEY is missing)."""
+    get_vision_model()
+
+def generate_content(parts):
+    """Call the vision model once admission control grants an upstream slot."""
+    model = get_vision_model()
+    with get_admission().slot_sync(VISION_MODEL_NAME):
+        return model.generate_content(parts)
 
 def analyze_insurance_document(file_content: bytes, mime_type: str) -> Dict[str, Any]:
     """
@@ -56,10 +80,12 @@ Be specific about dollar amounts and coverage limits."""
                 import io
                 image = PIL.Image.open(io.BytesIO(file_content))
                 
-                response = vision_model.generate_content([
+                response = generate_content([
                     extraction_prompt,
                     image
                 ])
+            except AdmissionRejected:
+                raise
             except Exception as img_error:
                 print(f"❌ Image processing error: {img_error}")
                 return {
@@ -79,10 +105,12 @@ Be specific about dollar amounts and coverage limits."""
                     "data": base64_data
                 }
                 
-                response = vision_model.generate_content([
+                response = generate_content([
                     extraction_prompt,
                     pdf_part
                 ])
+            except AdmissionRejected:
+                raise
             except Exception as pdf_error:
                 print(f"❌ PDF processing error: {pdf_error}")
                 return {
@@ -108,6 +136,8 @@ Be specific about dollar amounts and coverage limits."""
             "raw_analysis": extracted_text
         }
         
+    except AdmissionRejected:
+        raise
     except Exception as e:
         print(f"❌ General analysis error: {e}")
         return {
@@ -0,0 +1,229 @@
+"""
+Content-addressed embedding cache
+Sits between the embedding client and its callers (Chroma ingestion, query
+embedding): vectors are keyed by hash(model, task, text), kept in an LRU in
+memory and optionally persisted as float32 blobs in SQLite, so repeated
+queries and re-indexing cost nothing upstream.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+
+_SQL_BATCH = 500  # keys per SELECT ... IN (...)
+
+
+def cache_key(model: str, task: str, text: str) -> bytes:
+    """16-byte digest of (model, task, text).
+
+    *task* is ``query`` or ``document``: Gemini embeds the two differently.
+    """
+    return hashlib.blake2b(f"{model}\x1f{task}\x1f{text}".encode(), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """LRU of float32 vectors in front of an optional SQLite file.
+
+    ``path=None`` (the default) keeps the cache in memory only. The file is
+    safe to share between worker processes (WAL mode, one connection per
+    thread) and holds at most ``max_rows`` vectors: every ``prune_every``
+    writes the oldest-written rows beyond the cap are deleted.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_memory: int = 4096,
+                 max_rows: Optional[int] = 100_000, prune_every: int = 1000):
+        self.path = path
+        self.max_memory = max_memory
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self._unpruned = 0
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if path:
+            conn = self._connect()
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL, "
+                "written_at INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(embeddings)")}
+            if "written_at" not in columns:  # files created before the row cap
+                conn.execute("ALTER TABLE embeddings ADD COLUMN written_at INTEGER NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_written_at ON embeddings(written_at)")
+            self.prune()
+
+    @classmethod
+    def from_env(cls) -> "EmbeddingCache":
+        """``EMBEDDING_CACHE_PATH`` (unset / empty = memory only), ``EMBEDDING_CACHE_MEMORY``
+        (LRU entries) and ``EMBEDDING_CACHE_MAX_ROWS`` (0 = unbounded file)."""
+        load_dotenv()
+        return cls(
+            path=os.getenv("EMBEDDING_CACHE_PATH") or None,
+            max_memory=int(os.getenv("EMBEDDING_CACHE_MEMORY", "4096")),
+            max_rows=int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", "100000")) or None,
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread (event loop thread + blocking pool)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, key: bytes, vector: np.ndarray):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory:
+                self._memory.popitem(last=False)
+
+    def get_many(self, keys: Sequence[bytes]) -> List[Optional[np.ndarray]]:
+        """Vectors for *keys* (``None`` for a miss); disk hits are promoted to memory."""
+        found: List[Optional[np.ndarray]] = [None] * len(keys)
+        missing: Dict[bytes, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._memory.move_to_end(key)
+                    found[i] = vector
+                    self.memory_hits += 1
+        if missing and self.path:
+            pending = list(missing)
+            conn = self._connect()
+            for start in range(0, len(pending), _SQL_BATCH):
+                batch = pending[start:start + _SQL_BATCH]
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(key, vector)
+                    for i in missing.pop(key):
+                        found[i] = vector
+                        self.disk_hits += 1
+        self.misses += sum(len(indexes) for indexes in missing.values())
+        return found
+
+    def put_many(self, items: Dict[bytes, np.ndarray]):
+        vectors = {key: np.asarray(vector, dtype=np.float32) for key, vector in items.items()}
+        for key, vector in vectors.items():
+            self._remember(key, vector)
+        if self.path and vectors:
+            now = time.time_ns()
+            self._connect().executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, written_at) VALUES (?, ?, ?)",
+                [(key, vector.tobytes(), now) for key, vector in vectors.items()],
+            )
+            with self._lock:
+                self._unpruned += len(vectors)
+                due = self._unpruned >= self.prune_every
+                if due:
+                    self._unpruned = 0
+            if due:
+                self.prune()
+
+    def prune(self) -> int:
+        """Delete the oldest-written rows beyond ``max_rows``; return how many."""
+        if not self.path or not self.max_rows:
+            return 0
+        conn = self._connect()
+        excess = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.max_rows
+        if excess <= 0:
+            return 0
+        conn.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY written_at LIMIT ?)", (excess,)
+        )
+        return excess
+
+    def wrap(self, embeddings: Embeddings, model: str) -> "CachedEmbeddings":
+        return CachedEmbeddings(embeddings, model, self)
+
+    def __len__(self) -> int:
+        if self.path:
+            return self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return len(self._memory)
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "path": self.path,
+            "entries": len(self),
+            "max_rows": self.max_rows if self.path else None,
+            "memory_entries": len(self._memory),
+            "max_memory": self.max_memory,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((lookups - self.misses) / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class CachedEmbeddings(Embeddings):
+    """LangChain ``Embeddings`` that only sends cache misses to *inner*."""
+
+    def __init__(self, inner: Embeddings, model: str, cache: EmbeddingCache):
+        self.inner = inner
+        self.model = model
+        self.cache = cache
+
+    def _embed(self, texts: List[str], task: str, compute) -> List[List[float]]:
+        keys = [cache_key(self.model, task, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+        todo = {}  # key → text, each distinct miss embedded once
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None:
+                todo.setdefault(key, text)
+        if todo:
+            computed = {key: np.asarray(vector, dtype=np.float32)
+                        for key, vector in zip(todo, compute(list(todo.values())))}
+            self.cache.put_many(computed)
+            vectors = [computed[key] if vector is None else vector for key, vector in zip(keys, vectors)]
+        return [vector.tolist() for vector in vectors]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts), "document", self.inner.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query", lambda batch: [self.inner.embed_query(batch[0])])[0]
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the process-wide embedding cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache.from_env()
+    return _cache
+
+
+def embedding_cache_stats() -> dict:
+    """Stats of the process-wide cache (empty until it is first used)."""
+    return _cache.stats() if _cache is not None else {}
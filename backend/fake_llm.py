@@ -0,0 +1,309 @@
+"""
+Deterministic offline LLM provider
+Fake chat, embedding and native Gemini models (``LLM_PROVIDER=fake``) so load
+and regression tests exercise our server code without a Gemini key.
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+class FakeLLMError(RuntimeError):
+    """Injected upstream failure (stands in for a 429 / 5xx from Gemini)."""
+
+
+# ----------------------------------------------------------------------
+# Latency and error injection
+# ----------------------------------------------------------------------
+class LatencyModel:
+    """Samples delays (seconds) from a distribution given as ``kind:params``.
+
+    ``fixed:0.2``, ``uniform:0.1,0.5``, ``normal:0.3,0.05`` or
+    ``lognormal:0.3,0.5`` (median seconds, sigma). Samples are never negative.
+    """
+
+    def __init__(self, spec: str = "fixed:0", seed: Optional[int] = None):
+        kind, _, params = spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.params = [float(p) for p in params.split(",") if p.strip()] or [0.0]
+        if self.kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+        self.spec = spec
+        self._rng = random.Random(seed)
+
+    def sample(self) -> float:
+        p = self.params
+        if self.kind == "uniform":
+            value = self._rng.uniform(p[0], p[1] if len(p) > 1 else p[0])
+        elif self.kind == "normal":
+            value = self._rng.gauss(p[0], p[1] if len(p) > 1 else 0.0)
+        elif self.kind == "lognormal":
+            value = p[0] * math.exp(self._rng.gauss(0.0, p[1] if len(p) > 1 else 0.0)) if p[0] > 0 else 0.0
+        else:
+            value = p[0]
+        return max(0.0, value)
+
+
+@dataclass
+class ScriptedCall:
+    """Reply with a function call to *name* when the user message matches *pattern*."""
+
+    pattern: str
+    name: str
+    args: Dict[str, Any]
+
+    def matches(self, text: str) -> bool:
+        return re.search(self.pattern, text, re.IGNORECASE) is not None
+
+
+DEFAULT_SCRIPT = [
+    ScriptedCall(
+        r"\b(quote|premium|calculate)\b.*\b(auto|car|vehicle)\b|\b(auto|car|vehicle)\b.*\b(quote|premium|calculate)\b",
+        "calculate_auto_premium",
+        {"age": 30, "vehicle_year": 2020, "vehicle_make": "Honda", "vehicle_model": "Civic",
+         "years_licensed": 12, "accidents": 0, "violations": 0},
+    ),
+    ScriptedCall(
+        r"\b(quote|premium|calculate)\b.*\b(home|house|property)\b|\b(home|house|property)\b.*\b(quote|premium|calculate)\b",
+        "calculate_home_premium",
+        {"year_built": 2005, "square_footage": 2000, "construction_type": "frame",
+         "dwelling_coverage": 300000},
+    ),
+]
+
+_VOCABULARY = (
+    "coverage policy premium deductible liability collision comprehensive dwelling "
+    "quote driver vehicle home property discount claim limit protection rate"
+).split()
+
+
+@dataclass
+class FakeConfig:
+    """Fake provider behaviour, read from ``FAKE_LLM_*`` environment variables."""
+
+    latency: str = "fixed:0"            # time to first token / full reply
+    token_latency: str = "fixed:0"      # gap between streamed tokens
+    embedding_latency: str = "fixed:0"
+    error_rate: float = 0.0
+    reply_tokens: int = 40
+    embedding_dim: int = 768
+    seed: Optional[int] = None
+    script: List[ScriptedCall] = field(default_factory=lambda: list(DEFAULT_SCRIPT))
+
+    @classmethod
+    def from_env(cls) -> "FakeConfig":
+        seed = os.getenv("FAKE_LLM_SEED")
+        return cls(
+            latency=os.getenv("FAKE_LLM_LATENCY", "fixed:0"),
+            token_latency=os.getenv("FAKE_LLM_TOKEN_LATENCY", "fixed:0"),
+            embedding_latency=os.getenv("FAKE_EMBEDDING_LATENCY", "fixed:0"),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            reply_tokens=int(os.getenv("FAKE_LLM_REPLY_TOKENS", "40")),
+            embedding_dim=int(os.getenv("FAKE_EMBEDDING_DIM", "768")),
+            seed=int(seed) if seed else None,
+        )
+
+
+class _Behaviour:
+    """Latency samplers, error injection and reply text shared by every fake model."""
+
+    def __init__(self, config: FakeConfig):
+        self.config = config
+        self.latency = LatencyModel(config.latency, config.seed)
+        self.token_latency = LatencyModel(config.token_latency, config.seed)
+        self.embedding_latency = LatencyModel(config.embedding_latency, config.seed)
+        self._errors = random.Random(config.seed)
+
+    def maybe_fail(self):
+        if self.config.error_rate and self._errors.random() < self.config.error_rate:
+            raise FakeLLMError("Injected upstream error (429 Resource has been exhausted)")
+
+    def scripted_call(self, text: str, allowed: Optional[Sequence[str]] = None) -> Optional[ScriptedCall]:
+        for call in self.config.script:
+            if (allowed is None or call.name in allowed) and call.matches(text):
+                return call
+        return None
+
+    def reply_tokens(self, prompt: str) -> List[str]:
+        """Same prompt → same reply, so cache and regression tests are stable."""
+        rng = random.Random(hashlib.sha1(prompt.encode("utf-8")).hexdigest())
+        words = [rng.choice(_VOCABULARY) for _ in range(max(self.config.reply_tokens, 1))]
+        words[0] = words[0].capitalize()
+        return [w + " " for w in words[:-1]] + [words[-1] + "."]
+
+
+def _last_human_text(messages: Sequence[BaseMessage]) -> str:
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return str(message.content)
+    return ""
+
+
+# ----------------------------------------------------------------------
+# LangChain chat model
+# ----------------------------------------------------------------------
+class FakeChatModel(BaseChatModel):
+    """Drop-in for ``ChatGoogleGenerativeAI``: invoke / ainvoke / stream / astream,
+    plus ``bind_tools`` with scripted tool calls for the premium calculators.
+    """
+
+    model: str = "fake-chat"
+    temperature: float = 0.0
+    config: Any = None
+    behaviour: Any = None
+
+    def __init__(self, config: Optional[FakeConfig] = None, **kwargs):
+        config = config or FakeConfig.from_env()
+        super().__init__(config=config, behaviour=_Behaviour(config), **kwargs)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-gemini"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _reply(self, messages: List[BaseMessage], tools=None) -> AIMessage:
+        if tools and isinstance(messages[-1], HumanMessage):
+            names = [t["function"]["name"] for t in tools]
+            call = self.behaviour.scripted_call(_last_human_text(messages), names)
+            if call is not None:
+                tool_call = {"name": call.name, "args": dict(call.args),
+                             "id": f"call_{call.name}_{len(messages)}", "type": "tool_call"}
+                return AIMessage(content="", tool_calls=[tool_call])
+        prompt = "\n".join(str(m.content) for m in messages)
+        return AIMessage(content="".join(self.behaviour.reply_tokens(prompt)))
+
+    def _generate(self, messages, stop=None, run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs) -> ChatResult:
+        time.sleep(self.behaviour.latency.sample())
+        self.behaviour.maybe_fail()
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages, kwargs.get("tools")))])
+
+    async def _agenerate(self, messages, stop=None, run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.behaviour.latency.sample())
+        self.behaviour.maybe_fail()
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages, kwargs.get("tools")))])
+
+    def _stream(self, messages, stop=None, run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs):
+        time.sleep(self.behaviour.latency.sample())
+        self.behaviour.maybe_fail()
+        for i, token in enumerate(self._tokens(messages)):
+            if i:
+                time.sleep(self.behaviour.token_latency.sample())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs):
+        await asyncio.sleep(self.behaviour.latency.sample())
+        self.behaviour.maybe_fail()
+        for i, token in enumerate(self._tokens(messages)):
+            if i:
+                await asyncio.sleep(self.behaviour.token_latency.sample())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    def _tokens(self, messages) -> List[str]:
+        return self.behaviour.reply_tokens("\n".join(str(m.content) for m in messages))
+
+
+# ----------------------------------------------------------------------
+# LangChain embeddings
+# ----------------------------------------------------------------------
+class FakeEmbeddings(Embeddings):
+    """Hashed bag-of-words vectors: deterministic, unit length, and texts that
+    share words land close together (so semantic-cache hits still happen).
+    """
+
+    def __init__(self, config: Optional[FakeConfig] = None, model: str = "fake-embedding"):
+        self.config = config or FakeConfig.from_env()
+        self.model = model
+        self.behaviour = _Behaviour(self.config)
+
+    def _vector(self, text: str) -> List[float]:
+        dim = self.config.embedding_dim
+        vector = [0.0] * dim
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % dim
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.behaviour.embedding_latency.sample())
+        self.behaviour.maybe_fail()
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+# ----------------------------------------------------------------------
+# Native google.generativeai stand-in (gemini_agent, document_analyzer)
+# ----------------------------------------------------------------------
+def _native_response(text: str = "", function_call=None):
+    part = SimpleNamespace(text=text, function_call=function_call)
+    candidate = SimpleNamespace(content=SimpleNamespace(parts=[part]))
+    return SimpleNamespace(text=text, candidates=[candidate])
+
+
+class FakeChatSession:
+    """Mimics ``ChatSession.send_message`` including native function calling."""
+
+    def __init__(self, model: "FakeGenerativeModel", history=None):
+        self.model = model
+        self.history = list(history or [])
+
+    def send_message(self, content):
+        behaviour = self.model.behaviour
+        time.sleep(behaviour.latency.sample())
+        behaviour.maybe_fail()
+        self.history.append(content)
+        if isinstance(content, str):
+            call = behaviour.scripted_call(content)
+            if call is not None:
+                return _native_response(function_call=SimpleNamespace(name=call.name, args=dict(call.args)))
+            return _native_response("".join(behaviour.reply_tokens(content)))
+        # A function response (genai.protos.Content) – summarise it
+        return _native_response("Here is your quote. " + "".join(behaviour.reply_tokens(str(content))))
+
+
+class FakeGenerativeModel:
+    """Mimics ``genai.GenerativeModel`` for chat sessions and one-shot generation."""
+
+    def __init__(self, model_name: str = "fake-gemini", config: Optional[FakeConfig] = None):
+        self.model_name = model_name
+        self.behaviour = _Behaviour(config or FakeConfig.from_env())
+
+    def start_chat(self, history=None):
+        return FakeChatSession(self, history)
+
+    def generate_content(self, contents):
+        time.sleep(self.behaviour.latency.sample())
+        self.behaviour.maybe_fail()
+        return _native_response(
+            "1. **Insurance Provider**: Fake Mutual\n"
+            "2. **Policy Type**: Auto\n"
+            "3. **Policy Number**: FAKE-0001\n"
+            "4. **Current Premium**: $150 per month\n"
+            "5. **Coverage Details**: Liability 100/300/100, Collision $500 deductible\n"
+        )
@@ -3,25 +3,50 @@ Agentic AI Insurance Agent - Pure Google Gemini
 No LangChain needed - uses native Gemini function calling
 """
 
-import google.generativeai as genai
 import os
+import threading
 from typing import Dict, Any
 from dotenv import load_dotenv
 import json
 
 # Local modules
+from admission import get_admission
 from memory import MemoryStore
 from provider import Provider
+from topic_guard import get_topic_guard
 
 # Load environment variables
 load_dotenv()
 
 # Initialize Provider (handles Gemini configuration)
 provider = Provider()
-provider.configure()
 
-# Get model via provider
-model = provider.get_model()
+# Model is configured via the provider on first use (or by init_agent()
+# from the app lifespan) so importing this module stays cheap
+MODEL_NAME = "gemini-2.0-flash-exp"
+model = None
+protos = None  # google.generativeai.protos, imported with the model
+_model_lock = threading.Lock()
+
+def get_model():
+    """Configure Gemini and return the shared model, once per process."""
+    global model, protos
+    if model is None or protos is None:
+        with _model_lock:
+            if model is None:
+                provider.configure()
+                model = provider.get_model(MODEL_NAME)
+            if protos is None:
+                import google.generativeai as genai
+                protos = genai.protos
+    return model
+
+def init_agent():
+    """Eagerly configure the model (raises if GEMINI_API_KEY is missing)."""
+    get_model()
+    if os.getenv("SESSION_BACKEND", "memory").lower() != "memory":
+        print("⚠️  Native mode keeps its Gemini chats in process memory; SESSION_BACKEND only applies "
+              "to the LangGraph / direct modes")
 
 # ============================================================================
 # TOOL DEFINITIONS (Google's Native Format)
@@ -322,7 +347,9 @@ AVAILABLE_FUNCTIONS = {
 # GEMINI AGENT
 # ============================================================================
 
-# Chat session storage using MemoryStore
+# Chat session storage using MemoryStore. Gemini chat objects are live SDK
+# sessions, so they always stay in this process (SESSION_BACKEND=sqlite does
+# not apply): pin native-mode clients to one worker.
 memory_store = MemoryStore()
 
 SYSTEM_INSTRUCTION = """You are an expert insurance agent powered by AI. Your name is AgenticInsure Assistant.
@@ -359,22 +386,33 @@ You: "Based on your profile, I've calculated your quote. Your monthly premium wo
 
 Be helpful, transparent, and guide them through the process naturally."""
 
+def send_message(chat, content):
+    """Send *content* on *chat* once admission control grants an upstream slot."""
+    with get_admission().slot_sync(MODEL_NAME):
+        return chat.send_message(content)
+
 def chat_with_agent(message: str, session_id: str) -> str:
     """
     Chat with the Gemini agent using native function calling.
     Gemini handles all orchestration automatically!
     """
     
+    # Clearly off-topic opener – refuse locally instead of paying for the round trip
+    if not memory_store.get(session_id):
+        refusal = get_topic_guard().refusal_for(message, path="native")
+        if refusal is not None:
+            return refusal
+    
     # Get or create chat session
     if not memory_store.get(session_id):
-        chat = model.start_chat(history=[])
-        chat.send_message(SYSTEM_INSTRUCTION)
+        chat = get_model().start_chat(history=[])
+        send_message(chat, SYSTEM_INSTRUCTION)
         memory_store.set(session_id, chat)
     else:
         chat = memory_store.get(session_id)
     
     # Send user message
-    response = chat.send_message(message)
+    response = send_message(chat, message)
     
     # Handle function calls (Gemini's native orchestration)
     while response.candidates[0].content.parts[0].function_call:
@@ -391,10 +429,11 @@ def chat_with_agent(message: str, session_id: str) -> str:
             print(f"[Agent] Result: {json.dumps(function_result, indent=2)}")
             
             # Send result back to Gemini
-            response = chat.send_message(
-                genai.protos.Content(
-                    parts=[genai.protos.Part(
-                        function_response=genai.protos.FunctionResponse(
+            response = send_message(
+                chat,
+                protos.Content(
+                    parts=[protos.Part(
+                        function_response=protos.FunctionResponse(
                             name=function_name,
                             response={"result": function_result}
                         )
@@ -404,6 +443,9 @@ def chat_with_agent(message: str, session_id: str) -> str:
         else:
             break
     
+    # Re-account the grown history against the store's byte cap
+    memory_store.set(session_id, chat)
+    
     # Return final text response
     return response.text
 
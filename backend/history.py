@@ -0,0 +1,166 @@
+"""
+Conversation window for prompt building
+Keeps the last N turns verbatim, folds older turns into a rolling summary and
+pins the extracted facts so long quote conversations stay inside a token budget.
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+# Rough Gemini ratio – good enough for budgeting, no tokenizer round trip
+CHARS_PER_TOKEN = 4
+
+Summarizer = Callable[[str, Sequence[BaseMessage]], str]
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count for *text*."""
+    return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+
+
+def _first_sentence(text: str, limit: int = 160) -> str:
+    text = " ".join(text.split())
+    match = re.match(r"(.+?[.!?])(\s|$)", text)
+    sentence = match.group(1) if match else text
+    return sentence if len(sentence) <= limit else sentence[: limit - 3] + "..."
+
+
+def extractive_summary(previous: str, messages: Sequence[BaseMessage]) -> str:
+    """Default summarizer: append the first sentence of every folded message.
+
+    Runs locally, so folding history never costs an extra LLM call.
+    """
+    lines = [previous] if previous else []
+    for message in messages:
+        speaker = "Agent" if isinstance(message, AIMessage) else "Customer"
+        lines.append(f"- {speaker}: {_first_sentence(str(message.content))}")
+    return "\n".join(lines)
+
+
+@dataclass
+class PromptStats:
+    """What the history manager produced for one LLM call."""
+
+    tokens: int
+    verbatim_messages: int
+    summarized_messages: int
+    summary_tokens: int
+    facts_tokens: int
+
+    def as_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class HistoryManager:
+    """Builds bounded prompts from a session dict.
+
+    Session keys used: ``messages`` (full history, never truncated),
+    ``history_summary`` and ``summarized_count`` (rolling summary state) and
+    ``user_info`` / ``insurance_type`` / ``quote_result`` (pinned facts).
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 6000,
+        keep_turns: int = 6,
+        summary_tokens: int = 600,
+        summarizer: Optional[Summarizer] = None,
+    ):
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer or extractive_summary
+
+    @classmethod
+    def from_env(cls) -> "HistoryManager":
+        return cls(
+            token_budget=int(os.getenv("HISTORY_TOKEN_BUDGET", "6000")),
+            keep_turns=int(os.getenv("HISTORY_KEEP_TURNS", "6")),
+            summary_tokens=int(os.getenv("HISTORY_SUMMARY_TOKENS", "600")),
+        )
+
+    def build(
+        self,
+        system_prompt: str,
+        session: dict,
+        extra: Sequence[BaseMessage] = (),
+    ) -> tuple[List[BaseMessage], PromptStats]:
+        """Return ``(messages, stats)`` for the next LLM call.
+
+        *extra* messages (e.g. retrieved knowledge) are appended after the
+        history and count against the budget. The system prompt, pinned facts,
+        *extra* and the latest message are never dropped, so the budget is a
+        target rather than a hard cap.
+        """
+        history = session["messages"]
+        folded = session.get("summarized_count", 0)
+
+        # Everything older than the last ``keep_turns`` turns is folded
+        start = max(folded, len(history) - self.keep_turns * 2)
+        self._fold(session, history[folded:start])
+        folded = start
+
+        fixed = [HumanMessage(content=system_prompt)]
+        facts = self._facts_message(session)
+        if facts:
+            fixed.append(facts)
+        fixed_tokens = sum(estimate_tokens(str(m.content)) for m in list(fixed) + list(extra))
+
+        # Still over budget: fold the oldest verbatim turns, keep the latest message
+        window = history[folded:]
+        while len(window) > 1:
+            summary_tokens = sum(estimate_tokens(str(m.content)) for m in self._summary_messages(session))
+            window_tokens = sum(estimate_tokens(str(m.content)) for m in window)
+            if fixed_tokens + summary_tokens + window_tokens <= self.token_budget:
+                break
+            self._fold(session, window[:1])
+            window = window[1:]
+
+        summary = session.get("history_summary", "")
+        messages = fixed + self._summary_messages(session) + list(window) + list(extra)
+
+        stats = PromptStats(
+            tokens=sum(estimate_tokens(str(m.content)) for m in messages),
+            verbatim_messages=len(window),
+            summarized_messages=session.get("summarized_count", 0),
+            summary_tokens=estimate_tokens(summary),
+            facts_tokens=estimate_tokens(str(facts.content)) if facts else 0,
+        )
+        return messages, stats
+
+    def _fold(self, session: dict, messages: Sequence[BaseMessage]):
+        if not messages:
+            return
+        summary = self.summarizer(session.get("history_summary", ""), messages)
+        # Keep the most recent part of the summary if it outgrows its share
+        max_chars = self.summary_tokens * CHARS_PER_TOKEN
+        if len(summary) > max_chars:
+            summary = "..." + summary[-(max_chars - 3):]
+        session["history_summary"] = summary
+        session["summarized_count"] = session.get("summarized_count", 0) + len(messages)
+
+    @staticmethod
+    def _summary_messages(session: dict) -> List[HumanMessage]:
+        summary = session.get("history_summary", "")
+        return [HumanMessage(content=f"**Earlier in this conversation:**\n{summary}")] if summary else []
+
+    @staticmethod
+    def _facts_message(session: dict) -> Optional[HumanMessage]:
+        facts = []
+        if session.get("insurance_type"):
+            facts.append(f"- Insurance type: {session['insurance_type']}")
+        for key, value in (session.get("user_info") or {}).items():
+            facts.append(f"- {key}: {value}")
+        quote = session.get("quote_result")
+        if quote:
+            if "monthly_premium" in quote:
+                facts.append(f"- Quoted premium: ${quote['monthly_premium']}/month (${quote.get('annual_premium')}/year)")
+            else:
+                facts.append(f"- Quote result: {quote}")
+        if not facts:
+            return None
+        return HumanMessage(content="**Known customer details (do not ask again):**\n" + "\n".join(facts))
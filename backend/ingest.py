@@ -0,0 +1,331 @@
+"""
+Streaming knowledge-base ingestion
+Walks a directory of policy wordings and regulations (.txt, .md, .pdf), chunks
+each file with overlap, embeds the chunks in size-bounded batches (bounded
+concurrency, retries with backoff) and upserts them into the retriever page by
+page. A JSON checkpoint records per-file progress so a killed run resumes.
+
+Usage (from backend/):
+    python -m ingest ./documents
+    python -m ingest ./documents --type auto --checkpoint ./ingest_checkpoint.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from langchain_core.documents import Document
+
+import metrics
+
+SUPPORTED_SUFFIXES = (".txt", ".md", ".pdf")
+INSURANCE_TYPES = ("auto", "home")
+
+CHUNKS = metrics.counter("ingest_chunks_total", "Chunks upserted by the ingestion pipeline")
+RETRIES = metrics.counter("ingest_embedding_retries_total", "Embedding batches retried during ingestion")
+
+
+@dataclass(frozen=True)
+class IngestConfig:
+    """``INGEST_*`` settings: chunking (characters), embedding batches, upsert pages."""
+
+    chunk_size: int = 1200
+    chunk_overlap: int = 200
+    batch_size: int = 32  # texts per embedding call
+    batch_chars: int = 32000  # and at most this many characters
+    concurrency: int = 4  # embedding calls in flight
+    retries: int = 4
+    backoff: float = 0.5  # seconds, doubled per attempt
+    page_size: int = 256  # chunks per upsert + checkpoint
+
+    @classmethod
+    def from_env(cls) -> "IngestConfig":
+        load_dotenv()
+        defaults = cls()
+        return cls(**{
+            name: type(value)(os.getenv(f"INGEST_{name.upper()}", value))
+            for name, value in asdict(defaults).items()
+        })
+
+
+@dataclass
+class IngestReport:
+    files: int = 0
+    files_unchanged: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)  # path → error
+    chunks: int = 0
+    chunks_skipped: int = 0  # already upserted by an earlier run
+    chunks_deleted: int = 0  # left over from a longer previous version or a removed file
+    files_removed: int = 0  # in the checkpoint but no longer in the directory
+    pages: int = 0
+    seconds: float = 0.0
+
+
+# ----------------------------------------------------------------------
+# Reading and chunking
+# ----------------------------------------------------------------------
+def iter_files(root: str) -> Iterator[str]:
+    """Supported files under *root*, in a stable order."""
+    for directory, subdirs, names in os.walk(root):
+        subdirs.sort()
+        for name in sorted(names):
+            if name.lower().endswith(SUPPORTED_SUFFIXES):
+                yield os.path.join(directory, name)
+
+
+def read_text(path: str) -> str:
+    if path.lower().endswith(".pdf"):
+        try:
+            from pypdf import PdfReader
+        except ImportError as exc:
+            raise RuntimeError("PDF ingestion needs pypdf (pip install pypdf)") from exc
+        return "\n\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def chunk_text(text: str, size: int = 1200, overlap: int = 200) -> List[str]:
+    """Split *text* into chunks of at most *size* characters, *overlap* shared
+    between neighbours. Cuts prefer a paragraph, then a line, a sentence and
+    finally a word boundary in the second half of the window.
+    """
+    if overlap >= size:
+        raise ValueError("chunk overlap must be smaller than the chunk size")
+    chunks = []
+    start, length = 0, len(text)
+    while start < length:
+        end = min(start + size, length)
+        if end < length:
+            for separator in ("\n\n", "\n", ". ", " "):
+                cut = text.rfind(separator, start + size // 2, end)
+                if cut != -1:
+                    end = cut + len(separator)
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= length:
+            break
+        next_start = max(end - overlap, start + 1)
+        space = text.find(" ", next_start, end)  # don't start mid-word
+        start = space + 1 if space != -1 else next_start
+    return chunks
+
+
+def infer_type(relative_path: str) -> str:
+    """``auto`` / ``home`` when a path component names it, else ``general``."""
+    parts = [part.lower() for part in relative_path.replace("\\", "/").split("/")]
+    for insurance_type in INSURANCE_TYPES:
+        if any(part == insurance_type or part.startswith(insurance_type + "_") for part in parts):
+            return insurance_type
+    return "general"
+
+
+def batches(texts: List[str], size: int, chars: int) -> List[Tuple[int, int]]:
+    """``(start, end)`` slices of *texts* holding at most *size* items and *chars* characters."""
+    slices, start, total = [], 0, 0
+    for i, text in enumerate(texts):
+        if i > start and (i - start >= size or total + len(text) > chars):
+            slices.append((start, i))
+            start, total = i, 0
+        total += len(text)
+    if start < len(texts):
+        slices.append((start, len(texts)))
+    return slices
+
+
+# ----------------------------------------------------------------------
+# Checkpoint
+# ----------------------------------------------------------------------
+class Checkpoint:
+    """``{"files": {relative path: {"sha256", "chunks", "done"}}}`` in a JSON file.
+
+    ``path=None`` keeps it in memory (in-memory retrievers start empty anyway).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.files: Dict[str, dict] = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.files = json.load(f).get("files", {})
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"files": self.files}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)  # atomic: a kill never leaves half a file
+
+
+# ----------------------------------------------------------------------
+# Pipeline
+# ----------------------------------------------------------------------
+def embed_with_retry(embed: Callable[[List[str]], List[List[float]]], texts: List[str],
+                     config: IngestConfig) -> List[List[float]]:
+    """``embed(texts)`` retried with jittered exponential backoff."""
+    for attempt in range(config.retries + 1):
+        try:
+            return embed(texts)
+        except Exception:
+            if attempt == config.retries:
+                raise
+            RETRIES.inc()
+            time.sleep(config.backoff * 2 ** attempt * (0.5 + random.random()))
+
+
+def ingest_directory(root: str, retriever=None, embeddings=None, config: Optional[IngestConfig] = None,
+                     checkpoint_path: Optional[str] = None, doc_type: Optional[str] = None,
+                     log: Callable[[str], None] = print) -> IngestReport:
+    """
+    Stream every supported file under *root* into *retriever*
+
+    Chunk ids are ``<relative path>#<n>``, so re-running upserts in place.
+    Files whose content hash matches the checkpoint resume after the last
+    committed page; an edited file is re-embedded from its first chunk and the
+    chunks of files gone from *root* are deleted. Every upsert bumps the
+    retriever's version, so cached knowledge context is dropped.
+    A file that fails to read is reported and skipped; an embedding batch
+    that still fails after its retries aborts the run (the checkpoint keeps
+    what was committed).
+    """
+    if retriever is None or embeddings is None:
+        from rag_system import get_embeddings, get_retriever
+        retriever = retriever or get_retriever()
+        embeddings = embeddings or get_embeddings()
+    config = config or IngestConfig.from_env()
+    checkpoint = Checkpoint(checkpoint_path if retriever.persistent else None)
+    lexical = getattr(retriever, "lexical", None)  # hybrid: in-memory BM25 side
+    report = IngestReport()
+    started = time.perf_counter()
+    page: List[Tuple[str, int, Document]] = []
+
+    def flush(executor):
+        texts = [document.page_content for _, _, document in page]
+        slices = batches(texts, config.batch_size, config.batch_chars)
+        vectors = []
+        for part in executor.map(lambda s: embed_with_retry(embeddings.embed_documents, texts[s[0]:s[1]], config),
+                                 slices):
+            vectors.extend(part)
+        retriever.add_documents([document for _, _, document in page],
+                                ids=[f"{rel}#{n}" for rel, n, _ in page], embeddings=vectors)
+        for rel, n, _ in page:
+            checkpoint.files[rel]["done"] = max(checkpoint.files[rel]["done"], n + 1)
+        checkpoint.save()
+        CHUNKS.inc(len(page))
+        report.chunks += len(page)
+        report.pages += 1
+        page.clear()
+
+    seen = set()
+    with ThreadPoolExecutor(max_workers=config.concurrency, thread_name_prefix="ingest") as executor:
+        for path in iter_files(root):
+            rel = os.path.relpath(path, root).replace(os.sep, "/")
+            seen.add(rel)
+            report.files += 1
+            try:
+                text = read_text(path)
+            except Exception as exc:
+                report.failed[rel] = str(exc)
+                log(f"   ⚠️ {rel}: {exc}")
+                continue
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            chunks = chunk_text(text, config.chunk_size, config.chunk_overlap)
+            metadata = {"source": rel, "type": doc_type or infer_type(rel)}
+            documents = [Document(page_content=chunk, metadata={**metadata, "chunk": n})
+                         for n, chunk in enumerate(chunks)]
+
+            previous = checkpoint.files.get(rel)
+            done = previous["done"] if previous and previous["sha256"] == digest else 0
+            if previous and previous["sha256"] != digest and previous["chunks"] > len(chunks):
+                stale = [f"{rel}#{n}" for n in range(len(chunks), previous["chunks"])]
+                retriever.delete(stale)
+                report.chunks_deleted += len(stale)
+            checkpoint.files[rel] = {"sha256": digest, "chunks": len(chunks), "done": done}
+            if done:
+                report.chunks_skipped += done
+                if lexical is not None:  # keep BM25 complete without re-embedding
+                    lexical.add(documents[:done], ids=[f"{rel}#{n}" for n in range(done)])
+            if done >= len(chunks):
+                report.files_unchanged += 1
+                continue
+
+            for n in range(done, len(chunks)):
+                page.append((rel, n, documents[n]))
+                if len(page) >= config.page_size:
+                    flush(executor)
+                    log(f"   📄 {report.chunks} chunks upserted ({report.files} files seen)")
+        if page:
+            flush(executor)
+
+    # Files deleted from the directory since the last run
+    for rel in [rel for rel in checkpoint.files if rel not in seen]:
+        stale = [f"{rel}#{n}" for n in range(checkpoint.files[rel]["chunks"])]
+        retriever.delete(stale)
+        del checkpoint.files[rel]
+        report.files_removed += 1
+        report.chunks_deleted += len(stale)
+    checkpoint.save()
+
+    report.seconds = round(time.perf_counter() - started, 3)
+    return report
+
+
+def restore_lexical_index(retriever, checkpoint_path: Optional[str], page_size: int = 256) -> int:
+    """
+    Refill a hybrid retriever's in-memory BM25 index from the persistent store
+
+    Reads back the chunks a previous run (e.g. ``python -m ingest``) committed,
+    by the ids in its checkpoint, so lexical matches cover ingested documents
+    after a restart. Returns how many chunks were indexed.
+    """
+    lexical = getattr(retriever, "lexical", None)
+    if lexical is None or not retriever.persistent:
+        return 0
+    ids = [f"{rel}#{n}" for rel, entry in sorted(Checkpoint(checkpoint_path).files.items())
+           for n in range(entry["done"])]
+    restored = 0
+    for start in range(0, len(ids), page_size):
+        page = ids[start:start + page_size]
+        found = [(doc_id, document) for doc_id, document in zip(page, retriever.get_documents(page))
+                 if document is not None]
+        lexical.add([document for _, document in found], ids=[doc_id for doc_id, _ in found])
+        restored += len(found)
+    return restored
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--type", choices=("auto", "home", "general"),
+                        help="metadata type for every chunk (default: from the path)")
+    parser.add_argument("--checkpoint", default=os.getenv("INGEST_CHECKPOINT", "./ingest_checkpoint.json"))
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    from rag_system import get_retriever
+    if not get_retriever().persistent:
+        print("❌ RAG_BACKEND is in-memory: set KNOWLEDGE_DIR so the server ingests at startup instead")
+        sys.exit(2)
+    report = ingest_directory(args.directory, checkpoint_path=args.checkpoint, doc_type=args.type)
+    if args.json:
+        print(json.dumps(asdict(report), indent=2))
+    else:
+        print(f"✅ {report.chunks} chunks upserted in {report.pages} pages from {report.files} files "
+              f"({report.files_unchanged} unchanged, {report.chunks_skipped} chunks resumed, "
+              f"{report.files_removed} removed, "
+              f"{len(report.failed)} failed) in {report.seconds}s")
+    sys.exit(1 if report.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
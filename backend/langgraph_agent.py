@@ -4,14 +4,16 @@ Demonstrates: Nodes, Edges, State Management, Tool Calling, RAG
 """
 
 import os
+import threading
 from typing import TypedDict, Annotated, Sequence
-from langgraph.graph import StateGraph, END
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain.tools import tool
+from langchain_core.tools import tool
 from dotenv import load_dotenv
 import operator
-from rag_system import get_relevant_context
+from rag_system import embed_query, format_context, get_relevant_context, knowledge_version, lexical_lookup
+from semantic_cache import get_cache
+from intent_router import route
+import metrics
 
 load_dotenv()
 
@@ -204,6 +206,10 @@ def calculate_home_premium(
 # GRAPH NODES
 # ============================================================================
 
+# Per-node latency, exposed by the API's /metrics endpoint
+NODE_SECONDS = metrics.histogram("agent_graph_node_seconds", "Time spent in each LangGraph node", ["node"])
+
+@NODE_SECONDS.timed(node="gather_info")
 def gather_info_node(state: AgentState) -> AgentState:
     """Node: Gather information from user through conversation"""
     print("\n🔵 NODE: gather_info")
@@ -215,6 +221,7 @@ def gather_info_node(state: AgentState) -> AgentState:
     state["next_action"] = "check_if_ready"
     return state
 
+@NODE_SECONDS.timed(node="search_knowledge")
 def search_knowledge_node(state: AgentState) -> AgentState:
     """Node: Search knowledge base for relevant information"""
     print("\n🔵 NODE: search_knowledge")
@@ -223,15 +230,35 @@ def search_knowledge_node(state: AgentState) -> AgentState:
     last_message = state["messages"][-1].content if state["messages"] else ""
     insurance_type = state.get("insurance_type")
     
-    # Search RAG system
-    context = get_relevant_context(last_message, insurance_type)
-    state["knowledge_context"] = context
+    # Exact-term lookups come straight from the inverted index (no embedding)
+    documents = lexical_lookup(last_message, k=2, filter_type=insurance_type)
+    if documents is not None:
+        state["knowledge_context"] = format_context(documents)
+        print(f"   📚 Lexical match ({len(documents)} documents)")
+        state["next_action"] = "respond_with_context"
+        return state
+    
+    # Semantic cache next – near-duplicate questions reuse the same context
+    cache = get_cache("knowledge")
+    namespace = insurance_type or ""
+    version = knowledge_version()
+    embedding = embed_query(last_message)
+    context = cache.lookup(embedding, namespace=namespace, version=version)
+    
+    if context is None:
+        # Search RAG system (reusing the embedding computed for the cache key)
+        context = get_relevant_context(last_message, insurance_type, embedding=embedding)
+        cache.store(embedding, context, namespace=namespace, version=version)
+        print(f"   📚 Found relevant context ({len(context)} chars)")
+    else:
+        print(f"   📚 Reused cached context ({len(context)} chars)")
     
-    print(f"   📚 Found relevant context ({len(context)} chars)")
+    state["knowledge_context"] = context
     
     state["next_action"] = "respond_with_context"
     return state
 
+@NODE_SECONDS.timed(node="calculate_quote")
 def calculate_quote_node(state: AgentState) -> AgentState:
     """Node: Calculate insurance quote using tools"""
     print("\n🔵 NODE: calculate_quote")
@@ -254,6 +281,7 @@ def calculate_quote_node(state: AgentState) -> AgentState:
     
     return state
 
+@NODE_SECONDS.timed(node="explain_results")
 def explain_results_node(state: AgentState) -> AgentState:
     """Node: Explain the quote results to the user"""
     print("\n🔵 NODE: explain_results")
@@ -268,14 +296,13 @@ def explain_results_node(state: AgentState) -> AgentState:
 # CONDITIONAL EDGES (Decision Logic)
 # ============================================================================
 
+@NODE_SECONDS.timed(node="should_search_knowledge")
 def should_search_knowledge(state: AgentState) -> str:
     """Decide if we should search the knowledge base"""
-    last_message = state["messages"][-1].content.lower() if state["messages"] else ""
+    last_message = state["messages"][-1].content if state["messages"] else ""
     
     # Search if user asks questions about coverage, discounts, etc.
-    search_keywords = ["what is", "explain", "tell me about", "how does", "difference between"]
-    
-    if any(keyword in last_message for keyword in search_keywords):
+    if route(last_message).needs_rag:
         return "search"
     
     # Check if we have enough info to calculate
@@ -295,6 +322,7 @@ def should_search_knowledge(state: AgentState) -> str:
 
 def create_agent_graph():
     """Create the LangGraph workflow"""
+    from langgraph.graph import StateGraph, END
     
     # Create graph
     workflow = StateGraph(AgentState)
@@ -329,16 +357,33 @@ def create_agent_graph():
     
     return app
 
-# Create the graph
-agent_graph = create_agent_graph()
+# The compiled graph is built on first use (or by the app lifespan), not on import
+_graph_lock = threading.Lock()
+_agent_graph = None
+
+def get_agent_graph():
+    """Compile the workflow once per process and return it"""
+    global _agent_graph
+    if _agent_graph is None:
+        with _graph_lock:
+            if _agent_graph is None:
+                _agent_graph = create_agent_graph()
+    return _agent_graph
+
+def __getattr__(name):
+    # Back-compat for ``from langgraph_agent import agent_graph``
+    if name == "agent_graph":
+        return get_agent_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ============================================================================
 # VISUALIZATION
 # ============================================================================
 
 def generate_graph_visualization():
-    """Generate Mermaid diagram of the agent graph"""
+    """Generate Mermaid diagram of the agent graph (agent_graph.png + Mermaid code)"""
     try:
+        agent_graph = get_agent_graph()
         # Save as PNG
         agent_graph.get_graph().draw_mermaid_png(output_file_path="agent_graph.png")
         print("✅ Graph visualization saved to agent_graph.png")
@@ -350,8 +395,8 @@ def generate_graph_visualization():
         print(f"⚠️  Could not generate visualization: {e}")
         return None
 
-# Generate visualization on import
-try:
-    mermaid_diagram = generate_graph_visualization()
-except Exception as e:
-    print(f"⚠️  Visualization will be generated on first run: {e}")
+if __name__ == "__main__":
+    # Rendering needs network access (mermaid.ink), so it only runs on request
+    mermaid_code = generate_graph_visualization()
+    if mermaid_code:
+        print(mermaid_code)
@@ -0,0 +1,173 @@
+"""
+In-process BM25 inverted index
+Built next to the vector index at ingestion time. Policy terminology
+("Coverage C", "ALE", "50/100/50") is an exact-term lookup: BM25 ranks it
+without an embedding call, and hybrid retrieval fuses it with vector search.
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+# Split limits ("50/100/50"), amounts ("$350,000") and decimals stay one token
+_TOKEN = re.compile(r"\d+(?:[/.,]\d+)*|[a-z][a-z0-9']*")
+
+# Question scaffolding that carries no lookup signal
+STOPWORDS = frozenset("""
+about an and are as at be by can could do does for from how i if in is it me my of on or our should so tell
+than that the their them there these this to was we what when where which who why will with would you your
+explain difference between
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased terms of *text* minus stopwords (commas and apostrophes dropped)."""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        token = token.replace(",", "").replace("'", "")
+        if token and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index (term → {doc index: term frequency}).
+
+    Documents added with an id replace the previous one with that id; removed
+    documents leave a tombstone slot. Once tombstones outnumber
+    ``compact_ratio`` × the live documents the slots are renumbered, so
+    re-ingesting the same files keeps memory proportional to the live set.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, compact_ratio: float = 0.5):
+        self.k1 = k1
+        self.b = b
+        self.compact_ratio = compact_ratio
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._lengths: List[int] = []
+        self._documents: List[Optional[Document]] = []
+        self._ids: Dict[str, int] = {}
+        self._live = 0
+        self._total_length = 0
+        self.version = 0  # bumped by every add / remove
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._live
+
+    def add(self, documents: List[Document], ids: Optional[List[str]] = None) -> None:
+        ids = list(ids) if ids is not None else [None] * len(documents)
+        with self._lock:
+            for doc_id, document in zip(ids, documents):
+                if doc_id is not None:
+                    self._remove(doc_id)
+                    self._ids[doc_id] = len(self._documents)
+                index = len(self._documents)
+                terms = Counter(tokenize(document.page_content))
+                for term, tf in terms.items():
+                    self._postings.setdefault(term, {})[index] = tf
+                length = sum(terms.values())
+                self._lengths.append(length)
+                self._total_length += length
+                self._documents.append(document)
+                self._live += 1
+            self.version += 1
+            self._maybe_compact()
+
+    def remove(self, ids: List[str]) -> None:
+        with self._lock:
+            for doc_id in ids:
+                self._remove(doc_id)
+            self.version += 1
+            self._maybe_compact()
+
+    def remove_where(self, filter: Dict[str, str]) -> int:
+        """Remove documents whose metadata matches every item of *filter*
+        (with or without ids); return how many."""
+        with self._lock:
+            ids = {index: doc_id for doc_id, index in self._ids.items()}
+            matches = [index for index, document in enumerate(self._documents)
+                       if document is not None
+                       and all(document.metadata.get(key) == value for key, value in filter.items())]
+            for index in matches:
+                self._ids.pop(ids.get(index), None)
+                self._drop(index)
+            self.version += 1
+            self._maybe_compact()
+        return len(matches)
+
+    def _remove(self, doc_id: str):
+        index = self._ids.pop(doc_id, None)
+        if index is not None:
+            self._drop(index)
+
+    def _drop(self, index: int):
+        for term in set(tokenize(self._documents[index].page_content)):
+            postings = self._postings[term]
+            del postings[index]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths[index]
+        self._documents[index] = None
+        self._live -= 1
+
+    def _maybe_compact(self):
+        if len(self._documents) - self._live > self.compact_ratio * self._live:
+            self._compact()
+
+    def _compact(self):
+        """Drop tombstone slots and renumber postings, lengths and ids."""
+        remap: Dict[int, int] = {}
+        documents: List[Optional[Document]] = []
+        lengths: List[int] = []
+        for index, document in enumerate(self._documents):
+            if document is not None:
+                remap[index] = len(documents)
+                documents.append(document)
+                lengths.append(self._lengths[index])
+        self._postings = {term: {remap[index]: tf for index, tf in postings.items()}
+                          for term, postings in self._postings.items()}
+        self._ids = {doc_id: remap[index] for doc_id, index in self._ids.items()}
+        self._documents = documents
+        self._lengths = lengths
+
+    def idf(self, term: str) -> float:
+        """BM25+ style idf (never negative); unseen terms get the maximum."""
+        df = len(self._postings.get(term, ()))
+        n = self._live
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, k: int = 3, filter: Optional[Dict[str, str]] = None
+               ) -> Tuple[List[Tuple[Document, float]], float]:
+        """Top-*k* ``(document, score)`` pairs for *query*, and the match confidence.
+
+        Confidence is the idf-weighted share of the query's terms that the top
+        document contains: 1.0 means every term (rare ones weigh most) matched,
+        0 means none did. Query terms unknown to the index count against it.
+        """
+        terms = tokenize(query)
+        with self._lock:
+            n = self._live
+            if not terms or n == 0 or k <= 0:
+                return [], 0.0
+            avgdl = self._total_length / n
+            scores: Dict[int, float] = {}
+            weights = {term: self.idf(term) for term in set(terms)}
+            for term, idf in weights.items():
+                for index, tf in self._postings.get(term, {}).items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self._lengths[index] / avgdl)
+                    scores[index] = scores.get(index, 0.0) + idf * tf * (self.k1 + 1) / norm
+            if filter:
+                scores = {i: s for i, s in scores.items()
+                          if all(self._documents[i].metadata.get(key) == value for key, value in filter.items())}
+            ranked = sorted(scores.items(), key=lambda item: -item[1])[:k]
+            if not ranked:
+                return [], 0.0
+            top = ranked[0][0]
+            matched = sum(idf for term, idf in weights.items() if top in self._postings.get(term, ()))
+            confidence = matched / sum(weights.values())
+            return [(self._documents[i], score) for i, score in ranked], confidence
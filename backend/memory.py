@@ -1,10 +1,36 @@
+import sys
+
+from session_store import InMemorySessionStore, SessionStore, estimate_size
+
+
+def estimate_chat_size(chat) -> int:
+    """Approximate footprint of a Gemini chat session (bytes).
+
+    A shallow ``sys.getsizeof`` misses the history, so this sums its parts:
+    text by length, function calls / responses by their printed form.
+    """
+    history = getattr(chat, "history", None)
+    if history is None:
+        return estimate_size(chat)
+    size = sys.getsizeof(chat)
+    for content in history:
+        for part in getattr(content, "parts", ()):
+            text = getattr(part, "text", None)
+            size += sys.getsizeof(text if text else str(part))
+    return size
+
+
 class MemoryStore:
     """Simple in‑memory store for Gemini chat sessions.
     This allows the agent to retain conversation history across multiple calls.
+    Chats are live SDK objects, so they stay in this process whatever
+    ``SESSION_BACKEND`` says.
     """
 
-    def __init__(self):
-        self._sessions = {}
+    def __init__(self, store: SessionStore = None):
+        # Bounded by idle TTL / LRU / bytes like the HTTP sessions (SESSION_* env
+        # vars); call set() again after each turn so the history is re-measured
+        self._sessions = store if store is not None else InMemorySessionStore.from_env(size_of=estimate_chat_size)
 
     def get(self, session_id: str):
         """Return the chat object for *session_id* or ``None`` if not present."""
@@ -14,8 +40,8 @@ class MemoryStore:
         """Store *chat* under *session_id*.
         Overwrites any existing entry.
         """
-        self._sessions[session_id] = chat
+        self._sessions.put(session_id, chat)
 
     def clear(self, session_id: str):
         """Remove the stored chat for *session_id* if it exists."""
-        self._sessions.pop(session_id, None)
+        self._sessions.delete(session_id)
@@ -1,24 +1,38 @@
 import os
-import google.generativeai as genai
 from dotenv import load_dotenv
 
+PROVIDERS = ("gemini", "fake")
+
 class Provider:
     """Abstraction for configuring and retrieving a Gemini model.
     This follows Sam Bhagwat's principle of provider abstraction.
+
+    ``LLM_PROVIDER=fake`` swaps every model for the deterministic offline
+    fakes in ``fake_llm`` (no API key or network needed).
     """
 
-    def __init__(self):
+    def __init__(self, name: str = None, api_key: str = None):
         # Load environment variables once
         load_dotenv()
-        self.api_key = os.getenv("GEMINI_API_KEY")
+        self.name = (name or os.getenv("LLM_PROVIDER", "gemini")).lower()
+        if self.name not in PROVIDERS:
+            raise ValueError(f"Unknown LLM_PROVIDER {self.name!r} (expected one of {PROVIDERS})")
+        self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         self.model = None
 
+    @property
+    def is_fake(self) -> bool:
+        return self.name == "fake"
+
     def configure(self):
         """Configure the Gemini client with the API key.
         Can be extended to support multiple providers.
         """
+        if self.is_fake:
+            return
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY not set in environment")
+        import google.generativeai as genai
         genai.configure(api_key=self.api_key)
 
     def get_model(self, model_name: str = "gemini-2.0-flash-exp"):
@@ -27,5 +41,38 @@ class Provider:
         """
         if self.model is None:
             # Model will be created later with tools injected by caller
-            self.model = genai.GenerativeModel(model_name=model_name)
+            if self.is_fake:
+                from fake_llm import FakeGenerativeModel
+                self.model = FakeGenerativeModel(model_name=model_name)
+            else:
+                import google.generativeai as genai
+                self.model = genai.GenerativeModel(model_name=model_name)
         return self.model
+
+    def chat_model(self, model: str, temperature: float = 0.7, max_retries: int = 2, timeout: float = None):
+        """Return a LangChain chat model for *model*."""
+        if self.is_fake:
+            from fake_llm import FakeChatModel
+            return FakeChatModel(model=model, temperature=temperature)
+
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        kwargs = {
+            "model": model,
+            "google_api_key": self.api_key,
+            "temperature": temperature,
+            "max_retries": max_retries,
+        }
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        return ChatGoogleGenerativeAI(**kwargs)
+
+    def embeddings(self, model: str):
+        """Return a LangChain embeddings client for *model*."""
+        if self.is_fake:
+            from fake_llm import FakeEmbeddings
+            return FakeEmbeddings(model=model)
+
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+        return GoogleGenerativeAIEmbeddings(model=model, google_api_key=self.api_key)
@@ -1,29 +1,134 @@
 """
 RAG System for Insurance Knowledge Base
-Uses Chroma DB (local) + Gemini Embeddings (FREE)
+Uses Chroma DB (local) or an in-memory NumPy index + Gemini Embeddings (FREE)
 """
 
+import hashlib
+import json
 import os
-from typing import List
-from langchain_chroma import Chroma
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain.schema import Document
+import threading
+import time
+from typing import Dict, List, Optional
+from langchain_core.documents import Document
 from dotenv import load_dotenv
 
+from clients import DEFAULT_EMBEDDING_MODEL, get_clients
+from embedding_cache import get_embedding_cache
+from retrievers import RETRIEVER_BACKENDS, ChromaRetriever, HybridConfig, HybridRetriever, NumpyRetriever, Retriever
+from singleflight import get_flight, normalize_key
+
 load_dotenv()
 
-# Initialize Gemini embeddings (FREE!)
-embeddings = GoogleGenerativeAIEmbeddings(
-    model="models/embedding-001",
-    google_api_key=os.getenv("GEMINI_API_KEY")
-)
+# Nothing heavy happens at import: the embeddings client and the Chroma store
+# are built on first use (or by init_rag() from the app lifespan).
+COLLECTION_NAME = "insurance_docs"
+
+_lock = threading.Lock()
+_vectorstore = None
+_vectorstore_error: Optional[Exception] = None
+_retriever: Optional[Retriever] = None
+_initialized = False
+_last_sync: Optional[Dict[str, object]] = None
+
+def persist_directory() -> str:
+    """Local Chroma directory; fake vectors get their own so they never mix with real ones"""
+    return "./insurance_knowledge_db_fake" if get_clients().provider.is_fake else "./insurance_knowledge_db"
+
+def get_embeddings():
+    """Gemini embeddings (FREE!) – shared handle from the client registry
+    (LLM_PROVIDER=fake gives deterministic offline embeddings), behind the
+    on-disk embedding cache so repeated texts never go upstream twice
+    """
+    clients = get_clients()
+    model = f"{clients.provider.name}:{DEFAULT_EMBEDDING_MODEL}"
+    return get_embedding_cache().wrap(clients.embeddings(DEFAULT_EMBEDDING_MODEL), model)
+
+def knowledge_stamp_path() -> str:
+    """File replaced on every write to the shared Chroma collection"""
+    return os.getenv("KB_STAMP") or os.path.join(persist_directory(), "kb_version")
+
+def get_vectorstore():
+    """Chroma vector store (local, FREE!), opened on first call
+    
+    A failure to open the store (e.g. chromadb missing) is remembered so
+    request paths fail fast instead of retrying the import every time.
+    """
+    global _vectorstore, _vectorstore_error
+    if _vectorstore is not None:
+        return _vectorstore
+    with _lock:
+        if _vectorstore is None:
+            if _vectorstore_error is not None:
+                raise RuntimeError(f"Vector store unavailable: {_vectorstore_error}")
+            try:
+                from langchain_chroma import Chroma
+                _vectorstore = Chroma(
+                    persist_directory=persist_directory(),
+                    embedding_function=get_embeddings(),
+                    collection_name=COLLECTION_NAME
+                )
+            except Exception as e:
+                _vectorstore_error = e
+                raise
+    return _vectorstore
+
+def get_retriever() -> Retriever:
+    """The configured retriever (``RAG_BACKEND``: ``chroma`` or ``numpy``), built once
+    
+    ``numpy`` keeps the knowledge base in memory (rebuilt from
+    INSURANCE_KNOWLEDGE at startup, cheap with the embedding cache). Wrapped
+    in BM25 hybrid search unless ``RAG_HYBRID=off``.
+    """
+    global _retriever
+    if _retriever is None:
+        with _lock:
+            if _retriever is None:
+                backend = os.getenv("RAG_BACKEND", "chroma").lower()
+                if backend == "numpy":
+                    retriever = NumpyRetriever(get_embeddings())
+                elif backend == "chroma":
+                    retriever = ChromaRetriever(get_vectorstore, knowledge_stamp_path())
+                else:
+                    raise ValueError(f"Unknown RAG_BACKEND {backend!r} (expected one of {RETRIEVER_BACKENDS})")
+                hybrid = HybridConfig.from_env()
+                _retriever = HybridRetriever(retriever, hybrid) if hybrid.enabled else retriever
+    return _retriever
+
+def init_rag():
+    """
+    Open the store and load the knowledge base once per process
+    
+    Called from the app warm-up; raises on failure and is retried on the next
+    call. Returns the retriever. With ``KNOWLEDGE_DIR`` set, the files there are
+    ingested too (resuming from ``INGEST_CHECKPOINT`` for a persistent store);
+    otherwise chunks a CLI run left in the store are restored into BM25.
+    """
+    global _initialized
+    if not _initialized:
+        initialize_knowledge_base()
+        knowledge_dir = os.getenv("KNOWLEDGE_DIR")
+        checkpoint = os.getenv("INGEST_CHECKPOINT", "./ingest_checkpoint.json")
+        if knowledge_dir:
+            from ingest import ingest_directory
+            report = ingest_directory(knowledge_dir, get_retriever(), get_embeddings(), checkpoint_path=checkpoint)
+            print(f"✅ Ingested {knowledge_dir}: {report.chunks} new chunks, {report.chunks_skipped} unchanged, "
+                  f"{report.files_removed} files removed")
+        elif os.path.exists(checkpoint):
+            # Chunks ingested by the CLI are in the store; put them back into BM25
+            from ingest import restore_lexical_index
+            restored = restore_lexical_index(get_retriever(), checkpoint)
+            if restored:
+                print(f"✅ Indexed {restored} ingested chunks for lexical search")
+        _initialized = True
+    return get_retriever()
 
-# Initialize Chroma vector store (local, FREE!)
-vectorstore = Chroma(
-    persist_directory="./insurance_knowledge_db",
-    embedding_function=embeddings,
-    collection_name="insurance_docs"
-)
+def __getattr__(name):
+    # Back-compat for ``rag_system.vectorstore`` / ``rag_system.embeddings``
+    if name == "vectorstore":
+        return get_vectorstore()
+    if name == "embeddings":
+        return get_embeddings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Insurance knowledge base
 INSURANCE_KNOWLEDGE = [
@@ -141,33 +246,124 @@ WHY: Multiple claims can increase your rates significantly. If damage costs only
     }
 ]
 
+def knowledge_id(item: dict) -> str:
+    """Stable document id of a knowledge-base entry"""
+    return f"kb:{item['metadata']['type']}:{item['metadata']['topic']}"
+
+def knowledge_manifest_path(retriever: Retriever) -> Optional[str]:
+    """Where the synced content hashes live (``None`` for in-memory retrievers)"""
+    if not retriever.persistent:
+        return None
+    return os.getenv("KB_MANIFEST") or os.path.join(persist_directory(), "kb_manifest.json")
+
+def _load_manifest(path: Optional[str]) -> Optional[Dict[str, str]]:
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def _save_manifest(path: Optional[str], manifest: Dict[str, str]):
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def sync_knowledge_base(retriever: Optional[Retriever] = None, items: List[dict] = None,
+                        manifest_path: Optional[str] = None) -> Dict[str, object]:
+    """
+    Bring the store in line with INSURANCE_KNOWLEDGE by content hash
+    
+    A manifest (id → sha256 of the entry) records what was last written, so
+    only added or edited entries are embedded and upserted and removed ones are
+    deleted; nothing is read back from the store. A store populated before
+    manifests existed (random ids) has its knowledge-base rows cleared once.
+    
+    Returns the change report: added / updated / removed ids, unchanged count.
+    """
+    started = time.perf_counter()
+    retriever = retriever or get_retriever()
+    items = INSURANCE_KNOWLEDGE if items is None else items
+    if manifest_path is None:
+        manifest_path = knowledge_manifest_path(retriever)
+    
+    current = {
+        knowledge_id(item): hashlib.sha256(json.dumps(item, sort_keys=True).encode()).hexdigest()
+        for item in items
+    }
+    previous = _load_manifest(manifest_path)
+    if previous is None:
+        previous = {}
+        if retriever.persistent and retriever.count() > 0:
+            # Legacy store: entries were added without ids – clear them once
+            for item in items:
+                retriever.delete_where(item["metadata"])
+    
+    added = [doc_id for doc_id in current if doc_id not in previous]
+    updated = [doc_id for doc_id in current if doc_id in previous and previous[doc_id] != current[doc_id]]
+    removed = [doc_id for doc_id in previous if doc_id not in current]
+    
+    documents = {
+        knowledge_id(item): Document(page_content=item["content"], metadata=item["metadata"])
+        for item in items
+    }
+    changed = added + updated
+    if changed:
+        retriever.add_documents([documents[doc_id] for doc_id in changed], ids=changed)
+    if removed:
+        retriever.delete(removed)
+    if isinstance(retriever, HybridRetriever):
+        # The inverted index lives in memory: refill it with the unchanged entries
+        unchanged = [doc_id for doc_id in current if doc_id not in changed]
+        retriever.lexical.add([documents[doc_id] for doc_id in unchanged], ids=unchanged)
+    _save_manifest(manifest_path, current)
+    
+    return {
+        "added": added,
+        "updated": updated,
+        "removed": removed,
+        "unchanged": len(current) - len(changed),
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
 def initialize_knowledge_base():
-    """Initialize the vector store with insurance knowledge"""
-    # Check if already initialized
-    try:
-        existing_docs = vectorstore.get()
-        if existing_docs and len(existing_docs.get('ids', [])) > 0:
-            print(f"✅ Knowledge base already initialized with {len(existing_docs['ids'])} documents")
-            return vectorstore
-    except:
-        pass
-    
-    # Create documents
-    documents = [
-        Document(
-            page_content=item["content"],
-            metadata=item["metadata"]
-        )
-        for item in INSURANCE_KNOWLEDGE
-    ]
-    
-    # Add to vector store
-    vectorstore.add_documents(documents)
-    print(f"✅ Initialized knowledge base with {len(documents)} documents")
-    
-    return vectorstore
-
-def search_knowledge(query: str, k: int = 3, filter_type: str = None) -> List[Document]:
+    """Sync the retriever with the insurance knowledge (only changed entries are embedded)"""
+    global _last_sync
+    retriever = get_retriever()
+    _last_sync = sync_knowledge_base(retriever)
+    print(f"✅ Knowledge base synced ({retriever.name}): {len(_last_sync['added'])} added, "
+          f"{len(_last_sync['updated'])} updated, {len(_last_sync['removed'])} removed, "
+          f"{_last_sync['unchanged']} unchanged")
+    return retriever
+
+def knowledge_sync_report() -> Dict[str, object]:
+    """The last startup sync report (empty until the knowledge base is loaded)"""
+    return _last_sync or {}
+
+def embed_query(query: str) -> List[float]:
+    """Embed *query* once so callers can reuse it (cache key + vector search)
+    
+    Identical concurrent queries share one embedding call.
+    """
+    return get_flight("embed").do_sync(normalize_key(query), lambda: get_embeddings().embed_query(query))
+
+def knowledge_version() -> str:
+    """
+    Version of the knowledge base contents
+    
+    The retriever's write counter plus the store's shared stamp: every add,
+    upsert or delete (startup sync, ingestion, in-place re-embeds) changes
+    it – including writes by other workers or a ``python -m ingest`` run on
+    the same Chroma directory – so semantic caches drop stale context. No
+    store query is made.
+    """
+    retriever = get_retriever()
+    return f"{retriever.name}:{retriever.version}:{retriever.shared_stamp()}"
+
+def search_knowledge(query: str, k: int = 3, filter_type: str = None,
+                     embedding: Optional[List[float]] = None) -> List[Document]:
     """
     Search the knowledge base for relevant information
     
@@ -175,33 +371,34 @@ def search_knowledge(query: str, k: int = 3, filter_type: str = None) -> List[Do
         query: Search query
         k: Number of results to return
         filter_type: Optional filter by type ('auto', 'home', 'general')
+        embedding: Precomputed query embedding (skips the embedding call)
     
     Returns:
         List of relevant documents
     """
     filter_dict = {"type": filter_type} if filter_type else None
     
-    results = vectorstore.similarity_search(
-        query,
-        k=k,
-        filter=filter_dict
-    )
+    def run():
+        return get_retriever().search(query, k=k, filter=filter_dict, embedding=embedding)
     
-    return results
+    # Identical concurrent searches share one embedding call + index query
+    key = normalize_key(query, k, filter_type)
+    return get_flight("search").do_sync(key, run)
 
-def get_relevant_context(query: str, insurance_type: str = None) -> str:
+def lexical_lookup(query: str, k: int = 2, filter_type: str = None) -> Optional[List[Document]]:
     """
-    Get relevant context for a query as a formatted string
-    
-    Args:
-        query: User's question
-        insurance_type: 'auto' or 'home' to filter results
+    Documents for an exact-term question, or ``None`` when vector search is needed
     
-    Returns:
-        Formatted context string
+    Lets callers skip embedding the query (and the semantic cache keyed on it)
+    for terminology lookups the inverted index answers confidently.
     """
-    results = search_knowledge(query, k=2, filter_type=insurance_type)
-    
+    retriever = get_retriever()
+    if not isinstance(retriever, HybridRetriever):
+        return None
+    return retriever.lexical_match(query, k=k, filter={"type": filter_type} if filter_type else None)
+
+def format_context(results: List[Document]) -> str:
+    """Numbered references for the prompt"""
     if not results:
         return "No relevant information found."
     
@@ -211,9 +408,18 @@ def get_relevant_context(query: str, insurance_type: str = None) -> str:
     
     return "\n".join(context_parts)
 
-# Initialize on import
-try:
-    initialize_knowledge_base()
-except Exception as e:
-    print(f"⚠️  Warning: Could not initialize knowledge base: {e}")
-    print("   Make sure GEMINI_API_KEY is set in .env file")
+def get_relevant_context(query: str, insurance_type: str = None,
+                         embedding: Optional[List[float]] = None) -> str:
+    """
+    Get relevant context for a query as a formatted string
+    
+    Args:
+        query: User's question
+        insurance_type: 'auto' or 'home' to filter results
+        embedding: Precomputed query embedding (skips the embedding call)
+    
+    Returns:
+        Formatted context string
+    """
+    results = search_knowledge(query, k=2, filter_type=insurance_type, embedding=embedding)
+    return format_context(results)
@@ -0,0 +1,372 @@
+"""
+Retriever backends for the knowledge base
+``chroma`` wraps the persistent Chroma store; ``numpy`` keeps the (small)
+knowledge base in one contiguous float32 matrix and answers exact top-k with a
+single matrix-vector product. Selected with ``RAG_BACKEND``. Either one can
+be wrapped by ``HybridRetriever`` (BM25 + vectors, ``RAG_HYBRID``).
+"""
+
+import os
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.documents import Document
+
+import metrics
+from lexical_index import BM25Index
+
+RETRIEVER_BACKENDS = ("chroma", "numpy")
+
+SEARCHES = metrics.counter("retrieval_searches_total",
+                           "Hybrid knowledge searches by path (lexical = no embedding call)", ["path"])
+
+
+class Retriever(ABC):
+    """Store documents and return the *k* most similar to a query."""
+
+    name = "base"
+    persistent = False  # contents survive a restart
+    version = 0  # bumped by every write (add, delete): keys the semantic caches
+
+    @abstractmethod
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None,
+                      embeddings: Optional[List[List[float]]] = None) -> None:
+        """Insert *documents*; one whose id already exists replaces it.
+
+        Precomputed *embeddings* (one per document) skip the embedding call.
+        """
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        """Remove the documents with these ids (unknown ids are ignored)."""
+
+    @abstractmethod
+    def get_documents(self, ids: List[str]) -> List[Optional[Document]]:
+        """Stored documents for *ids*, in that order (``None`` for unknown ids)."""
+
+    @abstractmethod
+    def delete_where(self, filter: Dict[str, str]) -> None:
+        """Remove documents whose metadata matches every item of *filter*
+        (e.g. rows written without ids)."""
+
+    @abstractmethod
+    def search(self, query: str, k: int = 3, filter: Optional[Dict[str, str]] = None,
+               embedding: Optional[List[float]] = None) -> List[Document]:
+        """Top-*k* documents for *query* (or its precomputed *embedding*),
+        restricted to those whose metadata matches every item of *filter*."""
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    def shared_stamp(self) -> str:
+        """Stamp that writes from other processes to the same store also
+        change (``""`` for stores only this process can write)."""
+        return ""
+
+
+class ChromaRetriever(Retriever):
+    """The persistent Chroma collection (opened lazily by *vectorstore*).
+
+    Every write also replaces the *stamp_path* file with a fresh token, so
+    other workers and ``python -m ingest`` runs sharing the collection see
+    the change in :meth:`shared_stamp`.
+    """
+
+    name = "chroma"
+    persistent = True
+
+    def __init__(self, vectorstore: Callable[[], object], stamp_path: Optional[str] = None):
+        self._vectorstore = vectorstore
+        self.stamp_path = stamp_path
+
+    def _written(self):
+        self.version += 1
+        if self.stamp_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.stamp_path)), exist_ok=True)
+            tmp = f"{self.stamp_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w") as f:
+                f.write(uuid.uuid4().hex)
+            os.replace(tmp, self.stamp_path)  # atomic: readers see the old or the new token
+
+    def shared_stamp(self) -> str:
+        if not self.stamp_path:
+            return ""
+        try:
+            with open(self.stamp_path) as f:
+                return f.read()
+        except FileNotFoundError:
+            return ""
+
+    def add_documents(self, documents, ids=None, embeddings=None):
+        if not documents:
+            return
+        vectorstore = self._vectorstore()
+        if embeddings is None:
+            vectorstore.add_documents(documents, ids=ids)
+        else:
+            vectorstore._collection.upsert(
+                ids=ids or [str(uuid.uuid4()) for _ in documents],
+                embeddings=embeddings,
+                documents=[d.page_content for d in documents],
+                metadatas=[d.metadata or None for d in documents],
+            )
+        self._written()
+
+    def delete(self, ids):
+        if ids:
+            self._vectorstore().delete(ids=list(ids))
+            self._written()
+
+    def get_documents(self, ids):
+        if not ids:
+            return []
+        found = self._vectorstore()._collection.get(ids=list(ids), include=["documents", "metadatas"])
+        by_id = {doc_id: Document(page_content=text, metadata=metadata or {})
+                 for doc_id, text, metadata in zip(found["ids"], found["documents"], found["metadatas"])}
+        return [by_id.get(doc_id) for doc_id in ids]
+
+    def delete_where(self, filter):
+        where = filter if len(filter) == 1 else {"$and": [{key: value} for key, value in filter.items()]}
+        self._vectorstore()._collection.delete(where=where)
+        self._written()
+
+    def search(self, query, k=3, filter=None, embedding=None):
+        vectorstore = self._vectorstore()
+        if embedding is not None:
+            return vectorstore.similarity_search_by_vector(embedding, k=k, filter=filter)
+        return vectorstore.similarity_search(query, k=k, filter=filter)
+
+    def count(self) -> int:
+        return self._vectorstore()._collection.count()
+
+
+class NumpyRetriever(Retriever):
+    """Exact cosine top-k over an in-memory matrix.
+
+    Rows are L2-normalised on insert, so a search is one ``matrix @ query``.
+    Metadata filters are boolean masks, built once per ``(key, value)`` and
+    dropped whenever documents change. A delete moves the last row into the
+    hole so rows stay contiguous.
+    """
+
+    name = "numpy"
+
+    def __init__(self, embeddings, initial_capacity: int = 64):
+        self.embeddings = embeddings
+        self._matrix: Optional[np.ndarray] = None  # (capacity, dim), rows [0, n) in use
+        self._documents: List[Document] = []
+        self._ids: List[Optional[str]] = []  # row → id
+        self._rows: Dict[str, int] = {}  # id → row
+        self._masks: Dict[Tuple[str, str], np.ndarray] = {}
+        self._capacity = initial_capacity
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalise(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def add_documents(self, documents, ids=None, embeddings=None):
+        if not documents:
+            return
+        if embeddings is None:
+            embeddings = self.embeddings.embed_documents([d.page_content for d in documents])
+        vectors = self._normalise(np.asarray(embeddings, dtype=np.float32))
+        ids = list(ids) if ids is not None else [None] * len(documents)
+        with self._lock:
+            n = len(self._documents)
+            if self._matrix is None:
+                self._matrix = np.empty((max(self._capacity, len(documents)), vectors.shape[1]), dtype=np.float32)
+            elif n + len(documents) > len(self._matrix):
+                grown = np.empty((max(2 * len(self._matrix), n + len(documents)), self._matrix.shape[1]),
+                                 dtype=np.float32)
+                grown[:n] = self._matrix[:n]
+                self._matrix = grown
+            for doc_id, document, vector in zip(ids, documents, vectors):
+                row = self._rows.get(doc_id) if doc_id is not None else None
+                if row is None:
+                    row = len(self._documents)
+                    self._documents.append(document)
+                    self._ids.append(doc_id)
+                    if doc_id is not None:
+                        self._rows[doc_id] = row
+                else:
+                    self._documents[row] = document
+                self._matrix[row] = vector
+            self._masks = {}
+            self.version += 1
+
+    def delete(self, ids):
+        with self._lock:
+            for doc_id in ids:
+                row = self._rows.get(doc_id)
+                if row is not None:
+                    self._delete_row(row)
+            self._masks = {}
+            self.version += 1
+
+    def get_documents(self, ids):
+        with self._lock:
+            return [self._documents[self._rows[doc_id]] if doc_id in self._rows else None for doc_id in ids]
+
+    def delete_where(self, filter):
+        with self._lock:
+            rows = np.flatnonzero(self._mask(filter, len(self._documents)))
+            for row in sorted(rows, reverse=True):  # highest first: moved rows are already checked
+                self._delete_row(int(row))
+            self._masks = {}
+            self.version += 1
+
+    def _delete_row(self, row: int):
+        if self._ids[row] is not None:
+            del self._rows[self._ids[row]]
+        last = len(self._documents) - 1
+        if row != last:
+            self._matrix[row] = self._matrix[last]
+            self._documents[row] = self._documents[last]
+            self._ids[row] = self._ids[last]
+            if self._ids[row] is not None:
+                self._rows[self._ids[row]] = row
+        self._documents.pop()
+        self._ids.pop()
+
+    def _mask(self, filter: Dict[str, str], n: int) -> np.ndarray:
+        mask = np.ones(n, dtype=bool)
+        for key, value in filter.items():
+            cached = self._masks.get((key, value))
+            if cached is None or len(cached) != n:
+                cached = np.fromiter((d.metadata.get(key) == value for d in self._documents[:n]), dtype=bool, count=n)
+                self._masks[(key, value)] = cached
+            mask &= cached
+        return mask
+
+    def search(self, query, k=3, filter=None, embedding=None):
+        if k <= 0 or not self._documents:
+            return []
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+        vector = self._normalise(np.asarray(embedding, dtype=np.float32))
+        with self._lock:
+            # Writers move and overwrite rows in place, so score under the
+            # lock; the scores, document list and mask are fresh objects
+            n = len(self._documents)
+            if n == 0:
+                return []
+            scores = self._matrix[:n] @ vector
+            documents = self._documents[:n]
+            mask = self._mask(filter, n) if filter else None
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+            k = min(k, int(mask.sum()))
+        k = min(k, n)
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [documents[i] for i in top]
+
+    def count(self) -> int:
+        return len(self._documents)
+
+
+@dataclass(frozen=True)
+class HybridConfig:
+    """``RAG_HYBRID`` (on/off), ``RAG_LEXICAL_CONFIDENCE`` and ``RAG_LEXICAL_MIN_SCORE``
+    (when both hold, BM25 answers alone and no query embedding is made) and
+    ``RAG_RRF_K`` (rank-fusion damping)."""
+
+    enabled: bool = True
+    lexical_confidence: float = 1.0
+    lexical_min_score: float = 1.0
+    rrf_k: int = 60
+
+    @classmethod
+    def from_env(cls) -> "HybridConfig":
+        load_dotenv()
+        return cls(
+            enabled=os.getenv("RAG_HYBRID", "on").lower() not in ("off", "no", "false", "0"),
+            lexical_confidence=float(os.getenv("RAG_LEXICAL_CONFIDENCE", "1.0")),
+            lexical_min_score=float(os.getenv("RAG_LEXICAL_MIN_SCORE", "1.0")),
+            rrf_k=int(os.getenv("RAG_RRF_K", "60")),
+        )
+
+
+class HybridRetriever(Retriever):
+    """BM25 + vector search over the same documents.
+
+    A confident exact-term match (every query term found in the top document,
+    with a high enough BM25 score) is answered from the inverted index alone;
+    otherwise both rankings are merged with reciprocal rank fusion.
+    """
+
+    name = "hybrid"
+
+    def __init__(self, dense: Retriever, config: HybridConfig = HybridConfig(), lexical: Optional[BM25Index] = None):
+        self.dense = dense
+        self.config = config
+        self.lexical = lexical or BM25Index()
+        self.persistent = dense.persistent
+
+    @property
+    def version(self) -> int:
+        return self.dense.version + self.lexical.version
+
+    def shared_stamp(self) -> str:
+        return self.dense.shared_stamp()
+
+    def add_documents(self, documents, ids=None, embeddings=None):
+        self.dense.add_documents(documents, ids=ids, embeddings=embeddings)
+        self.lexical.add(documents, ids=ids)
+
+    def delete(self, ids):
+        self.dense.delete(ids)
+        self.lexical.remove(ids)
+
+    def get_documents(self, ids):
+        return self.dense.get_documents(ids)
+
+    def delete_where(self, filter):
+        self.dense.delete_where(filter)
+        self.lexical.remove_where(filter)
+
+    def lexical_match(self, query: str, k: int = 3, filter: Optional[Dict[str, str]] = None) -> Optional[List[Document]]:
+        """BM25 results when they are confident enough to skip vector search, else ``None``."""
+        ranked, confidence = self.lexical.search(query, k=k, filter=filter)
+        if (ranked and confidence >= self.config.lexical_confidence
+                and ranked[0][1] >= self.config.lexical_min_score):
+            return [document for document, _ in ranked]
+        return None
+
+    def search(self, query, k=3, filter=None, embedding=None):
+        if embedding is None:
+            documents = self.lexical_match(query, k=k, filter=filter)
+            if documents is not None:
+                SEARCHES.inc(path="lexical")
+                return documents
+        depth = max(2 * k, 10)
+        lexical, _ = self.lexical.search(query, k=depth, filter=filter)
+        try:
+            dense = self.dense.search(query, k=depth, filter=filter, embedding=embedding)
+        except Exception:
+            if not lexical:
+                raise
+            SEARCHES.inc(path="lexical_fallback")  # vector store down: BM25 still answers
+            return [document for document, _ in lexical[:k]]
+        SEARCHES.inc(path="hybrid")
+        fused: Dict[str, float] = {}
+        by_content: Dict[str, Document] = {}
+        for ranking in ([d for d, _ in lexical], dense):
+            for rank, document in enumerate(ranking):
+                fused[document.page_content] = fused.get(document.page_content, 0.0) + 1 / (self.config.rrf_k + rank + 1)
+                by_content.setdefault(document.page_content, document)
+        top = sorted(fused, key=lambda content: -fused[content])[:k]
+        return [by_content[content] for content in top]
+
+    def count(self) -> int:
+        return self.dense.count()
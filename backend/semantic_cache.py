@@ -0,0 +1,163 @@
+"""
+Semantic cache for knowledge-base questions
+Keys entries on query embeddings so near-duplicate questions ("what is
+comprehensive coverage?" / "explain comprehensive coverage") share one retrieval.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+class SemanticCache:
+    """Embedding-keyed cache with a similarity threshold, TTL and LRU eviction.
+
+    Vectors live in one preallocated float32 matrix so a lookup is a single
+    matrix-vector product. Entries are scoped by *namespace* (e.g. the
+    ``filter_type`` used for retrieval) and by a knowledge *version*: when the
+    version passed to :meth:`lookup` / :meth:`store` changes, the cache is
+    flushed.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        ttl_seconds: float = 3600,
+        max_entries: int = 1000,
+        clock=time.monotonic,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None  # (max_entries, dim), unit rows
+        self._entries: "OrderedDict[int, dict]" = OrderedDict()  # slot -> entry, LRU order
+        self._free = list(range(max_entries - 1, -1, -1))
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> "SemanticCache":
+        return cls(
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+            ttl_seconds=float(os.getenv("SEMANTIC_CACHE_TTL", "3600")),
+            max_entries=int(os.getenv("SEMANTIC_CACHE_SIZE", "1000")),
+        )
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def lookup(self, embedding, namespace: str = "", version: Any = None):
+        """Return the cached value for the most similar entry, or ``None``."""
+        query = self._normalize(embedding)
+        with self._lock:
+            self._check_version(version)
+            if not self._entries or query.shape[0] != self._matrix.shape[1]:
+                self.misses += 1
+                return None
+            now = self._clock()
+            scores = self._matrix @ query
+            for slot in np.argsort(-scores):
+                slot = int(slot)
+                if scores[slot] < self.threshold:
+                    break
+                entry = self._entries.get(slot)
+                if entry is None or entry["namespace"] != namespace:
+                    continue
+                if entry["expires_at"] <= now:
+                    self._evict(slot)
+                    continue
+                self._entries.move_to_end(slot)
+                self.hits += 1
+                return entry["value"]
+            self.misses += 1
+            return None
+
+    def store(self, embedding, value, namespace: str = "", version: Any = None):
+        """Cache *value* under *embedding*, evicting the least recently used entry if full."""
+        vector = self._normalize(embedding)
+        with self._lock:
+            self._check_version(version)
+            if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+                self._reset(dim=vector.shape[0])
+            if not self._free:
+                self._evict(next(iter(self._entries)))
+            slot = self._free.pop()
+            self._matrix[slot] = vector
+            self._entries[slot] = {
+                "namespace": namespace,
+                "value": value,
+                "expires_at": self._clock() + self.ttl_seconds,
+            }
+
+    def invalidate(self):
+        """Drop every entry (e.g. after the knowledge base was re-ingested)."""
+        with self._lock:
+            self._reset(dim=None)
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals (caller holds the lock)
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._reset(dim=None)
+            self._version = version
+
+    def _reset(self, dim: Optional[int]):
+        self._matrix = np.zeros((self.max_entries, dim), dtype=np.float32) if dim else None
+        self._entries.clear()
+        self._free = list(range(self.max_entries - 1, -1, -1))
+
+    def _evict(self, slot: int):
+        self._entries.pop(slot, None)
+        self._matrix[slot] = 0.0
+        self._free.append(slot)
+        self.evictions += 1
+
+
+# ----------------------------------------------------------------------
+# Process-wide named caches ("context" for the direct path, "knowledge" for the graph)
+# ----------------------------------------------------------------------
+_caches: Dict[str, SemanticCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str) -> SemanticCache:
+    """Return the shared cache called *name*, configured from the environment."""
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = SemanticCache.from_env()
+        return _caches[name]
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit-rate metrics for every named cache."""
+    return {name: cache.stats() for name, cache in _caches.items()}
@@ -0,0 +1,744 @@
+# server.py – FastAPI app factory shared by every entry point
+#
+# ``create_app(config)`` builds the insurance-agent API. The routing mode picks
+# how ``/api/chat`` produces a reply:
+#
+#   * ``direct``    – one LangChain Gemini call (with RAG + semantic cache)
+#   * ``langgraph`` – the LangGraph workflow (the "brain"), falling back to direct
+#   * ``native``    – google.generativeai native function calling (gemini_agent)
+#
+# Pooled clients, the session store, caches, single-flight groups and
+# admission control are process-wide, so every mode (and every app built in
+# the same process) shares them.
+#
+# Usage examples:
+#   $env:APP_MODE="langgraph"  # or direct / native (USE_LANGGRAPH=yes still works)
+#   uvicorn main:app --host 0.0.0.0 --port 8000
+
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from fastapi import FastAPI, File, Form, HTTPException, Query, Request, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+import asyncio, json, os, time, uuid
+
+# ------------------------------------------------------------
+# Optional imports – may be missing in some environments
+# ------------------------------------------------------------
+try:
+    from langchain_core.messages import HumanMessage, AIMessage
+    from history import HistoryManager
+    HAS_LANGCHAIN = True
+except Exception:
+    HAS_LANGCHAIN = False
+
+try:
+    from langgraph_agent import get_agent_graph  # LangGraph workflow (compiled lazily)
+    HAS_LANGGRAPH = True
+except Exception:
+    HAS_LANGGRAPH = False
+
+try:
+    from gemini_agent import chat_with_agent, init_agent  # native function calling
+    HAS_NATIVE = True
+except Exception:
+    HAS_NATIVE = False
+
+try:
+    from rag_system import (embed_query, get_retriever, init_rag, knowledge_sync_report, knowledge_version,
+                            lexical_lookup, search_knowledge)
+    HAS_RAG = True
+except Exception:
+    HAS_RAG = False
+
+try:
+    from document_analyzer import analyze_insurance_document, generate_comparison_quote, init_analyzer
+    HAS_DOC_ANALYZER = True
+except Exception:
+    HAS_DOC_ANALYZER = False
+
+# Load .env (including GEMINI_API_KEY and optional APP_MODE / USE_LANGGRAPH)
+from dotenv import load_dotenv
+load_dotenv()
+
+from admission import AdmissionRejected, get_admission
+from intent_router import route
+from topic_guard import get_topic_guard
+from connections import Connection, get_hub
+from clients import DEFAULT_CHAT_MODEL, close_clients, get_clients, init_clients
+from session_store import get_session_store
+from concurrency import run_blocking, shutdown_executor
+from semantic_cache import cache_stats, get_cache
+from embedding_cache import embedding_cache_stats
+from singleflight import flight_stats, get_flight, normalize_key
+from warmup import WARMUP_QUERY, Warmup, WarmupStep
+import metrics
+
+# Per-stage latency of a chat turn and overall request latency (see /metrics)
+STAGE_SECONDS = metrics.histogram("chat_stage_seconds", "Time spent in each stage of a chat turn", ["stage"])
+REQUEST_SECONDS = metrics.histogram("http_request_seconds", "HTTP request latency", ["method", "path", "status"])
+
+MODES = ("direct", "langgraph", "native")
+
+# Bounded prompt window (HISTORY_TOKEN_BUDGET / HISTORY_KEEP_TURNS)
+history_manager = HistoryManager.from_env() if HAS_LANGCHAIN else None
+
+# ------------------------------------------------------------
+# Configuration
+# ------------------------------------------------------------
+@dataclass(frozen=True)
+class AppConfig:
+    """What differs between deployments; everything else is shared."""
+
+    mode: str = "direct"
+    model: str = DEFAULT_CHAT_MODEL
+    title: str = "Insurance Agent"
+    description: str = "FastAPI backend routing chat through a direct LLM call, the LangGraph brain or native Gemini function calling."
+    version: str = "2.0"
+    batch_max_items: int = 1000
+    batch_concurrency: int | None = None  # None → the admission concurrency limit
+
+    def __post_init__(self):
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown mode {self.mode!r} (expected one of {MODES})")
+
+    @classmethod
+    def from_env(cls, **overrides) -> "AppConfig":
+        """``APP_MODE`` (direct / langgraph / native); the legacy ``USE_LANGGRAPH=yes``
+        toggle still selects ``langgraph`` when ``APP_MODE`` is unset.
+        """
+        mode = os.getenv("APP_MODE")
+        if not mode:
+            mode = "langgraph" if os.getenv("USE_LANGGRAPH", "no").lower() == "yes" else "direct"
+        values = {"mode": mode.lower(), "model": os.getenv("CHAT_MODEL", DEFAULT_CHAT_MODEL)}
+        if os.getenv("BATCH_MAX_ITEMS"):
+            values["batch_max_items"] = int(os.getenv("BATCH_MAX_ITEMS"))
+        if os.getenv("BATCH_CONCURRENCY"):
+            values["batch_concurrency"] = int(os.getenv("BATCH_CONCURRENCY"))
+        values.update(overrides)
+        return cls(**values)
+
+    def effective_mode(self) -> str:
+        """The mode actually served – unavailable components fall back to ``direct``."""
+        if self.mode == "langgraph" and not HAS_LANGGRAPH:
+            return "direct"
+        if self.mode == "native" and not HAS_NATIVE:
+            return "direct"
+        return self.mode
+
+# ------------------------------------------------------------
+# Request / response models
+# ------------------------------------------------------------
+class ChatRequest(BaseModel):
+    message: str
+    session_id: str | None = None
+
+class ChatResponse(BaseModel):
+    response: str
+    session_id: str
+    agent_state: dict | None = None
+
+class BatchChatRequest(BaseModel):
+    items: list[ChatRequest]
+
+# ------------------------------------------------------------
+# System prompt for the direct LLM path
+# ------------------------------------------------------------
+SYSTEM_INSTRUCTION = """You are an expert insurance agent powered by AI. Your role is to:\n\n1. **Understand Customer Needs**: Determine if they need auto or home insurance\n2. **Gather Information**: Ask relevant questions to collect necessary details\n3. **Use Your Knowledge**: Search your knowledge base when users ask questions\n4. **Calculate Quotes**: When you have enough info, calculate accurate premiums\n5. **Explain Clearly**: Break down how premiums are calculated and why\n\nFor AUTO insurance, you need:\n- Age, vehicle year/make/model, years licensed, accidents, violations\n\nFor HOME insurance, you need:\n- Year built, square footage, construction type, dwelling coverage\n\n**CRITICAL GUIDELINES:**\n- **STRICTLY LIMIT** your responses to insurance topics.\n- If asked about other topics (sports, coding, poetry, general knowledge, etc.), politely refuse: \"I can only assist with insurance-related inquiries.\"\n- Be conversational and friendly\n- Ask 1-2 questions at a time (don't overwhelm)\n- When users ask \"what is\" or \"explain\" questions, use your knowledge base.\n- When you have enough info, calculate the quote.\n- Explain the breakdown clearly.\n- Suggest ways to save money if appropriate.\n\nBe transparent about your reasoning and help them make informed decisions."""
+
+# ------------------------------------------------------------
+# Turn helpers – shared by every mode and by /api/chat and /api/chat/stream
+# ------------------------------------------------------------
+@STAGE_SECONDS.timed(stage="session_lookup")
+async def open_session(sessions, request: ChatRequest):
+    """Resolve (or create) the session and record the user's message."""
+    session_id = request.session_id or str(uuid.uuid4())
+    # Store calls block (SQLite waits up to 30 s on a locked database)
+    session = await run_blocking(sessions.get, session_id)
+    if session is None:
+        session = new_session()
+        await run_blocking(sessions.put, session_id, session)
+    session["messages"].append(HumanMessage(content=request.message))
+    return session_id, session
+
+def off_topic_refusal(session: dict, message: str, path: str):
+    """The topic guard's refusal for an opening message, else ``None``.
+
+    Once the conversation is under way (an insurance line picked or earlier
+    turns) answers like "I cook for a living" belong to the quote.
+    """
+    if session.get("insurance_type") or len(session["messages"]) > 1 or session.get("summarized_count"):
+        return None
+    return get_topic_guard().refusal_for(message, path=path)
+
+def new_session() -> dict:
+    return {
+        "messages": [],
+        "user_info": {},
+        "insurance_type": None,
+        "quote_result": None,
+        "knowledge_context": "",
+        "next_action": "gather_info",
+        "history_summary": "",
+        "summarized_count": 0,
+    }
+
+def graph_state(session: dict) -> dict:
+    """Build the AgentState expected by the graph from the session."""
+    return {
+        "messages": session["messages"],
+        "user_info": session["user_info"],
+        "insurance_type": session["insurance_type"],
+        "quote_result": session["quote_result"],
+        "knowledge_context": session["knowledge_context"],
+        "next_action": session["next_action"],
+    }
+
+def apply_graph_state(session: dict, final_state: dict) -> str:
+    """Copy the graph's changes back into the session and return its reply."""
+    session.update({
+        "messages": final_state.get("messages", session["messages"]),
+        "user_info": final_state.get("user_info", session["user_info"]),
+        "insurance_type": final_state.get("insurance_type", session["insurance_type"]),
+        "quote_result": final_state.get("quote_result", session["quote_result"]),
+        "knowledge_context": final_state.get("knowledge_context", session["knowledge_context"]),
+        "next_action": final_state.get("next_action", session["next_action"]),
+    })
+    return final_state.get("agent_response", "[No response from LangGraph]")
+
+@STAGE_SECONDS.timed(stage="keyword_routing")
+def knowledge_route(message: str):
+    """Return ``(needs_rag, filter_type)`` for a user message."""
+    intent = route(message)
+    if not intent.needs_rag:
+        return False, None
+    return True, intent.insurance_type
+
+async def retrieve_context(message: str, filter_type):
+    """Knowledge-base passages for *message*, through the semantic context cache.
+
+    The cache holds retrieved knowledge only – never a reply, which depends on
+    the session's history, pinned facts and quote – so a near-duplicate
+    question from any session can safely reuse it. Exact-term lookups come
+    from the inverted index without an embedding. Returns ``None`` when
+    nothing relevant was found.
+    """
+    with STAGE_SECONDS.time(stage="lexical_lookup"):
+        documents = await run_blocking(lexical_lookup, message, 2, filter_type)
+    if documents is not None:
+        return "\n\n".join(doc.page_content for doc in documents)
+    with STAGE_SECONDS.time(stage="embed_query"):
+        embedding = await run_blocking(embed_query, message)
+    namespace, version = filter_type or "", knowledge_version()
+    cache = get_cache("context")
+    with STAGE_SECONDS.time(stage="semantic_cache"):
+        context = cache.lookup(embedding, namespace=namespace, version=version)
+    if context is None:
+        # Chroma has no async API – offload to the bounded pool
+        with STAGE_SECONDS.time(stage="search_knowledge"):
+            results = await run_blocking(search_knowledge, message, k=2, filter_type=filter_type, embedding=embedding)
+        context = "\n\n".join(doc.page_content for doc in results)
+        cache.store(embedding, context, namespace=namespace, version=version)
+    return context or None
+
+@STAGE_SECONDS.timed(stage="llm_invoke")
+async def invoke_llm(llm, messages, model: str = DEFAULT_CHAT_MODEL):
+    """``llm.ainvoke`` with identical in-flight prompts coalesced into one call.
+
+    Only the leader of a coalesced group takes an admission slot.
+    """
+    async def call():
+        async with get_admission().slot(model):
+            return await llm.ainvoke(messages)
+
+    key = normalize_key(getattr(llm, "model", model), *(f"{m.type}:{m.content}" for m in messages))
+    return await get_flight("llm").do(key, call)
+
+async def build_llm_messages(session: dict, message: str):
+    """Bounded prompt (system prompt, pinned facts, summary, recent turns) plus
+    knowledge-base context when the user asks a question.
+
+    Returns ``(messages, prompt_stats)``.
+    """
+    knowledge = []
+    # Optional RAG before LLM call
+    needs_rag, filter_type = knowledge_route(message)
+    if HAS_RAG and needs_rag:
+        try:
+            context = await retrieve_context(message, filter_type)
+            if context:
+                session["knowledge_context"] = context
+                knowledge.append(HumanMessage(content=f"**Relevant Knowledge Base Info:**\n{context}\n\nPlease use this information to answer the user's question accurately."))
+        except Exception:
+            pass  # ignore RAG failures
+    with STAGE_SECONDS.time(stage="prompt_build"):
+        return history_manager.build(SYSTEM_INSTRUCTION, session, extra=knowledge)
+
+async def direct_reply(llm, session: dict, message: str, model: str):
+    """Direct path: one (coalesced, admitted) Gemini call.
+
+    Returns ``(response_text, prompt_stats)``.
+    """
+    messages, prompt_stats = await build_llm_messages(session, message)
+    # Call Gemini without blocking the event loop
+    response = await invoke_llm(llm, messages, model)
+    return response.content, prompt_stats
+
+async def native_reply(session_id: str, message: str) -> str:
+    """Native path: gemini_agent drives function calling on a worker thread."""
+    with STAGE_SECONDS.time(stage="native_chat"):
+        return await run_blocking(chat_with_agent, message, session_id)
+
+def session_state(session: dict) -> dict:
+    """The agent_state summary sent to clients."""
+    return {
+        "insurance_type": session.get("insurance_type"),
+        "has_quote": session.get("quote_result") is not None,
+        "message_count": len(session["messages"]),
+    }
+
+def finish_turn(session: dict, message: str, response_text: str, prompt_stats=None) -> dict:
+    """Store the assistant reply, update extracted facts and return the agent_state summary."""
+    session["messages"].append(AIMessage(content=response_text))
+    # Insurance-type extraction (the routed type sticks until the user switches)
+    insurance_type = route(message).insurance_type
+    if insurance_type:
+        session["insurance_type"] = insurance_type
+    agent_state = session_state(session)
+    if prompt_stats is not None:
+        agent_state["prompt_tokens"] = prompt_stats.tokens
+        agent_state["summarized_messages"] = prompt_stats.summarized_messages
+    return agent_state
+
+async def chat_turn(config: AppConfig, sessions, request: ChatRequest) -> ChatResponse:
+    """One chat turn through the configured mode (``/api/chat`` and each batch item)."""
+    # Basic component checks
+    if not HAS_LANGCHAIN:
+        return ChatResponse(
+            response="Sorry, the AI system is not properly configured. Please contact support.",
+            session_id=str(uuid.uuid4()),
+        )
+    # Shared Gemini LLM – pooled by the client registry
+    llm = get_clients().chat_model(config.model)
+    if not llm:
+        return ChatResponse(
+            response="Sorry, the AI model is not available. Please ensure GEMINI_API_KEY is set.",
+            session_id=str(uuid.uuid4()),
+        )
+
+    session_id, session = await open_session(sessions, request)
+    mode = config.effective_mode()
+    prompt_stats = None
+
+    # Path 0 – clearly off-topic: the canned refusal, no LLM call
+    response_text = off_topic_refusal(session, request.message, mode)
+
+    # Path 1 – LangGraph
+    if response_text is None and mode == "langgraph":
+        try:
+            with STAGE_SECONDS.time(stage="graph_invoke"):
+                final_state = await get_agent_graph().ainvoke(graph_state(session))
+            response_text = apply_graph_state(session, final_state)
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            # If the graph fails, fall back to the direct LLM path
+            print(f"⚠️ LangGraph error: {e}. Falling back to direct LLM.")
+
+    # Path 2 – native Gemini function calling
+    elif response_text is None and mode == "native":
+        response_text = await native_reply(session_id, request.message)
+
+    # Path 3 – direct LLM (also used on fallback)
+    if response_text is None:
+        response_text, prompt_stats = await direct_reply(llm, session, request.message, config.model)
+
+    agent_state = finish_turn(session, request.message, response_text, prompt_stats)
+    # Re-account the session's size in the store
+    with STAGE_SECONDS.time(stage="session_save"):
+        await run_blocking(sessions.put, session_id, session)
+    return ChatResponse(response=response_text, session_id=session_id, agent_state=agent_state)
+
+async def chat_batch_results(config: AppConfig, sessions, items: list[ChatRequest]):
+    """Run *items* concurrently and yield one result dict per item as it finishes.
+
+    Items sharing a ``session_id`` run strictly in order on one worker; once a
+    turn fails the rest of that session is skipped. At most
+    ``config.batch_concurrency`` sessions (default: the admission concurrency
+    limit) are in flight, so a large batch queues here rather than being shed
+    by admission control.
+    """
+    by_session: dict[str, list] = {}
+    for index, item in enumerate(items):
+        session_id = item.session_id or str(uuid.uuid4())
+        by_session.setdefault(session_id, []).append((index, item.message))
+
+    limit = asyncio.Semaphore(config.batch_concurrency or get_admission().max_concurrency)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def run_session(session_id: str, turns: list):
+        async with limit:
+            failed = None
+            for index, message in turns:
+                result = {"index": index, "session_id": session_id}
+                if failed is not None:
+                    result.update(status="skipped", error=f"earlier turn {failed} failed")
+                    results.put_nowait(result)
+                    continue
+                try:
+                    reply = await chat_turn(config, sessions, ChatRequest(message=message, session_id=session_id))
+                    result.update(status="ok", response=reply.response, agent_state=reply.agent_state)
+                except AdmissionRejected as e:
+                    failed = index
+                    result.update(status="error", error=str(e), status_code=e.status_code, retry_after=e.retry_after)
+                except Exception as e:
+                    failed = index
+                    result.update(status="error", error=str(e), status_code=500)
+                results.put_nowait(result)
+
+    workers = [asyncio.create_task(run_session(sid, turns)) for sid, turns in by_session.items()]
+    try:
+        for _ in range(len(items)):
+            yield await results.get()
+    finally:
+        # Client went away (or we are done) – stop whatever is still running
+        for worker in workers:
+            worker.cancel()
+
+async def stream_turn(config: AppConfig, sessions, session_id: str, session: dict, message: str, llm):
+    """One turn as ``(event, data)`` pairs for the streaming transports (SSE, WebSocket).
+
+    Events: ``node`` (LangGraph progress), ``token`` (reply text as it is
+    generated), ``done`` (full reply + agent_state) or ``error``.
+    *message* must already be in the session (see :func:`open_session`).
+    """
+    mode = config.effective_mode()
+    prompt_stats = None
+
+    # Path 0 – clearly off-topic: the canned refusal, no LLM call
+    response_text = off_topic_refusal(session, message, mode)
+    if response_text is not None:
+        yield "token", {"text": response_text}
+
+    try:
+        # Path 1 – LangGraph: report node progress, then the graph's reply
+        if response_text is None and mode == "langgraph":
+            try:
+                final_state = None
+                with STAGE_SECONDS.time(stage="graph_stream"):
+                    async for stream_mode, chunk in get_agent_graph().astream(graph_state(session), stream_mode=["updates", "values"]):
+                        if stream_mode == "updates":
+                            for node in chunk:
+                                yield "node", {"node": node}
+                        else:
+                            final_state = chunk
+                response_text = apply_graph_state(session, final_state or {})
+                yield "token", {"text": response_text}
+            except AdmissionRejected:
+                raise  # honour the 429 / 503 decision instead of falling back
+            except Exception as e:
+                response_text = None
+                yield "node", {"node": "fallback", "error": str(e)}
+
+        # Path 2 – native function calling has no token stream: one chunk
+        if response_text is None and mode == "native":
+            response_text = await native_reply(session_id, message)
+            yield "token", {"text": response_text}
+
+        # Path 3 – direct LLM, token by token
+        if response_text is None:
+            messages, prompt_stats = await build_llm_messages(session, message)
+            parts = []
+            async with get_admission().slot(config.model):
+                with STAGE_SECONDS.time(stage="llm_stream"):
+                    async for chunk in llm.astream(messages):
+                        if chunk.content:
+                            parts.append(chunk.content)
+                            yield "token", {"text": chunk.content}
+            response_text = "".join(parts)
+    except AdmissionRejected as e:
+        # The stream has already started – report the rejection in-band
+        yield "error", {"message": str(e), "status": e.status_code, "retry_after": e.retry_after}
+        return
+    except Exception as e:
+        yield "error", {"message": str(e)}
+        return
+
+    agent_state = finish_turn(session, message, response_text, prompt_stats)
+    with STAGE_SECONDS.time(stage="session_save"):
+        await run_blocking(sessions.put, session_id, session)
+    yield "done", {"response": response_text, "session_id": session_id, "agent_state": agent_state}
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# ------------------------------------------------------------
+# Warm-up – pay the cold-start costs before /ready goes green
+# ------------------------------------------------------------
+def prime_clients(config: AppConfig):
+    """Build the shared handles and open the chat model's connection with a
+    token-count request (the ``embed_query`` step opens the embedding one)."""
+    registry = init_clients()
+    registry.prime(config.model)
+    if HAS_RAG:
+        registry.embeddings()
+
+def warmup_steps(config: AppConfig) -> list:
+    """The warm-up steps *config* needs; the served mode's agent is required."""
+    steps = [WarmupStep("clients", lambda: prime_clients(config), required=True)]
+    if HAS_RAG:
+        steps += [
+            WarmupStep("retriever", get_retriever),
+            WarmupStep("knowledge_base", init_rag),
+            WarmupStep("embed_query", lambda: embed_query(WARMUP_QUERY)),
+            WarmupStep("search_knowledge", lambda: search_knowledge(WARMUP_QUERY, k=1)),
+        ]
+    mode = config.effective_mode()
+    if mode == "langgraph":
+        steps.append(WarmupStep("agent_graph", get_agent_graph, required=True))
+    elif mode == "native":
+        steps.append(WarmupStep("native_agent", init_agent, required=True))
+    if HAS_DOC_ANALYZER:
+        steps.append(WarmupStep("document_analyzer", init_analyzer))
+    return steps
+
+# ------------------------------------------------------------
+# Lifespan – shared clients, then warm-up in the background
+# ------------------------------------------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_clients()
+    # Liveness (/health) answers straight away; /ready waits for this task
+    warmup_task = asyncio.create_task(run_blocking(app.state.warmup.run))
+    yield
+    warmup_task.cancel()
+    close_clients()
+    shutdown_executor()
+
+# ------------------------------------------------------------
+# App factory
+# ------------------------------------------------------------
+def create_app(config: AppConfig | None = None) -> FastAPI:
+    """Build the API for *config* (defaults to :meth:`AppConfig.from_env`)."""
+    config = config or AppConfig.from_env()
+    sessions = get_session_store()
+
+    app = FastAPI(title=config.title, description=config.description, version=config.version, lifespan=lifespan)
+    app.state.config = config
+    app.state.sessions = sessions
+    app.state.warmup = warmup = Warmup(warmup_steps(config))
+    hub = get_hub()
+
+    # CORS – same as original app
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Request latency for every endpoint
+    @app.middleware("http")
+    async def record_request_latency(request: Request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        # Label with the route template, never the raw URL: 404s, scanner
+        # probes and path parameters would each add a series
+        route = request.scope.get("route")
+        REQUEST_SECONDS.observe(time.perf_counter() - start, method=request.method,
+                                path=getattr(route, "path_format", "unmatched"), status=response.status_code)
+        return response
+
+    # Upstream saturated – shed load with a Retry-After hint instead of queueing forever
+    @app.exception_handler(AdmissionRejected)
+    async def admission_rejected(request: Request, exc: AdmissionRejected):
+        return JSONResponse(
+            status_code=exc.status_code,
+            content={"detail": str(exc), "reason": exc.reason},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
+    # --------------------------------------------------------
+    # /api/chat – one turn through the configured mode
+    # --------------------------------------------------------
+    @app.post("/api/chat", response_model=ChatResponse)
+    async def chat(request: ChatRequest):
+        return await chat_turn(config, sessions, request)
+
+    # --------------------------------------------------------
+    # /api/chat/batch – many turns in one call, streamed back as NDJSON
+    #
+    # One line per item as it finishes (``index``, ``session_id``, ``status``
+    # ok / error / skipped, ``response`` and ``agent_state``), then a final
+    # ``{"done": true, ...}`` summary line.
+    # --------------------------------------------------------
+    @app.post("/api/chat/batch")
+    async def chat_batch(request: BatchChatRequest):
+        if not request.items:
+            raise HTTPException(status_code=400, detail="Batch has no items")
+        if len(request.items) > config.batch_max_items:
+            raise HTTPException(status_code=413,
+                                detail=f"Batch has {len(request.items)} items (max {config.batch_max_items})")
+
+        async def lines():
+            start = time.perf_counter()
+            counts = {"ok": 0, "error": 0, "skipped": 0}
+            async for result in chat_batch_results(config, sessions, request.items):
+                counts[result["status"]] += 1
+                yield json.dumps(result) + "\n"
+            yield json.dumps({"done": True, "items": len(request.items), **counts,
+                              "seconds": round(time.perf_counter() - start, 3)}) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    # --------------------------------------------------------
+    # /api/chat/stream – same turn, delivered as server-sent events
+    #
+    # Events: ``session`` (id), ``node`` (LangGraph progress), ``token`` (reply
+    # text as it is generated), ``done`` (full reply + agent_state) or ``error``.
+    # --------------------------------------------------------
+    @app.post("/api/chat/stream")
+    async def chat_stream(request: ChatRequest):
+        if not HAS_LANGCHAIN:
+            raise HTTPException(status_code=503, detail="LangChain not available")
+        llm = get_clients().chat_model(config.model)
+        session_id, session = await open_session(sessions, request)
+
+        async def events():
+            yield sse_event("session", {"session_id": session_id})
+            async for event, data in stream_turn(config, sessions, session_id, session, request.message, llm):
+                yield sse_event(event, data)
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    # --------------------------------------------------------
+    # /ws/chat – one session bound to the connection, events as JSON
+    #
+    # Connect with ``?session_id=`` to resume a session after a reconnect.
+    # Client → server: ``{"type": "message", "message": ...}`` (or plain
+    # text) and ``{"type": "ping"}``. Server → client: ``session`` (id,
+    # resumed flag, agent_state, last reply), the turn events of
+    # /api/chat/stream (``node``, ``token``, ``done``, ``error``), ``pong``
+    # and server-initiated ``quote_ready``.
+    # --------------------------------------------------------
+    @app.websocket("/ws/chat")
+    async def chat_ws(websocket: WebSocket, session_id: str | None = None):
+        await websocket.accept()
+        if not HAS_LANGCHAIN:
+            await websocket.send_json({"type": "error", "message": "LangChain not available"})
+            await websocket.close(code=1011)
+            return
+
+        session_id = session_id or str(uuid.uuid4())
+        session = await run_blocking(sessions.get, session_id)
+        resumed = session is not None
+        if session is None:
+            session = new_session()
+            await run_blocking(sessions.put, session_id, session)
+        connection = Connection(websocket, session_id)
+        hub.register(connection)
+        try:
+            last_reply = next((m.content for m in reversed(session["messages"]) if isinstance(m, AIMessage)), None)
+            await connection.send("session", {"session_id": session_id, "resumed": resumed,
+                                              "agent_state": session_state(session), "last_response": last_reply})
+            while True:
+                raw = await websocket.receive_text()
+                try:
+                    payload = json.loads(raw)
+                except ValueError:
+                    payload = {"type": "message", "message": raw}
+                if not isinstance(payload, dict):
+                    payload = {"type": "message", "message": str(payload)}
+                if payload.get("type") == "ping":
+                    await connection.send("pong")
+                    continue
+                message = str(payload.get("message") or "").strip()
+                if payload.get("type", "message") != "message" or not message:
+                    await connection.send("error", {"message": 'Expected {"type": "message", "message": "..."}'})
+                    continue
+
+                # Re-read per turn: /api/chat, /api/reset or another worker
+                # may have changed the session since the last message
+                session = await run_blocking(sessions.get, session_id) or new_session()
+                quote_before = session.get("quote_result")
+                session["messages"].append(HumanMessage(content=message))
+                llm = get_clients().chat_model(config.model)
+                async for event, data in stream_turn(config, sessions, session_id, session, message, llm):
+                    await connection.send(event, data)
+                if session.get("quote_result") and session["quote_result"] != quote_before:
+                    await hub.push(session_id, "quote_ready", {"source": "chat", "quote": session["quote_result"]})
+        except WebSocketDisconnect:
+            pass  # the session stays in the store – reconnect with ?session_id= to resume
+        finally:
+            hub.unregister(connection)
+
+    # --------------------------------------------------------
+    # /api/analyze-quote – extract an uploaded policy and quote against it
+    # --------------------------------------------------------
+    @app.post("/api/analyze-quote")
+    async def analyze_quote(file: UploadFile = File(...), session_id: str | None = Form(None),
+                            query_session_id: str | None = Query(None, alias="session_id")):
+        if not HAS_DOC_ANALYZER:
+            raise HTTPException(status_code=503, detail="Document analysis not available")
+        content = await file.read()
+        # The Gemini SDK call blocks – run it on the bounded pool
+        with STAGE_SECONDS.time(stage="document_analysis"):
+            analysis = await run_blocking(analyze_insurance_document, content, file.content_type or "")
+        if not analysis.get("success"):
+            return analysis
+        comparison = generate_comparison_quote(analysis["extracted_data"])
+        session_id = session_id or query_session_id
+        if session_id:
+            # Also tell any open /ws/chat connection of this session
+            await get_hub().push(session_id, "quote_ready", {"source": "document", "quote": comparison})
+        return {
+            **analysis,
+            "comparison_quote": comparison,
+        }
+
+    # --------------------------------------------------------
+    # Additional utility endpoints (reset, health, etc.)
+    # --------------------------------------------------------
+    @app.post("/api/reset")
+    async def reset_session(session_id: str):
+        await run_blocking(sessions.delete, session_id)
+        return {"message": "Session reset successfully"}
+
+    @app.get("/health")
+    def health_check():
+        return {
+            "status": "healthy",
+            "warmup": warmup.state,
+            "llm": config.model,
+            "mode": config.mode,
+            "orchestration": config.effective_mode(),
+            "sessions": len(sessions),
+            "session_store": sessions.stats(),
+            "clients": get_clients().stats(),
+            "semantic_cache": cache_stats(),
+            "embedding_cache": embedding_cache_stats(),
+            "knowledge_base": knowledge_sync_report() if HAS_RAG else {},
+            "singleflight": flight_stats(),
+            "admission": get_admission().stats(),
+            "topic_guard": get_topic_guard().stats(),
+            "websocket": hub.stats(),
+        }
+
+    @app.get("/ready")
+    def readiness_check():
+        """Readiness probe: 503 until warm-up has finished, with per-step timings."""
+        return JSONResponse(warmup.status(), status_code=200 if warmup.ready else 503)
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics_endpoint():
+        """Prometheus text exposition of the in-process metrics."""
+        return PlainTextResponse(metrics.render_latest(), media_type=metrics.CONTENT_TYPE)
+
+    return app
@@ -0,0 +1,481 @@
+"""
+Session storage for the chat entry points
+Replaces the module-level ``sessions = {}`` dicts with a bounded store:
+idle TTL, LRU eviction and a hard entry / byte cap – or a durable SQLite
+backend shared by every uvicorn worker.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import metrics
+
+SESSION_WRITE_CONFLICTS = metrics.counter(
+    "session_write_conflicts_total", "SQLite session writes merged after a concurrent turn saved first")
+
+EvictionCallback = Callable[[str, Any, str], None]
+
+
+def estimate_size(obj: Any, _depth: int = 0) -> int:
+    """Approximate memory footprint of a session (bytes).
+
+    Walks dicts / lists and LangChain messages (anything with ``content``);
+    other objects count as their shallow ``sys.getsizeof``.
+    """
+    if _depth > 6:
+        return sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes)):
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(estimate_size(v, _depth + 1) for v in obj)
+    content = getattr(obj, "content", None)
+    if isinstance(content, str):
+        return sys.getsizeof(obj) + sys.getsizeof(content)
+    return sys.getsizeof(obj)
+
+
+class SessionStore(ABC):
+    """Interface shared by every session backend.
+
+    Sessions are plain dicts. Callers mutate the dict returned by :meth:`get`
+    and then call :meth:`put` so the backend can re-account (or persist) it.
+    """
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Any]:
+        """Return the session or ``None`` if missing / expired."""
+
+    @abstractmethod
+    def put(self, session_id: str, session: Any) -> None:
+        """Insert or update a session."""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Remove a session; return ``True`` if it existed."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Size / eviction statistics (reported on ``/health``)."""
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def get_or_create(self, session_id: str, factory: Callable[[], Any]) -> Any:
+        session = self.get(session_id)
+        if session is None:
+            session = factory()
+            self.put(session_id, session)
+        return session
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store with idle TTL, LRU order and entry / byte caps.
+
+    Entries are kept in access order, so expired sessions are always at the
+    front and are swept lazily on every call. When a cap is exceeded the least
+    recently used sessions are evicted. ``on_evict(session_id, session, reason)``
+    is called for ``"ttl"`` and ``"capacity"`` evictions, not for :meth:`delete`.
+    ``size_of`` measures an entry for the byte cap (default :func:`estimate_size`).
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = 3600,
+        max_entries: Optional[int] = 10000,
+        max_bytes: Optional[int] = 256 * 1024 * 1024,
+        on_evict: Optional[EvictionCallback] = None,
+        clock=time.monotonic,
+        size_of: Callable[[Any], int] = estimate_size,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self._size_of = size_of
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[str, list]" = OrderedDict()  # id -> [session, size, last_access]
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {"ttl": 0, "capacity": 0}
+
+    @classmethod
+    def from_env(cls, on_evict: Optional[EvictionCallback] = None,
+                 size_of: Callable[[Any], int] = estimate_size) -> "InMemorySessionStore":
+        return cls(
+            ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", "3600")) or None,
+            max_entries=int(os.getenv("SESSION_MAX_ENTRIES", "10000")) or None,
+            max_bytes=int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024 * 1024))) or None,
+            on_evict=on_evict,
+            size_of=size_of,
+        )
+
+    def get(self, session_id: str) -> Optional[Any]:
+        with self._lock:
+            self._sweep()
+            entry = self._entries.get(session_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry[2] = self._clock()
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, session_id: str, session: Any) -> None:
+        size = self._size_of(session)
+        with self._lock:
+            old = self._entries.pop(session_id, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[session_id] = [session, size, self._clock()]
+            self._bytes += size
+            self._sweep()
+            self._enforce_caps(keep=session_id)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            if entry is None:
+                return False
+            self._bytes -= entry[1]
+            return True
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sweep()
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._sweep()
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": dict(self.evictions),
+            }
+
+    # ------------------------------------------------------------------
+    # Internals (caller holds the lock)
+    # ------------------------------------------------------------------
+    def _sweep(self):
+        if not self.ttl_seconds:
+            return
+        deadline = self._clock() - self.ttl_seconds
+        while self._entries:
+            session_id, entry = next(iter(self._entries.items()))
+            if entry[2] > deadline:
+                break
+            self._evict(session_id, "ttl")
+
+    def _enforce_caps(self, keep: str):
+        def over():
+            return (self.max_entries is not None and len(self._entries) > self.max_entries) or \
+                   (self.max_bytes is not None and self._bytes > self.max_bytes)
+
+        while over() and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                break
+            self._evict(oldest, "capacity")
+
+    def _evict(self, session_id: str, reason: str):
+        session, size, _ = self._entries.pop(session_id)
+        self._bytes -= size
+        self.evictions[reason] += 1
+        if self.on_evict is not None:
+            try:
+                self.on_evict(session_id, session, reason)
+            except Exception as e:
+                print(f"⚠️  Session eviction callback failed: {e}")
+
+
+class SQLiteSessionStore(SessionStore):
+    """Durable store in a SQLite database (WAL mode).
+
+    Several worker processes can share one file. Messages are stored one row
+    per message as ``(role, content)``, where role is ``h``/``a``/``s``;
+    other message types (tool results, AI tool calls) are stored whole as
+    role ``x`` with LangChain's dict form.
+    :meth:`put` only appends the messages added since the last write and
+    rewrites the small non-message state (``user_info``, ``quote_result``, ...)
+    as compact JSON. Sessions idle for longer than ``ttl_seconds`` are purged
+    in batches every ``purge_every`` writes.
+
+    Each row carries a version. A session dict remembers the version and
+    message count it was loaded at; when another writer saved the session in
+    between, :meth:`put` appends this writer's new messages after theirs
+    (the non-message state is last-writer-wins) and reloads the dict's
+    messages, so concurrent turns never drop each other's messages.
+    """
+
+    _ROLES = {"human": "h", "ai": "a", "system": "s"}
+    _LOADED = "_loaded"  # session key: [version, message_count] at load time
+
+    def __init__(
+        self,
+        path: str = "./sessions.db",
+        ttl_seconds: Optional[float] = 3600,
+        on_evict: Optional[EvictionCallback] = None,
+        purge_every: int = 1000,
+        clock=time.time,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+        self.purge_every = purge_every
+        self._clock = clock
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {"ttl": 0}
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    message_count INTEGER NOT NULL,
+                    updated_at REAL NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions(updated_at);
+                CREATE TABLE IF NOT EXISTS messages (
+                    session_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    PRIMARY KEY (session_id, seq)
+                ) WITHOUT ROWID;
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+            if "version" not in columns:  # databases created before versioned writes
+                conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    @classmethod
+    def from_env(cls, on_evict: Optional[EvictionCallback] = None) -> "SQLiteSessionStore":
+        return cls(
+            path=os.getenv("SESSION_DB_PATH", "./sessions.db"),
+            ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", "3600")) or None,
+            on_evict=on_evict,
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread (event loop thread + blocking pool)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+    @classmethod
+    def _encode_message(cls, message) -> tuple:
+        role = cls._ROLES.get(getattr(message, "type", None))
+        if role is None or getattr(message, "tool_calls", None):
+            # Tool messages, AI tool calls, ...: LangChain's full dict form
+            from langchain_core.messages import messages_to_dict
+
+            return "x", json.dumps(messages_to_dict([message])[0], separators=(",", ":"), default=str)
+        content = message.content
+        if not isinstance(content, str):
+            return role + "j", json.dumps(content, separators=(",", ":"))
+        return role, content
+
+    @staticmethod
+    def _decode_message(role: str, content: str):
+        from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, messages_from_dict
+
+        if role == "x":
+            return messages_from_dict([json.loads(content)])[0]
+        if role.endswith("j"):
+            role, content = role[:-1], json.loads(content)
+        cls = {"a": AIMessage, "s": SystemMessage}.get(role, HumanMessage)
+        return cls(content=content)
+
+    # ------------------------------------------------------------------
+    # SessionStore API
+    # ------------------------------------------------------------------
+    def get(self, session_id: str) -> Optional[Any]:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT state, updated_at, version FROM sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        if row is None or self._expired(row[1]):
+            self.misses += 1
+            return None
+        session = json.loads(row[0])
+        session["messages"] = self._load_messages(conn, session_id)
+        session[self._LOADED] = [row[2], len(session["messages"])]
+        self.hits += 1
+        return session
+
+    def _load_messages(self, conn: sqlite3.Connection, session_id: str) -> list:
+        return [
+            self._decode_message(role, content)
+            for role, content in conn.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            )
+        ]
+
+    def put(self, session_id: str, session: Any) -> None:
+        messages = session.get("messages", [])
+        state = json.dumps(
+            {k: v for k, v in session.items() if k not in ("messages", self._LOADED)},
+            separators=(",", ":"), default=str,
+        )
+        loaded_version, loaded_count = session.get(self._LOADED) or (0, 0)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT message_count, version FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            stored, version = row if row else (0, 0)
+            if version != loaded_version:
+                # Saved by another turn since this dict was loaded – append
+                # only this turn's messages after the stored ones
+                new, count = messages[loaded_count:], None
+                SESSION_WRITE_CONFLICTS.inc()
+            else:
+                if stored > len(messages):
+                    # History was rewritten (e.g. reset) – fall back to a full rewrite
+                    conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+                    stored = 0
+                new, count = messages[stored:], len(messages)
+            conn.executemany(
+                "INSERT INTO messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                [(session_id, seq, *self._encode_message(m)) for seq, m in enumerate(new, stored)],
+            )
+            if count is None:
+                session["messages"] = self._load_messages(conn, session_id)
+                count = len(session["messages"])
+            conn.execute(
+                "INSERT INTO sessions (id, state, message_count, updated_at, version) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET state = excluded.state, "
+                "message_count = excluded.message_count, updated_at = excluded.updated_at, "
+                "version = excluded.version",
+                (session_id, state, count, self._clock(), version + 1),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        session[self._LOADED] = [version + 1, count]
+        self._writes += 1
+        if self.purge_every and self._writes % self.purge_every == 0:
+            self.purge_expired()
+
+    def delete(self, session_id: str) -> bool:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            deleted = conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return deleted > 0
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connect()
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "entries": len(self),
+            "bytes": page_count * page_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": dict(self.evictions),
+        }
+
+    def purge_expired(self) -> int:
+        """Delete sessions idle for longer than the TTL; return how many."""
+        if not self.ttl_seconds:
+            return 0
+        deadline = self._clock() - self.ttl_seconds
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = [r[0] for r in conn.execute("SELECT id FROM sessions WHERE updated_at < ?", (deadline,))]
+            conn.executemany("DELETE FROM messages WHERE session_id = ?", [(sid,) for sid in expired])
+            conn.execute("DELETE FROM sessions WHERE updated_at < ?", (deadline,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.evictions["ttl"] += len(expired)
+        if self.on_evict is not None:
+            for sid in expired:
+                try:
+                    self.on_evict(sid, None, "ttl")
+                except Exception as e:
+                    print(f"⚠️  Session eviction callback failed: {e}")
+        return len(expired)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _expired(self, updated_at: float) -> bool:
+        return bool(self.ttl_seconds) and updated_at < self._clock() - self.ttl_seconds
+
+
+def create_session_store(on_evict: Optional[EvictionCallback] = None) -> SessionStore:
+    """Build the configured session backend (``SESSION_BACKEND``: ``memory`` or ``sqlite``)."""
+    backend = os.getenv("SESSION_BACKEND", "memory").lower()
+    if backend == "memory":
+        return InMemorySessionStore.from_env(on_evict=on_evict)
+    if backend == "sqlite":
+        return SQLiteSessionStore.from_env(on_evict=on_evict)
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Return the process-wide session store (shared by every app and routing mode)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = create_session_store()
+        return _store
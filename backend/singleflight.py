@@ -0,0 +1,131 @@
+"""
+Single-flight request coalescing
+Concurrent calls with the same key share one upstream call (one embedding,
+one Chroma search, one Gemini generation) instead of each paying for it.
+"""
+
+import asyncio
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict
+
+
+def normalize_key(*parts: Any) -> str:
+    """Stable key for *parts*: case-folded, whitespace-collapsed, hashed."""
+    text = "\x1f".join(re.sub(r"\s+", " ", str(part)).strip().lower() for part in parts)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """An in-flight synchronous call that followers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces duplicate in-flight calls and counts per-key fan-in.
+
+    ``do`` is for coroutines (one shared task per key, shielded so a cancelled
+    caller does not cancel the upstream call); ``do_sync`` is for blocking
+    code running on worker threads.
+    """
+
+    def __init__(self, name: str, max_tracked_keys: int = 256):
+        self.name = name
+        self.max_tracked_keys = max_tracked_keys
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self._calls: Dict[str, _Call] = {}
+        self._fan_in: "OrderedDict[str, dict]" = OrderedDict()
+        self.calls = 0
+        self.executions = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]):
+        """Await ``fn()``, or join an identical call already in flight."""
+        with self._lock:
+            task = self._tasks.get(key)
+            self._record(key, leader=task is None)
+            if task is None:
+                task = asyncio.ensure_future(fn())
+                self._tasks[key] = task
+                task.add_done_callback(lambda _t, key=key: self._tasks.pop(key, None))
+        return await asyncio.shield(task)
+
+    def do_sync(self, key: str, fn: Callable[[], Any]):
+        """Call ``fn()``, or block until an identical in-flight call finishes."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            self._record(key, leader=leader)
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _record(self, key: str, leader: bool):
+        self.calls += 1
+        if leader:
+            self.executions += 1
+        entry = self._fan_in.get(key)
+        if entry is None:
+            entry = self._fan_in[key] = {"calls": 0, "executions": 0}
+            if len(self._fan_in) > self.max_tracked_keys:
+                self._fan_in.popitem(last=False)
+        else:
+            self._fan_in.move_to_end(key)
+        entry["calls"] += 1
+        entry["executions"] += int(leader)
+
+    def stats(self, top: int = 10) -> dict:
+        """Totals plus the keys with the highest fan-in (calls per execution)."""
+        with self._lock:
+            busiest = sorted(self._fan_in.items(), key=lambda kv: kv[1]["calls"] - kv[1]["executions"], reverse=True)
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.calls - self.executions,
+                "in_flight": len(self._tasks) + len(self._calls),
+                "top_keys": [
+                    {"key": key[:12], "calls": v["calls"], "executions": v["executions"],
+                     "fan_in": round(v["calls"] / max(v["executions"], 1), 2)}
+                    for key, v in busiest[:top]
+                ],
+            }
+
+
+# ----------------------------------------------------------------------
+# Process-wide named groups ("llm", "embed", "search")
+# ----------------------------------------------------------------------
+_flights: Dict[str, SingleFlight] = {}
+_flights_lock = threading.Lock()
+
+
+def get_flight(name: str) -> SingleFlight:
+    """Return the shared single-flight group called *name*."""
+    with _flights_lock:
+        if name not in _flights:
+            _flights[name] = SingleFlight(name)
+        return _flights[name]
+
+
+def flight_stats() -> Dict[str, dict]:
+    """Fan-in metrics for every named group."""
+    return {name: flight.stats() for name, flight in _flights.items()}
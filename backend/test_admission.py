@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from admission import AdmissionController, AdmissionRejected, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_reservation_then_rejection(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=2, clock=clock)
+        self.assertEqual(bucket.reserve(max_wait=1), (True, 0.0))
+        self.assertEqual(bucket.reserve(max_wait=1), (True, 0.0))
+        self.assertEqual(bucket.reserve(max_wait=1), (True, 0.5))
+        admitted, wait = bucket.reserve(max_wait=0.5)
+        self.assertFalse(admitted)
+        self.assertAlmostEqual(wait, 1.0)
+        clock.now = 10
+        self.assertEqual(bucket.reserve(max_wait=0), (True, 0.0))
+
+
+class TestAdmissionAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrency_limit_is_respected(self):
+        controller = AdmissionController(max_concurrency=2, max_queue=10, queue_timeout=5)
+        active = peak = 0
+
+        async def call():
+            nonlocal active, peak
+            async with controller.slot("m"):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.02)
+                active -= 1
+
+        await asyncio.gather(*(call() for _ in range(8)))
+        self.assertEqual(peak, 2)
+        self.assertEqual(controller.stats()["in_flight"], 0)
+        self.assertEqual(controller.stats()["queued"], 0)
+
+    async def test_full_queue_is_rejected_with_503(self):
+        controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=5)
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.slot("m"):
+                await release.wait()
+
+        tasks = [asyncio.ensure_future(hold()) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        with self.assertRaises(AdmissionRejected) as ctx:
+            async with controller.slot("m"):
+                pass
+        self.assertEqual(ctx.exception.status_code, 503)
+        self.assertGreaterEqual(ctx.exception.retry_after, 1)
+        release.set()
+        await asyncio.gather(*tasks)
+
+    async def test_queue_timeout_is_rejected_and_slot_not_leaked(self):
+        controller = AdmissionController(max_concurrency=1, max_queue=5, queue_timeout=0.05)
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.slot("m"):
+                await release.wait()
+
+        task = asyncio.ensure_future(hold())
+        await asyncio.sleep(0.01)
+        with self.assertRaises(AdmissionRejected) as ctx:
+            async with controller.slot("m"):
+                pass
+        self.assertEqual(ctx.exception.reason, "queue_timeout")
+        release.set()
+        await task
+        self.assertEqual(controller.stats(), {**controller.stats(), "in_flight": 0, "queued": 0})
+
+    async def test_rate_limit_is_rejected_with_429(self):
+        controller = AdmissionController(queue_timeout=0.1, rate_limits={"slow": (1, 1)})
+        async with controller.slot("slow"):
+            pass
+        with self.assertRaises(AdmissionRejected) as ctx:
+            async with controller.slot("slow"):
+                pass
+        self.assertEqual(ctx.exception.status_code, 429)
+        # Other models are not limited
+        async with controller.slot("fast"):
+            pass
+
+
+class TestAdmissionSync(unittest.TestCase):
+    def test_threads_share_the_limit(self):
+        controller = AdmissionController(max_concurrency=3, max_queue=50, queue_timeout=5)
+        lock = threading.Lock()
+        active = peak = 0
+
+        def call(_):
+            nonlocal active, peak
+            with controller.slot_sync("m"):
+                with lock:
+                    active += 1
+                    peak = max(peak, active)
+                time.sleep(0.02)
+                with lock:
+                    active -= 1
+
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            list(pool.map(call, range(24)))
+        self.assertEqual(peak, 3)
+        self.assertEqual(controller.stats()["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+
+from benchmarks.bench_hotpaths import build_cases, compare, measure
+
+
+class TestHotpathBenchmarks(unittest.TestCase):
+    def test_compare_flags_regressions_beyond_threshold(self):
+        results = {"a": {"median_ns": 130.0}, "b": {"median_ns": 110.0}, "new": {"median_ns": 5.0}}
+        baseline = {"a": {"median_ns": 100.0}, "b": {"median_ns": 100.0}}
+        compare(results, baseline, threshold=1.25)
+        self.assertTrue(results["a"]["regressed"])
+        self.assertFalse(results["b"]["regressed"])
+        self.assertIsNone(results["new"]["ratio"])
+
+    def test_cases_run_offline(self):
+        cases, _skipped = build_cases()
+        names = {c.name for c in cases}
+        self.assertIn("calc.gemini_agent.auto", names)
+        self.assertIn("extract.parse_extraction_response", names)
+        self.assertIn("route.intent_router", names)
+        for case in cases:
+            self.assertGreater(measure(case.fn, repeat=1, min_seconds=0)["median_ns"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
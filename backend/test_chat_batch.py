@@ -0,0 +1,90 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+import httpx
+from langchain_core.messages import AIMessage
+
+import server
+from server import AppConfig, create_app
+from admission import AdmissionController
+
+DELAY = 0.05
+
+
+class EchoLLM:
+    """Replies with the last user message; tracks how many calls overlap."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def ainvoke(self, messages):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(DELAY)
+            if messages[-1].content == "boom":
+                raise RuntimeError("upstream failed")
+            return AIMessage(content=f"echo: {messages[-1].content}")
+        finally:
+            self.active -= 1
+
+
+class Registry:
+    def __init__(self, llm):
+        self.llm = llm
+
+    def chat_model(self, model=None, temperature=None):
+        return self.llm
+
+    def stats(self):
+        return {}
+
+
+class TestChatBatch(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.llm = EchoLLM()
+        for p in (patch.object(server, "get_clients", return_value=Registry(self.llm)),
+                  patch.object(server, "get_admission", return_value=AdmissionController(max_concurrency=4))):
+            p.start()
+            self.addCleanup(p.stop)
+
+    async def _batch(self, items, **config):
+        app = create_app(AppConfig(mode="direct", **config))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post("/api/chat/batch", json={"items": items})
+            lines = [json.loads(line) for line in response.text.splitlines()] if response.status_code == 200 else []
+            return response, lines, app.state.sessions
+
+    async def test_sessions_stay_ordered_and_run_concurrently(self):
+        items = [{"session_id": f"s{s}", "message": f"s{s} turn {t}"} for t in range(3) for s in range(6)]
+        response, lines, sessions = await self._batch(items, batch_concurrency=3)
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        results, summary = lines[:-1], lines[-1]
+        self.assertEqual(summary["ok"], 18)
+        self.assertEqual(sorted(r["index"] for r in results), list(range(18)))
+        self.assertEqual(self.llm.peak, 3)
+        for s in range(6):
+            history = [m.content for m in sessions.get(f"s{s}")["messages"]]
+            self.assertEqual(history[0::2], [f"s{s} turn {t}" for t in range(3)])
+            self.assertEqual(history[1::2], [f"echo: s{s} turn {t}" for t in range(3)])
+
+    async def test_failed_turn_skips_the_rest_of_its_session(self):
+        items = [{"session_id": "a", "message": "boom"}, {"session_id": "a", "message": "next"},
+                 {"message": "other"}]
+        _, lines, _ = await self._batch(items)
+        by_index = {r["index"]: r for r in lines[:-1]}
+        self.assertEqual(by_index[0]["status"], "error")
+        self.assertEqual(by_index[1]["status"], "skipped")
+        self.assertEqual(by_index[2]["status"], "ok")
+        self.assertEqual(lines[-1], {**lines[-1], "done": True, "ok": 1, "error": 1, "skipped": 1})
+
+    async def test_oversized_batch_is_rejected(self):
+        response, _, _ = await self._batch([{"message": "hi"}] * 3, batch_max_items=2)
+        self.assertEqual(response.status_code, 413)
+
+
+if __name__ == "__main__":
+    unittest.main()
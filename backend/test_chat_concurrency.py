@@ -0,0 +1,110 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+import httpx
+from langchain_core.messages import AIMessage
+
+import server
+from server import AppConfig, create_app
+from admission import AdmissionController
+
+DELAY = 0.3
+CONCURRENT_CHATS = 10
+
+
+class SlowLLM:
+    """Chat model stand-in whose only fast path is the async API."""
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(DELAY)
+        return AIMessage(content="Happy to help with your insurance!")
+
+    def invoke(self, messages):
+        time.sleep(DELAY)
+        return AIMessage(content="blocking call")
+
+
+class SlowGraph:
+    async def ainvoke(self, state):
+        await asyncio.sleep(DELAY)
+        return {**state, "agent_response": "Graph reply"}
+
+    def invoke(self, state):
+        time.sleep(DELAY)
+        return {**state, "agent_response": "blocking call"}
+
+
+class SlowRegistry:
+    def chat_model(self, model=None, temperature=None):
+        return SlowLLM()
+
+    def stats(self):
+        return {}
+
+
+class TestChatConcurrency(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # Admission sized for the burst – these tests measure event-loop blocking
+        self.admission = AdmissionController(max_concurrency=CONCURRENT_CHATS)
+        self.patches = [
+            patch.object(server, "get_clients", return_value=SlowRegistry()),
+            patch.object(server, "get_admission", return_value=self.admission),
+        ]
+        for p in self.patches:
+            p.start()
+
+    async def asyncTearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    async def _connect(self, mode):
+        transport = httpx.ASGITransport(app=create_app(AppConfig(mode=mode)))
+        self.client = httpx.AsyncClient(transport=transport, base_url="http://test")
+        self.addAsyncCleanup(self.client.aclose)
+
+    async def _chat(self, i):
+        response = await self.client.post("/api/chat", json={"message": f"Hi, I need a quote #{i}"})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    async def _time_concurrent_chats(self):
+        start = time.perf_counter()
+        await self._chat(0)
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self._chat(i) for i in range(CONCURRENT_CHATS)))
+        concurrent = time.perf_counter() - start
+        return single, concurrent, results
+
+    async def test_direct_llm_chats_run_concurrently(self):
+        await self._connect("direct")
+        single, concurrent, results = await self._time_concurrent_chats()
+        self.assertEqual(len({r["session_id"] for r in results}), CONCURRENT_CHATS)
+        self.assertLess(concurrent, single * 2)
+
+    async def test_langgraph_chats_run_concurrently(self):
+        await self._connect("langgraph")
+        with patch.object(server, "HAS_LANGGRAPH", True), \
+             patch.object(server, "get_agent_graph", return_value=SlowGraph(), create=True):
+            single, concurrent, results = await self._time_concurrent_chats()
+        self.assertTrue(all(r["response"] == "Graph reply" for r in results))
+        self.assertLess(concurrent, single * 2)
+
+    async def test_saturated_upstream_sheds_load_with_retry_after(self):
+        self.admission.max_concurrency = 1
+        self.admission.max_queue = 1
+        await self._connect("direct")
+        responses = await asyncio.gather(*(
+            self.client.post("/api/chat", json={"message": f"Hi, I need a quote #{i}"}) for i in range(4)
+        ))
+        statuses = sorted(r.status_code for r in responses)
+        self.assertEqual(statuses, [200, 200, 503, 503])
+        rejected = next(r for r in responses if r.status_code == 503)
+        self.assertGreaterEqual(int(rejected.headers["Retry-After"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+import server
+from admission import AdmissionController
+from server import AppConfig, create_app
+
+
+class StreamingLLM:
+    async def astream(self, messages):
+        for token in ["Comprehensive ", "covers ", "theft."]:
+            yield AIMessageChunk(content=token)
+
+
+class StreamingGraph:
+    async def astream(self, state, stream_mode=None):
+        yield "updates", {"gather_info": {"next_action": "check_if_ready"}}
+        yield "updates", {"calculate_quote": {"quote_result": {"monthly_premium": 95.0}}}
+        yield "values", {**state, "quote_result": {"monthly_premium": 95.0}, "agent_response": "Your quote is ready."}
+
+
+class SaturatedGraph:
+    async def astream(self, state, stream_mode=None):
+        yield "updates", {"gather_info": {"next_action": "check_if_ready"}}
+        async with server.get_admission().slot("gemini"):
+            yield "values", {**state, "agent_response": "unreachable"}
+
+
+class StreamingRegistry:
+    def chat_model(self, model=None, temperature=None):
+        return StreamingLLM()
+
+
+def parse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestChatStream(unittest.TestCase):
+    def setUp(self):
+        self.registry_patch = patch.object(server, "get_clients", return_value=StreamingRegistry())
+        self.registry_patch.start()
+
+    def tearDown(self):
+        self.registry_patch.stop()
+
+    def test_direct_llm_streams_tokens_and_persists_reply(self):
+        app = create_app(AppConfig(mode="direct"))
+        response = TestClient(app).post("/api/chat/stream", json={"message": "I need car insurance"})
+        self.assertEqual(response.headers["content-type"], "text/event-stream; charset=utf-8")
+        events = parse_events(response.text)
+
+        self.assertEqual(events[0][0], "session")
+        tokens = [data["text"] for name, data in events if name == "token"]
+        self.assertEqual(tokens, ["Comprehensive ", "covers ", "theft."])
+
+        name, done = events[-1]
+        self.assertEqual(name, "done")
+        self.assertEqual(done["response"], "Comprehensive covers theft.")
+        self.assertEqual(done["agent_state"]["insurance_type"], "auto")
+        self.assertEqual(done["agent_state"]["message_count"], 2)
+        self.assertFalse(done["agent_state"]["has_quote"])
+        self.assertGreater(done["agent_state"]["prompt_tokens"], 0)
+
+        session = app.state.sessions.get(done["session_id"])
+        self.assertIsInstance(session["messages"][-1], AIMessage)
+        self.assertEqual(session["messages"][-1].content, "Comprehensive covers theft.")
+
+    def test_langgraph_streams_node_progress(self):
+        with patch.object(server, "HAS_LANGGRAPH", True), \
+             patch.object(server, "get_agent_graph", return_value=StreamingGraph(), create=True):
+            response = TestClient(create_app(AppConfig(mode="langgraph"))).post("/api/chat/stream", json={"message": "Quote my home please"})
+        events = parse_events(response.text)
+
+        nodes = [data["node"] for name, data in events if name == "node"]
+        self.assertEqual(nodes, ["gather_info", "calculate_quote"])
+        name, done = events[-1]
+        self.assertEqual(done["response"], "Your quote is ready.")
+        self.assertTrue(done["agent_state"]["has_quote"])
+        self.assertEqual(done["agent_state"]["insurance_type"], "home")
+
+    def test_langgraph_reports_admission_rejection_instead_of_falling_back(self):
+        controller = AdmissionController(max_concurrency=1, max_queue=0, queue_timeout=0.01)
+        with patch.object(server, "HAS_LANGGRAPH", True), \
+             patch.object(server, "get_agent_graph", return_value=SaturatedGraph(), create=True), \
+             patch.object(server, "get_admission", return_value=controller), \
+             controller.slot_sync("gemini"):  # the only upstream slot is taken
+            response = TestClient(create_app(AppConfig(mode="langgraph"))).post(
+                "/api/chat/stream", json={"message": "Quote my home please"})
+        events = parse_events(response.text)
+        self.assertNotIn("fallback", [data.get("node") for name, data in events if name == "node"])
+        name, error = events[-1]
+        self.assertEqual((name, error["status"]), ("error", 503))
+        self.assertNotIn("token", [name for name, _ in events])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import unittest
+from unittest.mock import Mock, patch
+
+import clients
+from clients import ClientConfig, ClientRegistry
+
+
+class FakeRegistry(ClientRegistry):
+    """Registry that records builds instead of creating real Gemini clients."""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.built = []
+
+    def _build_chat_model(self, model, temperature):
+        self.built.append(("chat", model, temperature))
+        return object()
+
+    def _build_embeddings(self, model):
+        self.built.append(("embeddings", model))
+        return object()
+
+
+class TestClientRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = FakeRegistry(ClientConfig(api_key="test-key"))
+
+    def test_chat_model_is_shared(self):
+        first = self.registry.chat_model("gemini-2.0-flash-exp")
+        second = self.registry.chat_model("gemini-2.0-flash-exp")
+        self.assertIs(first, second)
+        self.assertEqual(len(self.registry.built), 1)
+
+    def test_handles_are_per_model(self):
+        flash = self.registry.chat_model("gemini-2.0-flash-exp")
+        pro = self.registry.chat_model("gemini-1.5-pro")
+        self.assertIsNot(flash, pro)
+        self.assertIs(self.registry.embeddings(), self.registry.embeddings())
+        self.assertEqual(len(self.registry.built), 3)
+
+    def test_close_drops_handles(self):
+        first = self.registry.chat_model()
+        self.registry.close()
+        self.assertIsNot(first, self.registry.chat_model())
+
+    def test_prime_sends_a_token_count(self):
+        registry = FakeRegistry(ClientConfig(api_key="test-key"))
+        registry._build_chat_model = lambda model, temperature: Mock()
+        registry.prime("gemini-2.0-flash-exp")
+        registry.chat_model("gemini-2.0-flash-exp").get_num_tokens.assert_called_once()
+        offline = FakeRegistry(ClientConfig(provider="fake"))
+        offline._build_chat_model = lambda model, temperature: Mock()
+        offline.prime()
+        offline.chat_model().get_num_tokens.assert_not_called()
+
+    def test_config_from_env(self):
+        env = {"GEMINI_API_KEY": "abc", "GEMINI_TEMPERATURE": "0.2", "GEMINI_MAX_RETRIES": "0"}
+        with patch.dict(os.environ, env):
+            config = ClientConfig.from_env()
+        self.assertEqual(config.api_key, "abc")
+        self.assertEqual(config.temperature, 0.2)
+        self.assertEqual(config.max_retries, 0)
+
+    def test_process_wide_registry(self):
+        clients.close_clients()
+        try:
+            self.assertIs(clients.get_clients(), clients.get_clients())
+        finally:
+            clients.close_clients()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from embedding_cache import EmbeddingCache, cache_key
+from fake_llm import FakeConfig, FakeEmbeddings
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    def __init__(self):
+        super().__init__(FakeConfig(embedding_dim=32))
+        self.documents = 0
+        self.queries = 0
+
+    def embed_documents(self, texts):
+        self.documents += len(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.queries += 1
+        return super().embed_query(text)
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "embeddings.db")
+
+    def _cache(self, **kwargs):
+        cache = EmbeddingCache(self.path, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_repeats_and_reindexing_skip_upstream(self):
+        inner = CountingEmbeddings()
+        cached = self._cache().wrap(inner, "fake:models/embedding-001")
+        docs = ["collision coverage", "home discounts", "collision coverage"]
+        first = cached.embed_documents(docs)
+        self.assertEqual(inner.documents, 2)  # duplicate embedded once
+        self.assertEqual(cached.embed_documents(docs), first)
+        self.assertEqual(inner.documents, 2)
+        np.testing.assert_allclose(first[0], inner.embed_documents(["collision coverage"])[0], rtol=1e-6)
+
+        cached.embed_query("collision coverage")  # a query is keyed apart from a document
+        cached.embed_query("collision coverage")
+        self.assertEqual(inner.queries, 1)
+
+    def test_vectors_persist_as_float32(self):
+        inner = CountingEmbeddings()
+        self._cache().wrap(inner, "m").embed_documents(["a", "b"])
+        reopened = self._cache(max_memory=1)
+        vectors = reopened.get_many([cache_key("m", "document", "a"), cache_key("m", "document", "b")])
+        self.assertTrue(all(v is not None and v.dtype == np.float32 and v.shape == (32,) for v in vectors))
+        self.assertEqual(reopened.stats()["disk_hits"], 2)
+        self.assertEqual(reopened.stats()["memory_entries"], 1)  # LRU bound
+        self.assertGreater(os.path.getsize(self.path), 0)
+
+    def test_file_is_capped_oldest_first(self):
+        cache = self._cache(max_rows=3, prune_every=2)
+        for i in range(6):
+            cache.put_many({f"k{i}".encode(): [float(i)]})
+        self.assertLessEqual(len(cache), 4)  # pruned every 2 writes
+        self.assertEqual(cache.prune(), len(cache) - 3)
+        self.assertEqual(len(cache), 3)
+        reopened = self._cache(max_memory=0)
+        self.assertEqual([v is None for v in reopened.get_many([b"k0", b"k5"])], [True, False])
+
+    def test_default_is_memory_only(self):
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("EMBEDDING_CACHE_PATH", None)
+            cache = EmbeddingCache.from_env()
+        self.assertIsNone(cache.path)
+        self.assertIsNone(EmbeddingCache().path)
+
+    def test_memory_only(self):
+        cache = EmbeddingCache(path=None, max_memory=2)
+        cache.put_many({b"k1": [1.0], b"k2": [2.0], b"k3": [3.0]})
+        self.assertEqual([v is None for v in cache.get_many([b"k1", b"k3"])], [True, False])
+        self.assertEqual(cache.stats()["hit_rate"], 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import asyncio
+import importlib
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+import httpx
+import numpy as np
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.tools import tool
+
+from clients import ClientConfig, ClientRegistry
+from fake_llm import FakeChatModel, FakeConfig, FakeEmbeddings, FakeGenerativeModel, FakeLLMError, LatencyModel
+from provider import Provider
+
+
+@tool
+def calculate_auto_premium(age: int, vehicle_year: int) -> dict:
+    """Calculate an auto premium."""
+    return {"monthly_premium": 100}
+
+
+class TestLatencyModel(unittest.TestCase):
+    def test_distributions(self):
+        self.assertEqual(LatencyModel("fixed:0.2").sample(), 0.2)
+        samples = [LatencyModel("uniform:0.1,0.3", seed=i).sample() for i in range(50)]
+        self.assertTrue(all(0.1 <= s <= 0.3 for s in samples))
+        self.assertTrue(all(s >= 0 for s in (LatencyModel("normal:0,1", seed=i).sample() for i in range(50))))
+        with self.assertRaises(ValueError):
+            LatencyModel("pareto:1")
+
+
+class TestFakeChatModel(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.llm = FakeChatModel(FakeConfig(reply_tokens=8, seed=7), model="gemini-2.0-flash-exp")
+        self.messages = [SystemMessage(content="You are an agent"), HumanMessage(content="What is collision?")]
+
+    async def test_replies_are_deterministic_and_stream_the_same_text(self):
+        reply = (await self.llm.ainvoke(self.messages)).content
+        self.assertEqual(reply, self.llm.invoke(self.messages).content)
+        streamed = [c.content async for c in self.llm.astream(self.messages)]
+        self.assertGreaterEqual(len([c for c in streamed if c]), 8)
+        self.assertEqual("".join(streamed), reply)
+
+    async def test_latency_is_applied(self):
+        llm = FakeChatModel(FakeConfig(latency="fixed:0.1"))
+        start = time.perf_counter()
+        await asyncio.gather(*(llm.ainvoke(self.messages) for _ in range(5)))
+        elapsed = time.perf_counter() - start
+        self.assertGreaterEqual(elapsed, 0.1)
+        self.assertLess(elapsed, 0.3)  # async path does not block the loop
+
+    def test_scripted_tool_call(self):
+        bound = self.llm.bind_tools([calculate_auto_premium])
+        reply = bound.invoke([HumanMessage(content="Can I get a quote for my car?")])
+        self.assertEqual(reply.tool_calls[0]["name"], "calculate_auto_premium")
+        self.assertEqual(reply.tool_calls[0]["args"]["age"], 30)
+        # Unbound tools are never called
+        self.assertEqual(self.llm.invoke([HumanMessage(content="quote for my car")]).tool_calls, [])
+
+    def test_error_injection(self):
+        llm = FakeChatModel(FakeConfig(error_rate=1.0))
+        with self.assertRaises(FakeLLMError):
+            llm.invoke(self.messages)
+
+
+class TestFakeEmbeddings(unittest.TestCase):
+    def test_deterministic_unit_vectors_with_word_overlap(self):
+        emb = FakeEmbeddings(FakeConfig(embedding_dim=128))
+        a, b, c = (np.array(v) for v in emb.embed_documents(
+            ["what is comprehensive coverage", "explain comprehensive coverage", "sunny weather today"]))
+        self.assertEqual(list(a), emb.embed_query("what is comprehensive coverage"))
+        self.assertAlmostEqual(float(np.linalg.norm(a)), 1.0, places=5)
+        self.assertGreater(float(a @ b), float(a @ c))
+
+
+class TestFakeProvider(unittest.TestCase):
+    def test_provider_and_registry_select_fakes(self):
+        provider = Provider("fake")
+        provider.configure()  # no API key needed
+        self.assertIsInstance(provider.get_model(), FakeGenerativeModel)
+        registry = ClientRegistry(ClientConfig(provider="fake"))
+        self.assertIsInstance(registry.chat_model(), FakeChatModel)
+        self.assertIsInstance(registry.embeddings(), FakeEmbeddings)
+        self.assertEqual(registry.stats()["provider"], "fake")
+        with self.assertRaises(ValueError):
+            Provider("openai")
+
+    def test_native_agent_runs_scripted_function_call(self):
+        with patch.dict(os.environ, {"LLM_PROVIDER": "fake"}):
+            gemini_agent = importlib.import_module("gemini_agent")
+            with patch.object(gemini_agent, "model", FakeGenerativeModel()), \
+                 patch.object(gemini_agent, "AVAILABLE_FUNCTIONS",
+                              {"calculate_home_premium": lambda **kw: {"monthly_premium": 90}}):
+                reply = gemini_agent.chat_with_agent("Please quote my home insurance", "fake-session")
+        self.assertTrue(reply.startswith("Here is your quote."))
+
+
+class TestChatEndpointWithFakeProvider(unittest.IsolatedAsyncioTestCase):
+    async def test_chat_round_trip_without_api_key(self):
+        import server
+
+        registry = ClientRegistry(ClientConfig(provider="fake"))
+        with patch.object(server, "get_clients", return_value=registry):
+            transport = httpx.ASGITransport(app=server.create_app(server.AppConfig(mode="direct")))
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post("/api/chat", json={"message": "I need car insurance"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["response"])
+
+
+if __name__ == "__main__":
+    unittest.main()
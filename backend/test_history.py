@@ -0,0 +1,75 @@
+import unittest
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from history import HistoryManager, estimate_tokens
+
+
+def make_session(turns: int) -> dict:
+    messages = []
+    for i in range(turns):
+        messages.append(HumanMessage(content=f"Question number {i}. " + "details " * 40))
+        messages.append(AIMessage(content=f"Answer number {i}. " + "explanation " * 40))
+    return {
+        "messages": messages,
+        "user_info": {"age": 30, "vehicle_year": 2020},
+        "insurance_type": "auto",
+        "quote_result": {"monthly_premium": 95.83, "annual_premium": 1150},
+    }
+
+
+class TestHistoryManager(unittest.TestCase):
+    def test_short_conversation_is_sent_verbatim(self):
+        session = make_session(2)
+        messages, stats = HistoryManager(keep_turns=6).build("SYSTEM", session)
+        self.assertEqual(stats.verbatim_messages, 4)
+        self.assertEqual(stats.summarized_messages, 0)
+        self.assertEqual(messages[-4:], session["messages"])
+
+    def test_old_turns_are_folded_into_summary(self):
+        session = make_session(10)
+        messages, stats = HistoryManager(keep_turns=3).build("SYSTEM", session)
+        self.assertEqual(stats.verbatim_messages, 6)
+        self.assertEqual(stats.summarized_messages, 14)
+        self.assertIn("Question number 0.", session["history_summary"])
+        self.assertEqual(len(session["messages"]), 20)  # full history untouched
+        self.assertEqual(messages[-1], session["messages"][-1])
+
+    def test_summary_is_rolling_across_turns(self):
+        manager = HistoryManager(keep_turns=2)
+        session = make_session(4)
+        manager.build("SYSTEM", session)
+        first_summary = session["history_summary"]
+        session["messages"] += make_session(1)["messages"]
+        manager.build("SYSTEM", session)
+        self.assertTrue(session["history_summary"].startswith(first_summary))
+        self.assertEqual(session["summarized_count"], 6)
+
+    def test_facts_are_pinned(self):
+        session = make_session(30)
+        messages, stats = HistoryManager(token_budget=300, keep_turns=10).build("SYSTEM", session)
+        facts = messages[1].content
+        self.assertIn("Insurance type: auto", facts)
+        self.assertIn("age: 30", facts)
+        self.assertIn("$95.83/month", facts)
+        self.assertGreater(stats.facts_tokens, 0)
+
+    def test_token_budget_is_respected(self):
+        session = make_session(30)
+        manager = HistoryManager(token_budget=800, keep_turns=10, summary_tokens=200)
+        messages, stats = manager.build("SYSTEM", session)
+        self.assertLessEqual(stats.tokens, 800)
+        self.assertEqual(stats.tokens, sum(estimate_tokens(m.content) for m in messages))
+        self.assertEqual(messages[-1], session["messages"][-1])
+
+    def test_extra_messages_count_against_budget(self):
+        session = make_session(3)
+        extra = [HumanMessage(content="knowledge " * 200)]
+        messages, stats = HistoryManager(token_budget=800).build("SYSTEM", session, extra=extra)
+        self.assertIs(messages[-1], extra[0])
+        self.assertLessEqual(stats.tokens, 800)
+        self.assertGreater(stats.summarized_messages, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
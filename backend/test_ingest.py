@@ -0,0 +1,158 @@
+import json
+import os
+import tempfile
+import unittest
+
+from fake_llm import FakeConfig, FakeEmbeddings
+from ingest import IngestConfig, batches, chunk_text, infer_type, ingest_directory, restore_lexical_index
+from retrievers import HybridRetriever, NumpyRetriever
+
+CONFIG = IngestConfig(chunk_size=200, chunk_overlap=40, batch_size=4, batch_chars=600,
+                      concurrency=2, retries=2, backoff=0, page_size=8)
+
+
+class StoredRetriever(NumpyRetriever):
+    """Stands in for a persistent store (checkpointing is on)."""
+    persistent = True
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    def __init__(self, fail_after=None, flaky=0):
+        super().__init__(FakeConfig(embedding_dim=32))
+        self.calls = 0
+        self.texts = 0
+        self.fail_after = fail_after
+        self.flaky = flaky
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.flaky:
+            self.flaky -= 1
+            raise ConnectionError("429")
+        if self.fail_after is not None and self.texts >= self.fail_after:
+            raise ConnectionError("upstream down")
+        self.texts += len(texts)
+        return super().embed_documents(texts)
+
+
+def _paragraphs(name, n):
+    return "\n\n".join(f"{name} clause {i}: the insurer pays covered losses up to the stated limit." for i in range(n))
+
+
+class TestChunking(unittest.TestCase):
+    def test_chunks_are_bounded_and_overlap(self):
+        text = _paragraphs("policy", 40)
+        chunks = chunk_text(text, 200, 40)
+        self.assertTrue(all(len(c) <= 200 for c in chunks))
+        self.assertIn("clause 0:", chunks[0])
+        self.assertIn("clause 39:", chunks[-1])
+        for left, right in zip(chunks, chunks[1:]):
+            self.assertIn(right[:10], left)  # neighbours share the overlap
+        self.assertEqual(chunk_text("short"), ["short"])
+        with self.assertRaises(ValueError):
+            chunk_text("x", 10, 10)
+
+    def test_batches_respect_both_bounds(self):
+        texts = ["a" * 100] * 9 + ["b" * 500]
+        slices = batches(texts, 4, 450)
+        self.assertEqual(slices, [(0, 4), (4, 8), (8, 9), (9, 10)])  # an oversized text goes alone
+        self.assertEqual(batches([], 4, 450), [])
+
+    def test_infer_type(self):
+        self.assertEqual(infer_type("auto/state_minimums.md"), "auto")
+        self.assertEqual(infer_type("regulations/home_flood.txt"), "home")
+        self.assertEqual(infer_type("automobile.txt"), "general")
+
+
+class TestIngestDirectory(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = os.path.join(tmp.name, "docs")
+        os.makedirs(os.path.join(self.root, "auto"))
+        os.makedirs(os.path.join(self.root, "home"))
+        self.checkpoint = os.path.join(tmp.name, "checkpoint.json")
+        self._write("auto/minimums.md", _paragraphs("auto", 30))
+        self._write("home/flood.txt", _paragraphs("home", 30))
+        self._write("notes.csv", "ignored")
+
+    def _write(self, rel, text):
+        with open(os.path.join(self.root, rel), "w") as f:
+            f.write(text)
+
+    def _ingest(self, retriever, embeddings):
+        return ingest_directory(self.root, retriever, embeddings, CONFIG, self.checkpoint, log=lambda _: None)
+
+    def test_killed_run_resumes(self):
+        retriever = StoredRetriever(FakeEmbeddings(FakeConfig(embedding_dim=32)))
+        with self.assertRaises(ConnectionError):
+            self._ingest(retriever, CountingEmbeddings(fail_after=12))
+        committed = retriever.count()
+        self.assertGreater(committed, 0)
+        with open(self.checkpoint) as f:
+            self.assertEqual(sum(e["done"] for e in json.load(f)["files"].values()), committed)
+
+        embeddings = CountingEmbeddings()
+        report = self._ingest(retriever, embeddings)
+        self.assertEqual(report.files, 2)
+        self.assertEqual(report.chunks_skipped, committed)
+        self.assertEqual(embeddings.texts, report.chunks)  # only the remainder is embedded
+        total = committed + report.chunks
+        self.assertEqual(retriever.count(), total)
+
+        found = retriever.search("home clause 7", k=1, filter={"type": "home"})
+        self.assertEqual(found[0].metadata["source"], "home/flood.txt")
+
+        # unchanged → nothing embedded; a shortened file drops its stale chunks
+        self._write("home/flood.txt", _paragraphs("home", 3))
+        embeddings = CountingEmbeddings()
+        report = self._ingest(retriever, embeddings)
+        self.assertEqual(report.files_unchanged, 1)
+        self.assertGreater(report.chunks_deleted, 0)
+        self.assertEqual(embeddings.texts, report.chunks)
+        self.assertEqual(retriever.count(), total - report.chunks_deleted)
+
+    def test_removed_files_and_in_place_edits(self):
+        retriever = StoredRetriever(FakeEmbeddings(FakeConfig(embedding_dim=32)))
+        self._ingest(retriever, CountingEmbeddings())
+        before = retriever.count()
+        version = retriever.version
+        text = _paragraphs("auto", 30)
+        self._write("auto/minimums.md", text.replace("insurer", "carrier"))  # same chunk count, new content
+        self._ingest(retriever, CountingEmbeddings())
+        self.assertEqual(retriever.count(), before)
+        self.assertGreater(retriever.version, version)  # cached context keyed on the old version is dropped
+
+        os.remove(os.path.join(self.root, "home", "flood.txt"))
+        report = self._ingest(retriever, CountingEmbeddings())
+        self.assertEqual(report.files_removed, 1)
+        self.assertEqual(retriever.count(), before - report.chunks_deleted)
+        self.assertEqual(retriever.search("home clause", k=50, filter={"type": "home"}), [])
+        with open(self.checkpoint) as f:
+            self.assertEqual(list(json.load(f)["files"]), ["auto/minimums.md"])
+
+    def test_restart_restores_lexical_index_from_store(self):
+        store = StoredRetriever(FakeEmbeddings(FakeConfig(embedding_dim=32)))
+        report = self._ingest(store, CountingEmbeddings())  # the CLI run
+        restarted = HybridRetriever(store)  # server process: fresh BM25, no KNOWLEDGE_DIR
+        self.assertEqual(restore_lexical_index(restarted, self.checkpoint), report.chunks)
+        self.assertEqual(len(restarted.lexical), report.chunks)
+        found = restarted.lexical_match("home clause 12 stated limit", k=1)
+        self.assertEqual(found[0].metadata["source"], "home/flood.txt")
+
+    def test_retries_and_hybrid_lexical_index(self):
+        retriever = HybridRetriever(NumpyRetriever(FakeEmbeddings(FakeConfig(embedding_dim=32))))
+        embeddings = CountingEmbeddings(flaky=2)
+        report = self._ingest(retriever, embeddings)
+        self.assertEqual(report.failed, {})
+        self.assertEqual(retriever.count(), report.chunks)
+        self.assertEqual(len(retriever.lexical), report.chunks)
+        self.assertFalse(os.path.exists(self.checkpoint))  # in-memory store: no checkpoint
+        # re-running against the same store upserts in place
+        self._ingest(retriever, CountingEmbeddings())
+        self.assertEqual(retriever.count(), report.chunks)
+        self.assertEqual(len(retriever.lexical), report.chunks)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from benchmarks.bench_intent_router import LABELLED, accuracy, legacy_route
+from intent_router import Intent, route
+import server
+
+
+class TestIntentRouter(unittest.TestCase):
+    def test_word_boundaries(self):
+        self.assertIsNone(route("Be careful, I scared myself").insurance_type)
+        self.assertEqual(route("My CAR was hit").insurance_type, "auto")
+        self.assertEqual(route("Explain differences in house coverage"),
+                         Intent(needs_rag=True, insurance_type="home", off_topic=False))
+
+    def test_weak_line_terms_lose_to_named_lines(self):
+        self.assertEqual(route("Does home insurance include comprehensive coverage?").insurance_type, "home")
+        self.assertEqual(route("Explain comprehensive vs collision").insurance_type, "auto")
+        self.assertEqual(route("Can I bundle my car and home?").insurance_type, "auto")  # tie
+        self.assertFalse(route("Is a different car cheaper to insure?").needs_rag)
+        self.assertTrue(route("What's different about a condo policy?").needs_rag)
+        self.assertTrue(route("Tell  me about discounts").needs_rag)
+        self.assertFalse(route("Tell me more about yourself somewhat").needs_rag)
+
+    def test_uncached_path_matches_cached(self):
+        for message, *_ in LABELLED:
+            self.assertEqual(route.__wrapped__(message), route(message))
+        self.assertEqual(route.__wrapped__("Is my CAR’s roof covered? ÉTÉ"), route("is my car’s roof covered? été"))
+
+    def test_off_topic_only_without_insurance_terms(self):
+        self.assertTrue(route("Write me a poem").off_topic)
+        self.assertFalse(route("Write me a poem about my car insurance").off_topic)
+
+    def test_labelled_set_beats_legacy_checks(self):
+        self.assertEqual(accuracy(route, LABELLED)["all"], 1.0)
+        self.assertLess(accuracy(legacy_route, LABELLED)["all"], 1.0)
+
+    def test_server_routing_uses_router(self):
+        self.assertEqual(server.knowledge_route("What is collision for my truck?"), (True, "auto"))
+        self.assertEqual(server.knowledge_route("My carpet is wet"), (False, None))
+        session = {"messages": [], "insurance_type": "home", "quote_result": None}
+        server.finish_turn(session, "Thanks, that's all", "You're welcome")
+        self.assertEqual(session["insurance_type"], "home")  # no match keeps the current type
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import copy
+import json
+import os
+import tempfile
+import unittest
+
+from langchain_core.documents import Document
+
+import rag_system
+from fake_llm import FakeConfig, FakeEmbeddings
+from retrievers import HybridRetriever, NumpyRetriever
+
+
+class StoredRetriever(NumpyRetriever):
+    """Stands in for a persistent store (the manifest is kept)."""
+    persistent = True
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    def __init__(self):
+        super().__init__(FakeConfig(embedding_dim=32))
+        self.texts = 0
+
+    def embed_documents(self, texts):
+        self.texts += len(texts)
+        return super().embed_documents(texts)
+
+
+class TestKnowledgeSync(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.manifest = os.path.join(tmp.name, "kb_manifest.json")
+        self.embeddings = CountingEmbeddings()
+        self.retriever = StoredRetriever(self.embeddings)
+        self.items = copy.deepcopy(rag_system.INSURANCE_KNOWLEDGE)
+
+    def _sync(self, retriever=None):
+        return rag_system.sync_knowledge_base(retriever or self.retriever, self.items, self.manifest)
+
+    def test_only_changes_are_embedded(self):
+        report = self._sync()
+        self.assertEqual(len(report["added"]), len(self.items))
+        self.assertEqual(self.embeddings.texts, len(self.items))
+        with open(self.manifest) as f:
+            self.assertEqual(set(json.load(f)), {rag_system.knowledge_id(i) for i in self.items})
+
+        self.embeddings.texts = 0
+        report = self._sync()
+        self.assertEqual((report["added"], report["updated"], report["removed"]), ([], [], []))
+        self.assertEqual(report["unchanged"], len(self.items))
+        self.assertEqual(self.embeddings.texts, 0)
+
+        self.items[0]["content"] += "\nRoadside assistance is optional."
+        removed = self.items.pop()
+        self.items.append({"content": "Umbrella policies add liability above auto and home limits.",
+                           "metadata": {"type": "general", "topic": "umbrella"}})
+        report = self._sync()
+        self.assertEqual(report["updated"], [rag_system.knowledge_id(self.items[0])])
+        self.assertEqual(report["added"], ["kb:general:umbrella"])
+        self.assertEqual(report["removed"], [rag_system.knowledge_id(removed)])
+        self.assertEqual(self.embeddings.texts, 2)
+        self.assertEqual(self.retriever.count(), len(self.items))
+        found = self.retriever.search("Roadside assistance", k=1, filter={"topic": "coverage_types", "type": "auto"})
+        self.assertIn("Roadside assistance is optional", found[0].page_content)
+
+    def test_legacy_store_is_cleared_once(self):
+        # populated before manifests existed: no ids
+        self.retriever.add_documents([Document(page_content=i["content"], metadata=i["metadata"]) for i in self.items])
+        self.retriever.add_documents([Document(page_content="ingested", metadata={"source": "a.md"})], ids=["a.md#0"])
+        self._sync()
+        self.assertEqual(self.retriever.count(), len(self.items) + 1)  # ingested chunk kept
+
+    def test_hybrid_restart_refills_lexical_index(self):
+        self._sync()
+        restarted = HybridRetriever(self.retriever)  # same store, fresh in-memory BM25
+        self.embeddings.texts = 0
+        self._sync(restarted)
+        self.assertEqual(self.embeddings.texts, 0)
+        self.assertEqual(len(restarted.lexical), len(self.items))
+        self.assertIsNotNone(restarted.lexical_match("What is ALE?"))
+
+    def test_in_memory_retriever_has_no_manifest(self):
+        self.assertIsNone(rag_system.knowledge_manifest_path(NumpyRetriever(self.embeddings)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from langchain_core.documents import Document
+
+from lexical_index import BM25Index, tokenize
+
+
+class TestTokenize(unittest.TestCase):
+    def test_terms(self):
+        self.assertEqual(tokenize("What is the 50/100/50 limit on $350,000?"), ["50/100/50", "limit", "350000"])
+        self.assertEqual(tokenize("Coverage C and ALE don't"), ["coverage", "c", "ale", "dont"])
+
+
+class TestBM25Index(unittest.TestCase):
+    def setUp(self):
+        self.index = BM25Index()
+        self.index.add([
+            Document(page_content="Liability minimums vary by state, e.g. 50/100/50.", metadata={"type": "auto"}),
+            Document(page_content="Additional Living Expenses (ALE) pay for temporary housing.", metadata={"type": "home"}),
+            Document(page_content="Collision coverage pays for collision damage to your car.", metadata={"type": "auto"}),
+            Document(page_content="Dwelling coverage pays to rebuild the house.", metadata={"type": "home"}),
+        ])
+
+    def test_ranking_and_confidence(self):
+        ranked, confidence = self.index.search("what is ALE?")
+        self.assertEqual(len(ranked), 1)
+        self.assertIn("ALE", ranked[0][0].page_content)
+        self.assertEqual(confidence, 1.0)
+
+        ranked, _ = self.index.search("collision coverage")
+        self.assertIn("Collision", ranked[0][0].page_content)  # repeated rare term wins
+        self.assertGreater(ranked[0][1], ranked[1][1])
+
+        _, confidence = self.index.search("ALE for my boat")  # unknown term lowers confidence
+        self.assertLess(confidence, 0.5)
+
+    def test_filter_and_empty(self):
+        ranked, _ = self.index.search("coverage pays", k=5, filter={"type": "home"})
+        self.assertEqual([d.metadata["type"] for d, _ in ranked], ["home"])
+        self.assertEqual(self.index.search("what is it?"), ([], 0.0))
+        self.assertEqual(BM25Index().search("ALE"), ([], 0.0))
+
+    def test_tombstones_are_compacted(self):
+        index = BM25Index()
+        for _ in range(20):  # re-ingesting the same chunks replaces them
+            index.add([Document(page_content=f"chunk {i} about ALE") for i in range(4)],
+                      ids=[f"c{i}" for i in range(4)])
+        self.assertEqual(len(index), 4)
+        self.assertLessEqual(len(index._documents), 6)
+        ranked, _ = index.search("chunk 3 ALE", k=4)
+        self.assertEqual(ranked[0][0].page_content, "chunk 3 about ALE")
+        index.remove(["c3"])
+        self.assertEqual(len(index.search("ALE", k=10)[0]), 3)
+
+    def test_remove_where(self):
+        self.assertEqual(self.index.remove_where({"type": "home"}), 2)
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.search("ALE"), ([], 0.0))
+        ranked, _ = self.index.search("collision", k=5)
+        self.assertEqual([d.metadata["type"] for d, _ in ranked], ["auto"])
+
+
+if __name__ == "__main__":
+    unittest.main()
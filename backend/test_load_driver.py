@@ -0,0 +1,56 @@
+import unittest
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from benchmarks.common import percentiles
+from benchmarks.load_driver import LoadDriver
+
+
+def make_app(fail_on_turn=None):
+    app = FastAPI()
+    turns = {}
+
+    @app.post("/api/chat")
+    async def chat(body: dict):
+        session_id = body.get("session_id") or f"s{len(turns)}"
+        turns[session_id] = turns.get(session_id, 0) + 1
+        if turns[session_id] == fail_on_turn:
+            raise HTTPException(status_code=503, detail="busy", headers={"Retry-After": "1"})
+        return {"response": "ok", "session_id": session_id}
+
+    return app
+
+
+class TestLoadDriver(unittest.IsolatedAsyncioTestCase):
+    async def _driver(self, app):
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+        self.addAsyncCleanup(client.aclose)
+        return LoadDriver(client, scenarios={"auto": ["hi", "age 30", "quote please"]})
+
+    async def test_closed_loop_reports_per_turn_latency(self):
+        driver = await self._driver(make_app())
+        await driver.run_closed(concurrency=4, conversations=8, duration=None)
+        report = driver.report(elapsed=1.0)
+        self.assertEqual(report["requests"], 24)
+        self.assertEqual(report["conversations"], {"started": 8, "completed": 8})
+        self.assertEqual([t["turn"] for t in report["per_turn"]], [1, 2, 3])
+        self.assertEqual(report["errors"]["total"], 0)
+        self.assertIsNotNone(report["endpoints"]["/api/chat"]["latency_ms"]["p99"])
+
+    async def test_errors_are_counted_and_end_the_conversation(self):
+        driver = await self._driver(make_app(fail_on_turn=2))
+        await driver.run_open(rate=200, conversations=5, duration=None)
+        report = driver.report(elapsed=1.0)
+        self.assertEqual(report["errors"]["by_kind"], {"503": 5})
+        self.assertEqual(report["requests"], 10)
+        self.assertEqual(report["conversations"]["completed"], 0)
+
+    def test_percentiles(self):
+        stats = percentiles(list(range(1, 101)))
+        self.assertEqual((stats["p50"], stats["p95"], stats["p99"]), (51, 96, 100))
+        self.assertIsNone(percentiles([])["p50"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,8 @@
 import unittest
-from memory import MemoryStore
+from types import SimpleNamespace
+
+from memory import MemoryStore, estimate_chat_size
+from session_store import InMemorySessionStore
 
 class TestMemoryStore(unittest.TestCase):
     def setUp(self):
@@ -17,5 +20,16 @@ class TestMemoryStore(unittest.TestCase):
         self.store.clear(self.session_id)
         self.assertIsNone(self.store.get(self.session_id))
 
+    def test_byte_cap_measures_chat_history(self):
+        store = MemoryStore(InMemorySessionStore(max_bytes=50_000, size_of=estimate_chat_size))
+        chat = SimpleNamespace(history=[])
+        store.set("old", chat)
+        store.set("new", SimpleNamespace(history=[]))
+        # the first chat grows past the cap; re-setting it re-measures the history
+        chat.history.append(SimpleNamespace(parts=[SimpleNamespace(text="x" * 60_000)]))
+        store.set("old", chat)
+        self.assertIsNone(store.get("new"))
+        self.assertGreater(estimate_chat_size(chat), 60_000)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,89 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage
+
+import server
+from server import AppConfig, create_app
+from metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_histogram_exposition(self):
+        hist = self.registry.histogram("stage_seconds", "Stage latency", ["stage"], buckets=(0.1, 1.0))
+        hist.observe(0.05, stage="llm")
+        hist.observe(0.5, stage="llm")
+        hist.observe(3.0, stage="llm")
+        text = self.registry.render()
+        self.assertIn("# TYPE stage_seconds histogram", text)
+        self.assertIn('stage_seconds_bucket{stage="llm",le="0.1"} 1', text)
+        self.assertIn('stage_seconds_bucket{stage="llm",le="1.0"} 2', text)
+        self.assertIn('stage_seconds_bucket{stage="llm",le="+Inf"} 3', text)
+        self.assertIn('stage_seconds_count{stage="llm"} 3', text)
+        self.assertIn('stage_seconds_sum{stage="llm"} 3.55', text)
+
+    def test_timed_decorator_handles_sync_and_async(self):
+        hist = self.registry.histogram("work_seconds", "Work", ["kind"])
+
+        @hist.timed(kind="sync")
+        def work():
+            return 1
+
+        @hist.timed(kind="async")
+        async def async_work():
+            return 2
+
+        self.assertEqual(work(), 1)
+        self.assertEqual(asyncio.run(async_work()), 2)
+        self.assertEqual(hist.count(kind="sync"), 1)
+        self.assertEqual(hist.count(kind="async"), 1)
+
+    def test_counter_and_gauge(self):
+        saved = self.registry.counter("saved_total", "Saved calls")
+        depth = self.registry.gauge("queue_depth", "Queue depth", ["model"])
+        saved.inc()
+        saved.inc(2)
+        depth.set(4, model="flash")
+        text = self.registry.render()
+        self.assertIn("saved_total 3.0", text)
+        self.assertIn('queue_depth{model="flash"} 4', text)
+
+    def test_same_name_returns_same_metric(self):
+        self.assertIs(self.registry.counter("c", "C"), self.registry.counter("c", "C"))
+        with self.assertRaises(ValueError):
+            self.registry.gauge("c", "C")
+
+
+class QuickLLM:
+    async def ainvoke(self, messages):
+        return AIMessage(content="Sure!")
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    def test_chat_stages_are_exposed(self):
+        class Registry:
+            def chat_model(self, model=None, temperature=None):
+                return QuickLLM()
+
+        with patch.object(server, "get_clients", return_value=Registry()):
+            client = TestClient(create_app(AppConfig(mode="direct")))
+            client.post("/api/chat", json={"message": "Hi, I need home insurance"})
+            client.get("/wp-admin/setup-config.php")
+            response = client.get("/metrics")
+
+        self.assertTrue(response.headers["content-type"].startswith("text/plain; version=0.0.4"))
+        for stage in ("session_lookup", "keyword_routing", "llm_invoke", "session_save"):
+            self.assertIn(f'chat_stage_seconds_count{{stage="{stage}"}}', response.text)
+        self.assertIn('http_request_seconds_count{method="POST",path="/api/chat",status="200"}', response.text)
+        # unknown URLs share one series instead of adding one each
+        self.assertIn('http_request_seconds_count{method="GET",path="unmatched",status="404"}', response.text)
+        self.assertNotIn("wp-admin", response.text)
+
+
+if __name__ == "__main__":
+    unittest.main()
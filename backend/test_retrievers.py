@@ -0,0 +1,208 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from langchain_core.documents import Document
+
+import rag_system
+from fake_llm import FakeConfig, FakeEmbeddings
+from retrievers import ChromaRetriever, HybridConfig, HybridRetriever, NumpyRetriever
+
+
+def _documents(n):
+    kinds = ("auto", "home", "general")
+    return [Document(page_content=f"policy {i} covers {kinds[i % 3]} claims and item{i}",
+                     metadata={"type": kinds[i % 3], "id": str(i)}) for i in range(n)]
+
+
+class TestNumpyRetriever(unittest.TestCase):
+    def setUp(self):
+        self.embeddings = FakeEmbeddings(FakeConfig(embedding_dim=64))
+        self.retriever = NumpyRetriever(self.embeddings, initial_capacity=4)
+
+    def _brute_force(self, query, k, kind=None):
+        docs = [d for d in self.retriever._documents if kind is None or d.metadata["type"] == kind]
+        q = np.asarray(self.embeddings.embed_query(query))
+        scores = [float(np.dot(q, self.embeddings.embed_query(d.page_content))) for d in docs]
+        order = sorted(range(len(docs)), key=lambda i: -scores[i])
+        return [scores[i] for i in order[:k]]
+
+    def _scores(self, query, docs):
+        q = np.asarray(self.embeddings.embed_query(query))
+        return [float(np.dot(q, self.embeddings.embed_query(d.page_content))) for d in docs]
+
+    def test_exact_top_k_across_growth(self):
+        # capacity 4 → several reallocations; rows must survive each copy
+        for start in range(0, 50, 7):
+            self.retriever.add_documents(_documents(50)[start:start + 7])
+        self.assertEqual(self.retriever.count(), 50)
+        for query in ("home claims item7", "auto policy", "nothing matches here"):
+            found = self.retriever.search(query, k=5)
+            self.assertEqual(len(found), 5)
+            np.testing.assert_allclose(self._scores(query, found), self._brute_force(query, 5), atol=1e-5)
+
+    def test_filter_mask(self):
+        self.retriever.add_documents(_documents(30))
+        found = self.retriever.search("claims item4", k=3, filter={"type": "home"})
+        self.assertTrue(all(d.metadata["type"] == "home" for d in found))
+        np.testing.assert_allclose(self._scores("claims item4", found),
+                                   self._brute_force("claims item4", 3, "home"), atol=1e-5)
+        # fewer matches than k, and masks rebuilt after an insert
+        self.assertEqual(len(self.retriever.search("x", k=5, filter={"id": "3"})), 1)
+        self.retriever.add_documents([Document(page_content="late", metadata={"id": "3"})])
+        self.assertEqual(len(self.retriever.search("x", k=5, filter={"id": "3"})), 2)
+        self.assertEqual(self.retriever.search("x", k=5, filter={"type": "life"}), [])
+
+    def test_precomputed_embedding_skips_embed_call(self):
+        self.retriever.add_documents(_documents(5))
+        query = self.embeddings.embed_query("auto claims")
+        with mock.patch.object(self.embeddings, "embed_query", side_effect=AssertionError):
+            self.assertEqual(len(self.retriever.search("auto claims", k=2, embedding=query)), 2)
+
+    def test_empty(self):
+        self.assertEqual(self.retriever.search("anything"), [])
+        self.assertEqual(self.retriever.count(), 0)
+
+    def test_every_write_bumps_version(self):
+        doc = _documents(1)
+        self.retriever.add_documents(doc, ids=["a"])
+        version = self.retriever.version
+        self.retriever.add_documents(doc, ids=["a"])  # in-place re-embed: same id, same count
+        self.assertGreater(self.retriever.version, version)
+        hybrid = HybridRetriever(self.retriever)
+        version = hybrid.version
+        hybrid.delete(["a"])
+        self.assertGreater(hybrid.version, version)
+
+    def test_write_during_search_keeps_rows_and_documents_aligned(self):
+        self.retriever.add_documents(_documents(5), ids=[f"c{i}" for i in range(5)])
+        target = Document(page_content="the one document every search must find", metadata={})
+        self.retriever.add_documents([target], ids=["target"])
+        embed_query = self.embeddings.embed_query
+
+        def embed_while_deleting(text):
+            # a concurrent delete lands mid-search and moves the target (last row) into row 0
+            self.retriever.delete(["c0"])
+            return embed_query(text)
+
+        with mock.patch.object(self.embeddings, "embed_query", side_effect=embed_while_deleting):
+            self.assertIs(self.retriever.search(target.page_content, k=1)[0], target)
+
+class FailingRetriever(NumpyRetriever):
+    def search(self, query, k=3, filter=None, embedding=None):
+        raise RuntimeError("vector store down")
+
+
+class TestHybridRetriever(unittest.TestCase):
+    def setUp(self):
+        self.embeddings = FakeEmbeddings(FakeConfig(embedding_dim=64))
+        self.documents = [Document(page_content=item["content"], metadata=item["metadata"])
+                          for item in rag_system.INSURANCE_KNOWLEDGE]
+        self.retriever = HybridRetriever(NumpyRetriever(self.embeddings), HybridConfig())
+        self.retriever.add_documents(self.documents)
+
+    def test_exact_term_skips_embedding(self):
+        with mock.patch.object(self.embeddings, "embed_query", side_effect=AssertionError("embedded")):
+            for query in ("What is ALE?", "Explain 50/100/50"):
+                found = self.retriever.search(query, k=2)
+                self.assertIn(query.split()[-1].rstrip("?"), found[0].page_content)
+
+    def test_unconfident_query_is_fused(self):
+        with mock.patch.object(self.embeddings, "embed_query", wraps=self.embeddings.embed_query) as embed:
+            found = self.retriever.search("How does a deductible work on a home policy?", k=3)
+        embed.assert_called_once()
+        self.assertEqual(len(found), 3)
+        self.assertEqual(len({d.page_content for d in found}), 3)
+        # a precomputed embedding always takes the fused path
+        vector = self.embeddings.embed_query("What is ALE?")
+        self.assertEqual(len(self.retriever.search("What is ALE?", k=3, embedding=vector)), 3)
+
+    def test_filter_applies_to_both_rankings(self):
+        found = self.retriever.search("coverage deductible", k=3, filter={"type": "auto"})
+        self.assertTrue(found and all(d.metadata["type"] == "auto" for d in found))
+
+    def test_delete_where_filters_both_indexes(self):
+        self.retriever.delete_where({"type": "home"})
+        self.assertIsNone(self.retriever.lexical_match("What is ALE?"))
+        found = self.retriever.search("What is ALE?", k=5)
+        self.assertTrue(found and all(d.metadata["type"] != "home" for d in found))
+
+    def test_lexical_fallback_when_vector_search_fails(self):
+        retriever = HybridRetriever(FailingRetriever(self.embeddings))
+        retriever.add_documents(self.documents)
+        self.assertTrue(retriever.search("deductible home policy worth", k=2))
+        with self.assertRaises(RuntimeError):
+            retriever.search("zzz unknown", k=2)
+
+
+class FakeCollection:
+    def __init__(self):
+        self.rows = {}
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.rows.update(zip(ids, documents))
+
+    def delete(self, where):
+        self.rows.clear()
+
+
+class FakeChroma:
+    """Stands in for one Chroma directory shared by several processes."""
+
+    def __init__(self):
+        self._collection = FakeCollection()
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self._collection.rows.pop(doc_id, None)
+
+
+class TestSharedKnowledgeVersion(unittest.TestCase):
+    def test_writes_by_another_instance_change_the_version(self):
+        store = FakeChroma()
+        with tempfile.TemporaryDirectory() as directory:
+            stamp = os.path.join(directory, "kb_version")
+            worker = HybridRetriever(ChromaRetriever(lambda: store, stamp))
+            ingest_cli = ChromaRetriever(lambda: store, stamp)
+            with mock.patch.object(rag_system, "_retriever", worker):
+                seen = {rag_system.knowledge_version()}
+                ingest_cli.add_documents(_documents(2), ids=["a", "b"], embeddings=[[1.0], [0.5]])
+                seen.add(rag_system.knowledge_version())
+                ingest_cli.delete(["a"])
+                seen.add(rag_system.knowledge_version())
+                ingest_cli.delete_where({"type": "auto"})
+                seen.add(rag_system.knowledge_version())
+                self.assertEqual(len(seen), 4)
+                self.assertEqual(rag_system.knowledge_version(), rag_system.knowledge_version())
+        self.assertEqual(ChromaRetriever(lambda: store).shared_stamp(), "")
+
+
+class TestBackendSelection(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(rag_system, "_retriever", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_numpy(self):
+        with mock.patch.dict(os.environ, {"RAG_BACKEND": "numpy"}), \
+                mock.patch.object(rag_system, "get_embeddings", return_value=FakeEmbeddings(FakeConfig())):
+            retriever = rag_system.get_retriever()
+        self.assertIsInstance(retriever, HybridRetriever)
+        self.assertIsInstance(retriever.dense, NumpyRetriever)
+
+    def test_chroma_is_default(self):
+        with mock.patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("RAG_BACKEND", None)
+            os.environ["RAG_HYBRID"] = "off"
+            self.assertIsInstance(rag_system.get_retriever(), ChromaRetriever)
+
+    def test_unknown(self):
+        with mock.patch.dict(os.environ, {"RAG_BACKEND": "faiss"}):
+            with self.assertRaises(ValueError):
+                rag_system.get_retriever()
+
+
+if __name__ == "__main__":
+    unittest.main()
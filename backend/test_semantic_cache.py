@@ -0,0 +1,101 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage
+
+import server
+from server import AppConfig, create_app
+from semantic_cache import SemanticCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSemanticCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = SemanticCache(threshold=0.9, ttl_seconds=60, max_entries=2, clock=self.clock)
+
+    def test_similar_query_hits(self):
+        self.cache.store([1.0, 0.0, 0.1], "answer")
+        self.assertEqual(self.cache.lookup([0.98, 0.0, 0.12]), "answer")
+        self.assertIsNone(self.cache.lookup([0.0, 1.0, 0.0]))
+        self.assertEqual(self.cache.stats()["hit_rate"], 0.5)
+
+    def test_namespaces_are_isolated(self):
+        self.cache.store([1.0, 0.0], "auto answer", namespace="auto")
+        self.assertIsNone(self.cache.lookup([1.0, 0.0], namespace="home"))
+        self.assertEqual(self.cache.lookup([1.0, 0.0], namespace="auto"), "auto answer")
+
+    def test_ttl_expiry(self):
+        self.cache.store([1.0, 0.0], "answer")
+        self.clock.now = 61
+        self.assertIsNone(self.cache.lookup([1.0, 0.0]))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_lru_eviction(self):
+        self.cache.store([1.0, 0.0, 0.0], "a")
+        self.cache.store([0.0, 1.0, 0.0], "b")
+        self.cache.lookup([1.0, 0.0, 0.0])  # "a" is now most recent
+        self.cache.store([0.0, 0.0, 1.0], "c")
+        self.assertEqual(self.cache.lookup([1.0, 0.0, 0.0]), "a")
+        self.assertIsNone(self.cache.lookup([0.0, 1.0, 0.0]))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_version_change_invalidates(self):
+        self.cache.store([1.0, 0.0], "old", version="v1")
+        self.assertIsNone(self.cache.lookup([1.0, 0.0], version="v2"))
+        self.assertEqual(self.cache.stats()["invalidations"], 1)
+
+
+class CountingLLM:
+    def __init__(self):
+        self.prompts = []
+
+    async def ainvoke(self, messages):
+        self.prompts.append(messages)
+        return AIMessage(content=f"Reply {len(self.prompts)}: comprehensive covers theft and vandalism.")
+
+
+class TestContextCacheInChat(unittest.TestCase):
+    def test_near_duplicate_question_reuses_retrieval_not_reply(self):
+        llm = CountingLLM()
+        vectors = {
+            "What is comprehensive coverage?": [1.0, 0.0, 0.0],
+            "what is comprehensive coverage": [0.999, 0.01, 0.0],
+        }
+        passage = Document(page_content="Comprehensive: theft, vandalism, weather damage.")
+
+        class Registry:
+            def chat_model(self, model=None, temperature=None):
+                return llm
+
+        with patch.object(server, "get_clients", return_value=Registry()), \
+             patch.object(server, "HAS_RAG", True), \
+             patch.object(server, "lexical_lookup", return_value=None, create=True), \
+             patch.object(server, "embed_query", side_effect=vectors.__getitem__, create=True), \
+             patch.object(server, "knowledge_version", return_value="kb-1", create=True), \
+             patch.object(server, "search_knowledge", return_value=[passage], create=True) as search, \
+             patch.object(server, "get_cache", return_value=SemanticCache(threshold=0.95)):
+            client = TestClient(create_app(AppConfig(mode="direct")))
+            first = client.post("/api/chat", json={"message": "What is comprehensive coverage?"}).json()
+            # Another user: must get their own reply, built on the cached passages
+            second = client.post("/api/chat", json={"message": "what is comprehensive coverage"}).json()
+
+        self.assertEqual(search.call_count, 1)
+        self.assertEqual(len(llm.prompts), 2)
+        self.assertNotEqual(first["response"], second["response"])
+        self.assertNotEqual(first["session_id"], second["session_id"])
+        self.assertIn(passage.page_content, "".join(str(m.content) for m in llm.prompts[1]))
+        self.assertNotIn(first["response"], "".join(str(m.content) for m in llm.prompts[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage
+
+import server
+from server import AppConfig, create_app
+
+
+class QuickLLM:
+    async def ainvoke(self, messages):
+        return AIMessage(content="Direct reply")
+
+
+class Registry:
+    def chat_model(self, model=None, temperature=None):
+        return QuickLLM()
+
+    def stats(self):
+        return {}
+
+
+class TestAppConfig(unittest.TestCase):
+    def test_from_env_modes(self):
+        with patch.dict(os.environ, {"APP_MODE": "native"}):
+            self.assertEqual(AppConfig.from_env().mode, "native")
+        with patch.dict(os.environ, {"USE_LANGGRAPH": "yes"}, clear=False):
+            os.environ.pop("APP_MODE", None)
+            self.assertEqual(AppConfig.from_env().mode, "langgraph")
+        self.assertEqual(AppConfig.from_env(mode="direct").mode, "direct")
+        with self.assertRaises(ValueError):
+            AppConfig(mode="telepathy")
+
+    def test_unavailable_mode_falls_back_to_direct(self):
+        with patch.object(server, "HAS_NATIVE", False):
+            self.assertEqual(AppConfig(mode="native").effective_mode(), "direct")
+
+
+class TestCreateApp(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(server, "get_clients", return_value=Registry())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_native_mode_routes_through_gemini_agent(self):
+        calls = []
+
+        def fake_agent(message, session_id):
+            calls.append((message, session_id))
+            return "Native reply"
+
+        with patch.object(server, "HAS_NATIVE", True), \
+             patch.object(server, "chat_with_agent", fake_agent, create=True):
+            client = TestClient(create_app(AppConfig(mode="native")))
+            body = client.post("/api/chat", json={"message": "Quote my car"}).json()
+            health = client.get("/health").json()
+        self.assertEqual(body["response"], "Native reply")
+        self.assertEqual(calls, [("Quote my car", body["session_id"])])
+        self.assertEqual(body["agent_state"]["insurance_type"], "auto")
+        self.assertEqual(health["orchestration"], "native")
+
+    def test_apps_share_the_session_store(self):
+        direct = TestClient(create_app(AppConfig(mode="direct")))
+        body = direct.post("/api/chat", json={"message": "Hello"}).json()
+        other = create_app(AppConfig(mode="direct"))
+        self.assertIs(other.state.sessions, direct.app.state.sessions)
+        self.assertEqual(len(other.state.sessions.get(body["session_id"])["messages"]), 2)
+
+    def test_legacy_entry_points_are_shims(self):
+        import main
+        import main_simple
+        import main_with_toggle
+
+        for module in (main, main_simple, main_with_toggle):
+            self.assertIs(module.sessions, server.get_session_store())
+            self.assertIn("/api/chat", {route.path for route in module.app.routes})
+        self.assertEqual(main_simple.app.state.config.mode, "direct")
+
+
+if __name__ == "__main__":
+    unittest.main()
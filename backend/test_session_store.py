@@ -0,0 +1,184 @@
+import json
+import os
+import tempfile
+import unittest
+
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from session_store import InMemorySessionStore, SQLiteSessionStore, estimate_size
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestInMemorySessionStore(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.evicted = []
+        self.store = InMemorySessionStore(
+            ttl_seconds=60,
+            max_entries=3,
+            max_bytes=None,
+            on_evict=lambda sid, session, reason: self.evicted.append((sid, reason)),
+            clock=self.clock,
+        )
+
+    def test_put_get_delete(self):
+        self.store.put("a", {"messages": []})
+        self.assertEqual(self.store.get("a"), {"messages": []})
+        self.assertIn("a", self.store)
+        self.assertTrue(self.store.delete("a"))
+        self.assertIsNone(self.store.get("a"))
+        self.assertFalse(self.store.delete("a"))
+        self.assertEqual(self.evicted, [])
+
+    def test_idle_ttl(self):
+        self.store.put("a", {})
+        self.store.put("b", {})
+        self.clock.now = 45
+        self.store.get("a")  # touching "a" keeps it alive
+        self.clock.now = 90
+        self.assertIsNotNone(self.store.get("a"))
+        self.assertIsNone(self.store.get("b"))
+        self.assertEqual(self.evicted, [("b", "ttl")])
+
+    def test_lru_entry_cap(self):
+        for sid in "abc":
+            self.store.put(sid, {})
+        self.store.get("a")
+        self.store.put("d", {})
+        self.assertEqual(len(self.store), 3)
+        self.assertIsNone(self.store.get("b"))
+        self.assertEqual(self.evicted, [("b", "capacity")])
+
+    def test_byte_cap(self):
+        store = InMemorySessionStore(ttl_seconds=None, max_entries=None, max_bytes=20_000)
+        for i in range(10):
+            store.put(str(i), {"messages": [HumanMessage(content="x" * 4000)]})
+        stats = store.stats()
+        self.assertLessEqual(stats["bytes"], 20_000)
+        self.assertGreater(stats["evictions"]["capacity"], 0)
+        self.assertIsNotNone(store.get("9"))
+
+    def test_put_reaccounts_growth(self):
+        session = {"messages": []}
+        self.store.put("a", session)
+        before = self.store.stats()["bytes"]
+        session["messages"].append(HumanMessage(content="y" * 1000))
+        self.store.put("a", session)
+        self.assertGreater(self.store.stats()["bytes"], before + 1000)
+
+    def test_estimate_size_counts_message_content(self):
+        small = estimate_size({"messages": [HumanMessage(content="hi")]})
+        large = estimate_size({"messages": [HumanMessage(content="hi" * 1000)]})
+        self.assertGreater(large - small, 1900)
+
+
+class TestSQLiteSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "sessions.db")
+        self.clock = FakeClock()
+        self.clock.now = 1000.0
+        self.store = SQLiteSessionStore(self.path, ttl_seconds=60, clock=self.clock)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def session(self):
+        return {
+            "messages": [HumanMessage(content="I need car insurance"), AIMessage(content="How old are you?")],
+            "user_info": {"age": 30},
+            "insurance_type": "auto",
+            "quote_result": None,
+        }
+
+    def test_round_trip(self):
+        self.store.put("s1", self.session())
+        loaded = self.store.get("s1")
+        self.assertEqual(loaded["user_info"], {"age": 30})
+        self.assertEqual(loaded["insurance_type"], "auto")
+        self.assertIsInstance(loaded["messages"][0], HumanMessage)
+        self.assertIsInstance(loaded["messages"][1], AIMessage)
+        self.assertEqual(loaded["messages"][1].content, "How old are you?")
+
+    def test_tool_messages_round_trip(self):
+        session = self.session()
+        session["messages"] += [
+            AIMessage(content="", tool_calls=[{"name": "calculate_auto_premium", "args": {"age": 30}, "id": "c1"}]),
+            ToolMessage(content='{"monthly_premium": 95.0}', tool_call_id="c1"),
+        ]
+        self.store.put("s1", session)
+        call, result = self.store.get("s1")["messages"][2:]
+        self.assertIsInstance(call, AIMessage)
+        self.assertEqual(call.tool_calls[0]["name"], "calculate_auto_premium")
+        self.assertEqual(call.tool_calls[0]["args"], {"age": 30})
+        self.assertIsInstance(result, ToolMessage)
+        self.assertEqual((result.content, result.tool_call_id), ('{"monthly_premium": 95.0}', "c1"))
+
+    def test_put_appends_only_new_messages(self):
+        session = self.session()
+        self.store.put("s1", session)
+        session["messages"][0] = HumanMessage(content="rewritten in memory")
+        session["messages"].append(HumanMessage(content="I'm 30"))
+        self.store.put("s1", session)
+        loaded = self.store.get("s1")
+        self.assertEqual(len(loaded["messages"]), 3)
+        self.assertEqual(loaded["messages"][0].content, "I need car insurance")
+        self.assertEqual(loaded["messages"][2].content, "I'm 30")
+
+    def test_concurrent_turns_are_merged(self):
+        self.store.put("s1", self.session())
+        first, second = self.store.get("s1"), self.store.get("s1")
+        first["messages"] += [HumanMessage(content="I'm 30"), AIMessage(content="Which car?")]
+        second["messages"] += [HumanMessage(content="Also home?"), AIMessage(content="Sure.")]
+        self.store.put("s1", first)
+        self.store.put("s1", second)  # loaded before first's write
+        contents = [m.content for m in self.store.get("s1")["messages"]]
+        self.assertEqual(contents[2:], ["I'm 30", "Which car?", "Also home?", "Sure."])
+        # the merged dict now holds the stored history and keeps appending
+        self.assertEqual(len(second["messages"]), 6)
+        second["messages"].append(HumanMessage(content="Thanks"))
+        self.store.put("s1", second)
+        self.assertEqual(self.store.get("s1")["messages"][-1].content, "Thanks")
+        self.assertNotIn("_loaded", json.loads(self.store._connect().execute(
+            "SELECT state FROM sessions WHERE id = 's1'").fetchone()[0]))
+
+    def test_shared_between_workers(self):
+        self.store.put("s1", self.session())
+        other_worker = SQLiteSessionStore(self.path, ttl_seconds=60, clock=self.clock)
+        try:
+            self.assertEqual(other_worker.get("s1")["insurance_type"], "auto")
+            self.assertTrue(other_worker.delete("s1"))
+        finally:
+            other_worker.close()
+        self.assertIsNone(self.store.get("s1"))
+
+    def test_ttl_and_purge(self):
+        self.store.put("old", self.session())
+        self.clock.now += 61
+        self.store.put("new", self.session())
+        self.assertIsNone(self.store.get("old"))
+        self.assertEqual(self.store.purge_expired(), 1)
+        self.assertEqual(len(self.store), 1)
+        self.assertEqual(self.store.stats()["evictions"]["ttl"], 1)
+
+
+class TestHealthReportsStore(unittest.TestCase):
+    def test_health_includes_store_stats(self):
+        import main
+
+        body = TestClient(main.app).get("/health").json()
+        self.assertEqual(body["session_store"]["backend"], "memory")
+        self.assertIn("evictions", body["session_store"])
+
+
+if __name__ == "__main__":
+    unittest.main()
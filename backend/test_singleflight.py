@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from singleflight import SingleFlight, normalize_key
+
+
+class TestSingleFlightAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_duplicates_share_one_call(self):
+        flight = SingleFlight("test")
+        executions = 0
+
+        async def upstream():
+            nonlocal executions
+            executions += 1
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        key = normalize_key("What is ALE?")
+        results = await asyncio.gather(*(flight.do(key, upstream) for _ in range(20)))
+        self.assertEqual(results, ["answer"] * 20)
+        self.assertEqual(executions, 1)
+        stats = flight.stats()
+        self.assertEqual(stats["coalesced"], 19)
+        self.assertEqual(stats["top_keys"][0]["fan_in"], 20.0)
+
+    async def test_errors_are_shared_and_not_cached(self):
+        flight = SingleFlight("test")
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("quota exceeded")
+
+        results = await asyncio.gather(flight.do("k", failing), flight.do("k", failing), return_exceptions=True)
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+        async def ok():
+            return "recovered"
+
+        self.assertEqual(await flight.do("k", ok), "recovered")
+
+    async def test_cancelled_caller_does_not_cancel_upstream(self):
+        flight = SingleFlight("test")
+
+        async def upstream():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("k", upstream))
+        second = asyncio.ensure_future(flight.do("k", upstream))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.assertEqual(await second, "done")
+
+
+class TestSingleFlightSync(unittest.TestCase):
+    def test_threads_share_one_call(self):
+        flight = SingleFlight("test")
+        executions = 0
+        lock = threading.Lock()
+
+        def upstream():
+            nonlocal executions
+            with lock:
+                executions += 1
+            time.sleep(0.1)
+            return ["doc"]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: flight.do_sync("k", upstream), range(8)))
+        self.assertEqual(results, [["doc"]] * 8)
+        self.assertEqual(executions, 1)
+
+    def test_key_normalization(self):
+        self.assertEqual(normalize_key("  What is  ALE? "), normalize_key("what is ale?"))
+        self.assertNotEqual(normalize_key("q", 2, "auto"), normalize_key("q", 2, "home"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import unittest
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Cumulative `python -X importtime` budget for `import server` (override on slow CI)
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "2.0"))
+
+# Modules that must only load when a component is initialised, never on import
+HEAVY_MODULES = ("google.generativeai", "langchain_google_genai", "langchain_chroma", "chromadb", "langgraph.graph")
+
+
+def run_python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "LLM_PROVIDER": "fake"}
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=BACKEND_DIR, env=env,
+                          capture_output=True, text=True, timeout=120)
+
+
+class TestImportTime(unittest.TestCase):
+    def test_import_server_is_under_budget(self):
+        result = run_python("import server", "-X", "importtime")
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        match = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| server$", result.stderr, re.MULTILINE)
+        self.assertIsNotNone(match, "no importtime line for server")
+        seconds = int(match.group(1)) / 1e6
+        self.assertLess(seconds, IMPORT_BUDGET_SECONDS, f"import server took {seconds:.2f}s")
+
+    def test_import_has_no_heavy_side_effects(self):
+        code = ("import json, sys, server, langgraph_agent, gemini_agent, document_analyzer, rag_system\n"
+                f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+                "print(json.dumps([langgraph_agent._agent_graph is None, gemini_agent.model is None,"
+                " document_analyzer.vision_model is None, rag_system._vectorstore is None]))")
+        result = run_python(code)
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        loaded, untouched = (json.loads(line) for line in result.stdout.strip().splitlines()[-2:])
+        self.assertEqual(loaded, [])
+        self.assertEqual(untouched, [True, True, True, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
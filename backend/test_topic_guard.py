@@ -0,0 +1,110 @@
+import os
+import threading
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage, HumanMessage
+
+import server
+from benchmarks.bench_intent_router import LABELLED
+from server import AppConfig, create_app
+from topic_guard import REFUSAL, TopicGuard, TopicGuardConfig, off_topic_score
+
+
+class FailingLLM:
+    async def ainvoke(self, messages):
+        raise AssertionError("off-topic input must not reach the LLM")
+
+    async def astream(self, messages):
+        raise AssertionError("off-topic input must not reach the LLM")
+        yield
+
+
+class Registry:
+    def chat_model(self, model=None, temperature=None):
+        return FailingLLM()
+
+    def stats(self):
+        return {}
+
+
+class TestTopicGuard(unittest.TestCase):
+    def test_threshold(self):
+        self.assertEqual(off_topic_score("What is my deductible?"), 0.0)
+        self.assertEqual(off_topic_score("Write a poem about football insurance"), 0.0)
+        strict = TopicGuard(TopicGuardConfig(threshold=0.9))
+        self.assertIsNone(strict.refusal_for("Tell me a joke"))
+        self.assertEqual(strict.refusal_for("Tell me a joke about football"), REFUSAL)
+        self.assertIsNone(TopicGuard(TopicGuardConfig(enabled=False)).refusal_for("Tell me a joke"))
+        self.assertEqual(strict.stats()["llm_calls_saved"], 1)
+
+    def test_labelled_openers(self):
+        guard = TopicGuard(TopicGuardConfig())
+        for message, _, _, off_topic in LABELLED:
+            self.assertEqual(guard.refusal_for(message) == REFUSAL, off_topic, message)
+        for message in ("Tell me a joke", "Write me a poem", "Who won the football game?"):
+            self.assertEqual(guard.refusal_for(message), REFUSAL, message)
+
+    def test_saved_counter_is_atomic(self):
+        guard = TopicGuard(TopicGuardConfig())
+        threads = [threading.Thread(target=lambda: [guard.refusal_for("Tell me a joke") for _ in range(500)])
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(guard.saved, 4000)
+
+    def test_quote_answers_are_not_refused(self):
+        guard = TopicGuard(TopicGuardConfig())
+        for message in ("My zip code is 94105", "Does it cover hail and weather?", "What about weather damage?",
+                        "I work as a football coach", "I cook for a living", "I teach programming at a college"):
+            self.assertIsNone(guard.refusal_for(message), message)
+        self.assertEqual(guard.refusal_for("Write a poem about football"), REFUSAL)
+
+    def test_from_env(self):
+        with patch.dict(os.environ, {"OFFTOPIC_GUARD": "off", "OFFTOPIC_THRESHOLD": "0.9"}):
+            self.assertEqual(TopicGuardConfig.from_env(), TopicGuardConfig(enabled=False, threshold=0.9))
+
+
+class TestShortCircuit(unittest.TestCase):
+    def setUp(self):
+        self.guard = TopicGuard(TopicGuardConfig())
+        for p in (patch.object(server, "get_clients", return_value=Registry()),
+                  patch.object(server, "get_topic_guard", return_value=self.guard)):
+            p.start()
+            self.addCleanup(p.stop)
+        self.client = TestClient(create_app(AppConfig(mode="direct")))
+
+    def test_chat_and_stream_refuse_without_llm(self):
+        body = self.client.post("/api/chat", json={"message": "Write me a poem about football"}).json()
+        self.assertEqual(body["response"], REFUSAL)
+        self.assertEqual(body["agent_state"]["message_count"], 2)
+        stream = self.client.post("/api/chat/stream", json={"message": "Tell me a joke about movies"}).text
+        self.assertIn(REFUSAL, stream)
+        self.assertIn("event: done", stream)
+        self.assertEqual(self.guard.saved, 2)
+
+    def test_guard_skips_conversations_under_way(self):
+        session = server.new_session()
+        session["messages"] = [HumanMessage(content="Hi"), AIMessage(content="Hello"),
+                               HumanMessage(content="Tell me a joke about football")]
+        self.assertIsNone(server.off_topic_refusal(session, "Tell me a joke about football", "direct"))
+        fresh = server.new_session()
+        fresh["insurance_type"] = "auto"
+        fresh["messages"] = [HumanMessage(content="Tell me a joke about football")]
+        self.assertIsNone(server.off_topic_refusal(fresh, "Tell me a joke about football", "direct"))
+        fresh["insurance_type"] = None
+        self.assertEqual(server.off_topic_refusal(fresh, "Tell me a joke about football", "direct"), REFUSAL)
+
+    def test_native_agent_refuses_locally(self):
+        import gemini_agent
+
+        with patch.object(gemini_agent, "get_topic_guard", return_value=self.guard), \
+             patch.object(gemini_agent, "get_model", side_effect=AssertionError("no Gemini call")):
+            self.assertEqual(gemini_agent.chat_with_agent("Help with my python homework", "s1"), REFUSAL)
+
+
+if __name__ == "__main__":
+    unittest.main()
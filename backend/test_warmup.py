@@ -0,0 +1,64 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+import server
+from server import AppConfig, create_app
+from warmup import Warmup, WarmupStep
+
+
+def fail():
+    raise RuntimeError("chroma unavailable")
+
+
+class TestWarmup(unittest.TestCase):
+    def test_steps_are_timed_and_optional_failures_do_not_block_readiness(self):
+        warmup = Warmup([WarmupStep("sleep", lambda: time.sleep(0.02), required=True),
+                         WarmupStep("vector_store", fail)])
+        self.assertEqual(warmup.status()["pending"], ["sleep", "vector_store"])
+        self.assertTrue(warmup.run())
+        status = warmup.status()
+        self.assertEqual(status["status"], "ready")
+        self.assertGreaterEqual(status["steps"]["sleep"]["seconds"], 0.02)
+        self.assertFalse(status["steps"]["vector_store"]["ok"])
+        self.assertIn("chroma unavailable", status["steps"]["vector_store"]["error"])
+
+    def test_required_failure_keeps_process_not_ready(self):
+        warmup = Warmup([WarmupStep("agent_graph", fail, required=True)])
+        self.assertFalse(warmup.run())
+        self.assertEqual(warmup.state, "failed")
+        self.assertFalse(warmup.run())  # runs once
+
+    def test_steps_follow_the_mode(self):
+        with patch.object(server, "HAS_LANGGRAPH", True), patch.object(server, "HAS_RAG", False), \
+             patch.object(server, "HAS_DOC_ANALYZER", False):
+            names = [s.name for s in server.warmup_steps(AppConfig(mode="langgraph"))]
+        self.assertEqual(names, ["clients", "agent_graph"])
+
+
+class TestReadyEndpoint(unittest.TestCase):
+    def test_ready_turns_green_after_warmup(self):
+        release = threading.Event()
+        steps = [WarmupStep("agent_graph", lambda: release.wait(5), required=True)]
+        with patch.object(server, "warmup_steps", return_value=steps):
+            app = create_app(AppConfig(mode="direct"))
+        with TestClient(app) as client:
+            response = client.get("/ready")
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.json()["pending"], ["agent_graph"])
+            self.assertEqual(client.get("/health").status_code, 200)  # liveness is independent
+
+            release.set()
+            deadline = time.monotonic() + 5
+            while client.get("/ready").status_code != 200 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            body = client.get("/ready").json()
+        self.assertTrue(body["ready"])
+        self.assertIn("seconds", body["steps"]["agent_graph"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+import server
+from server import AppConfig, create_app
+from test_chat_stream import StreamingGraph, StreamingRegistry
+
+
+def receive_turn(ws):
+    """Collect events until the turn's ``done`` (or ``error``)."""
+    events = []
+    while True:
+        event = ws.receive_json()
+        events.append(event)
+        if event["type"] in ("done", "error"):
+            return events
+
+
+class TestWebSocketChat(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(server, "get_clients", return_value=StreamingRegistry())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_session_is_bound_and_resumed(self):
+        client = TestClient(create_app(AppConfig(mode="direct")))
+        with client.websocket_connect("/ws/chat") as ws:
+            hello = ws.receive_json()
+            self.assertEqual((hello["type"], hello["resumed"]), ("session", False))
+            for text in ("I need car insurance", "What about theft?"):
+                ws.send_json({"type": "message", "message": text})
+                events = receive_turn(ws)
+                self.assertEqual([e["text"] for e in events if e["type"] == "token"],
+                                 ["Comprehensive ", "covers ", "theft."])
+            self.assertEqual(events[-1]["agent_state"]["message_count"], 4)
+            ws.send_json({"type": "ping"})
+            self.assertEqual(ws.receive_json()["type"], "pong")
+            ws.send_json({"type": "message"})
+            self.assertEqual(ws.receive_json()["type"], "error")
+
+        with client.websocket_connect(f"/ws/chat?session_id={hello['session_id']}") as ws:
+            resumed = ws.receive_json()
+        self.assertTrue(resumed["resumed"])
+        self.assertEqual(resumed["agent_state"]["message_count"], 4)
+        self.assertEqual(resumed["last_response"], "Comprehensive covers theft.")
+
+    def test_quote_ready_is_pushed_after_the_turn(self):
+        with patch.object(server, "HAS_LANGGRAPH", True), \
+             patch.object(server, "get_agent_graph", return_value=StreamingGraph(), create=True):
+            client = TestClient(create_app(AppConfig(mode="langgraph")))
+            with client.websocket_connect("/ws/chat") as ws:
+                ws.receive_json()
+                ws.send_text("Please calculate my auto quote")
+                events = receive_turn(ws)
+                pushed = ws.receive_json()
+        self.assertEqual([e["node"] for e in events if e["type"] == "node"], ["gather_info", "calculate_quote"])
+        self.assertEqual(pushed, {"type": "quote_ready", "source": "chat", "quote": {"monthly_premium": 95.0}})
+
+    def test_document_quote_is_pushed_to_the_open_connection(self):
+        analysis = {"success": True, "extracted_data": {"policy_type": "Auto"}}
+        with patch.object(server, "HAS_DOC_ANALYZER", True), \
+             patch.object(server, "analyze_insurance_document", return_value=analysis, create=True), \
+             patch.object(server, "generate_comparison_quote", return_value={"monthly_savings": 12}, create=True):
+            client = TestClient(create_app(AppConfig(mode="direct")))
+            with client.websocket_connect("/ws/chat") as ws:
+                session_id = ws.receive_json()["session_id"]
+                # the UI sends the id as a form field; the query parameter also works
+                responses = [
+                    client.post("/api/analyze-quote", data={"session_id": session_id},
+                                files={"file": ("policy.png", b"png", "image/png")}),
+                    client.post(f"/api/analyze-quote?session_id={session_id}",
+                                files={"file": ("policy.png", b"png", "image/png")}),
+                ]
+                pushed = [ws.receive_json(), ws.receive_json()]
+        self.assertEqual([r.status_code for r in responses], [200, 200])
+        self.assertEqual(pushed, [{"type": "quote_ready", "source": "document", "quote": {"monthly_savings": 12}}] * 2)
+
+    def test_each_message_rereads_the_session(self):
+        client = TestClient(create_app(AppConfig(mode="direct")))
+        with client.websocket_connect("/ws/chat") as ws:
+            session_id = ws.receive_json()["session_id"]
+            ws.send_json({"type": "message", "message": "I need car insurance"})
+            receive_turn(ws)
+            client.post(f"/api/reset?session_id={session_id}")
+            ws.send_json({"type": "message", "message": "What about theft?"})
+            done = receive_turn(ws)[-1]
+        # the turn after the reset starts from the empty session, not the stale dict
+        self.assertEqual(done["agent_state"]["message_count"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Local off-topic short-circuit
+Scores the opening message of a conversation with the intent router and
+answers clearly off-topic input with the fixed refusal the system prompt asks
+for, skipping the Gemini round trip. Every skipped call is counted.
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+
+import metrics
+from intent_router import route
+
+# Same sentence the system prompt tells the model to use
+REFUSAL = "I can only assist with insurance-related inquiries."
+
+SAVED_CALLS = metrics.counter("offtopic_short_circuits_total",
+                              "LLM calls skipped by the local off-topic classifier", ["path"])
+
+
+@dataclass(frozen=True)
+class TopicGuardConfig:
+    """``OFFTOPIC_GUARD`` (on/off) and ``OFFTOPIC_THRESHOLD`` (0–1, higher = stricter).
+
+    The default 0.8 refuses one strong off-topic term ("Tell me a joke") or two
+    weak ones; one weak word ("I work as a football coach") is not enough.
+    """
+
+    enabled: bool = True
+    threshold: float = 0.8
+
+    @classmethod
+    def from_env(cls) -> "TopicGuardConfig":
+        load_dotenv()
+        return cls(
+            enabled=os.getenv("OFFTOPIC_GUARD", "on").lower() not in ("off", "no", "false", "0"),
+            threshold=float(os.getenv("OFFTOPIC_THRESHOLD", "0.8")),
+        )
+
+
+def off_topic_score(message: str) -> float:
+    """Confidence that *message* is off-topic.
+
+    0 when any insurance, auto or home term is present; otherwise off-topic
+    terms add evidence by weight (strong 2, weak 1): weight 1 → 0.6,
+    2 → 0.84, 3 → 0.94.
+    """
+    return 1 - 0.4 ** route(message).off_topic_weight
+
+
+class TopicGuard:
+    """Thresholded off-topic check in front of the LLM call."""
+
+    def __init__(self, config: TopicGuardConfig):
+        self.config = config
+        self.saved = 0
+        self._lock = threading.Lock()
+
+    def refusal_for(self, message: str, path: str = "direct") -> Optional[str]:
+        """Return the refusal if *message* is off-topic with enough confidence, else ``None``."""
+        if not self.config.enabled:
+            return None
+        if off_topic_score(message) < self.config.threshold:
+            return None
+        with self._lock:
+            self.saved += 1
+        SAVED_CALLS.inc(path=path)
+        return REFUSAL
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.config.enabled,
+            "threshold": self.config.threshold,
+            "llm_calls_saved": self.saved,
+        }
+
+
+_guard: Optional[TopicGuard] = None
+_guard_lock = threading.Lock()
+
+
+def get_topic_guard() -> TopicGuard:
+    """Return the process-wide guard (configured from the environment)."""
+    global _guard
+    if _guard is None:
+        with _guard_lock:
+            if _guard is None:
+                _guard = TopicGuard(TopicGuardConfig.from_env())
+    return _guard
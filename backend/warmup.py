@@ -0,0 +1,84 @@
+"""
+Startup warm-up and readiness
+Runs the steps the first real request would otherwise pay for (opening Chroma,
+embedding a query, compiling the agent graph, building clients) and times each
+one, so a readiness probe only goes green on a warm process.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional
+
+import metrics
+
+STEP_SECONDS = metrics.gauge("warmup_step_seconds", "Duration of each startup warm-up step", ["step"])
+READY = metrics.gauge("app_ready", "1 once startup warm-up has finished successfully")
+
+# Canned query used to pre-embed / pre-search (a typical knowledge question)
+WARMUP_QUERY = "What does comprehensive auto coverage include?"
+
+
+@dataclass(frozen=True)
+class WarmupStep:
+    """One warm-up action; a failed *required* step keeps the process not-ready."""
+
+    name: str
+    fn: Callable[[], object]
+    required: bool = False
+
+
+class Warmup:
+    """Runs its steps once, in order, and reports progress for ``/ready``."""
+
+    def __init__(self, steps: Iterable[WarmupStep]):
+        self.steps = list(steps)
+        self.state = "pending"  # pending → running → ready | failed
+        self.results: Dict[str, dict] = {}
+        self.started_at: Optional[float] = None
+        self.total_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def run(self) -> bool:
+        """Run every step (a failing step does not stop the others); returns :attr:`ready`."""
+        with self._lock:
+            if self.state != "pending":
+                return self.ready
+            self.state = "running"
+        self.started_at = time.time()
+        start = time.perf_counter()
+        for step in self.steps:
+            step_start = time.perf_counter()
+            error = None
+            try:
+                step.fn()
+            except Exception as e:
+                error = repr(e)
+                print(f"⚠️  Warm-up step {step.name} failed: {e}")
+            seconds = time.perf_counter() - step_start
+            STEP_SECONDS.set(seconds, step=step.name)
+            self.results[step.name] = {
+                "seconds": round(seconds, 4),
+                "ok": error is None,
+                "required": step.required,
+                "error": error,
+            }
+        self.total_seconds = round(time.perf_counter() - start, 4)
+        failed = [s.name for s in self.steps if s.required and not self.results[s.name]["ok"]]
+        self.state = "failed" if failed else "ready"
+        READY.set(1 if self.ready else 0)
+        return self.ready
+
+    def status(self) -> dict:
+        return {
+            "status": self.state,
+            "ready": self.ready,
+            "started_at": self.started_at,
+            "total_seconds": self.total_seconds,
+            "steps": dict(self.results),
+            "pending": [s.name for s in self.steps if s.name not in self.results],
+        }
@@ -1,6 +1,9 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { Send, Bot, User, Sparkles, Upload, FileText, X } from 'lucide-react';
 
+const API_URL = 'http://127.0.0.1:8000';
+const WS_URL = 'ws://127.0.0.1:8000/ws/chat';
+
 function ChatInterface() {
     const [messages, setMessages] = useState([
         {
@@ -16,6 +19,88 @@ function ChatInterface() {
     const messagesEndRef = useRef(null);
     const inputRef = useRef(null);
     const fileInputRef = useRef(null);
+    const wsRef = useRef(null);
+    const sessionIdRef = useRef(null);
+
+    const rememberSession = (id) => {
+        sessionIdRef.current = id;
+        setSessionId(id);
+    };
+
+    // Events pushed over /ws/chat (see backend server.py)
+    const handleServerEvent = (event) => {
+        switch (event.type) {
+            case 'session':
+                rememberSession(event.session_id);
+                break;
+            case 'token':
+                setMessages(prev => {
+                    const last = prev[prev.length - 1];
+                    if (last?.streaming) {
+                        return [...prev.slice(0, -1), { ...last, content: last.content + event.text }];
+                    }
+                    return [...prev, { role: 'agent', content: event.text, streaming: true }];
+                });
+                break;
+            case 'done':
+                setMessages(prev => {
+                    const last = prev[prev.length - 1];
+                    if (last?.streaming) {
+                        return [...prev.slice(0, -1), { role: 'agent', content: event.response }];
+                    }
+                    return [...prev, { role: 'agent', content: event.response }];
+                });
+                setIsLoading(false);
+                break;
+            case 'error':
+                setMessages(prev => [...prev.filter(m => !m.streaming), {
+                    role: 'agent',
+                    content: `Sorry, something went wrong: ${event.message}`
+                }]);
+                setIsLoading(false);
+                break;
+            case 'quote_ready': {
+                const premium = event.quote.monthly_premium ?? event.quote.our_monthly_premium;
+                if (premium !== undefined) {
+                    setMessages(prev => [...prev, { role: 'agent', content: `📋 Your quote is ready: $${premium}/month` }]);
+                }
+                break;
+            }
+            default:
+                break;
+        }
+    };
+
+    // One WebSocket per chat; reconnects with backoff and resumes the same session
+    useEffect(() => {
+        let closed = false;
+        let retries = 0;
+        let timer = null;
+
+        const connect = () => {
+            const id = sessionIdRef.current;
+            const ws = new WebSocket(id ? `${WS_URL}?session_id=${encodeURIComponent(id)}` : WS_URL);
+            wsRef.current = ws;
+            ws.onopen = () => { retries = 0; };
+            ws.onmessage = (message) => handleServerEvent(JSON.parse(message.data));
+            ws.onclose = () => {
+                wsRef.current = null;
+                // A turn in flight on this socket will never get its done event
+                setIsLoading(false);
+                setMessages(prev => prev.map(m => (m.streaming ? { ...m, streaming: false } : m)));
+                if (!closed) {
+                    timer = setTimeout(connect, Math.min(1000 * 2 ** retries++, 15000));
+                }
+            };
+        };
+
+        connect();
+        return () => {
+            closed = true;
+            clearTimeout(timer);
+            wsRef.current?.close();
+        };
+    }, []);
 
     const scrollToBottom = () => {
         messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
@@ -34,8 +119,14 @@ function ChatInterface() {
         setInput('');
         setIsLoading(true);
 
+        // Streamed over the open WebSocket; the reply arrives as token/done events
+        if (wsRef.current?.readyState === WebSocket.OPEN) {
+            wsRef.current.send(JSON.stringify({ type: 'message', message: input }));
+            return;
+        }
+
         try {
-            const response = await fetch('http://127.0.0.1:8000/api/chat', {
+            const response = await fetch(`${API_URL}/api/chat`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
@@ -47,7 +138,7 @@ function ChatInterface() {
             const data = await response.json();
 
             if (!sessionId) {
-                setSessionId(data.session_id);
+                rememberSession(data.session_id);
             }
 
             const agentMessage = { role: 'agent', content: data.response };
@@ -76,6 +167,10 @@ function ChatInterface() {
         setIsLoading(true);
         const formData = new FormData();
         formData.append('file', uploadedFile);
+        // Lets the server push quote_ready to this chat's WebSocket
+        if (sessionIdRef.current) {
+            formData.append('session_id', sessionIdRef.current);
+        }
 
         // Add user message about upload
         setMessages(prev => [...prev, {
@@ -84,7 +179,7 @@ function ChatInterface() {
         }]);
 
         try {
-            const response = await fetch('http://127.0.0.1:8000/api/analyze-quote', {
+            const response = await fetch(`${API_URL}/api/analyze-quote`, {
                 method: 'POST',
                 body: formData
             });
@@ -242,7 +337,7 @@ Would you like me to explain how we calculated this or help you switch providers
                         </div>
                     ))}
 
-                    {isLoading && (
+                    {isLoading && !messages[messages.length - 1]?.streaming && (
                         <div className="flex gap-3 justify-start">
                             <div className="h-8 w-8 rounded-full bg-gradient-to-br from-blue-500 to-purple-600 flex items-center justify-center flex-shrink-0">
                                 <Bot className="h-4 w-4 text-white" />